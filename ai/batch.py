@@ -0,0 +1,275 @@
+"""Bulk answering over JSONL question files.
+
+Each input line is a JSON object with a ``query`` (or ``question``) and optionally an
+``id``, ``pipeline`` and ``mode``; a bare JSON string is also accepted. Each output
+line is ``{"line", "id", "query", "result"}`` (or ``"error"`` instead of ``"result"``),
+written and flushed as soon as the question is answered, in completion order.
+
+The output file doubles as the checkpoint: rerunning the same command skips every
+input line that already has an output record, so an interrupted run resumes where it
+stopped. Questions already in the result cache, and repeats within the file, are not
+answered again.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+import aiofiles
+from rich.console import Console
+from rich.table import Table
+from components.answering import AnsweringEngine, resolve_pipeline
+from components.data_utility import Config
+from components.utils import cache_results, check_internet_connection, get_cached_results, log_error
+
+logger = logging.getLogger("rich")
+
+# Sentinel marking the end of the input stream
+_END = None
+
+def load_completed_lines(output_path: str) -> Set[int]:
+    """Input line numbers already answered in a previous run.
+
+    A record cut short by an interrupted write is truncated away so appending resumes
+    on a clean line.
+    """
+    completed: Set[int] = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    valid_bytes = 0
+    with open(output_path, "rb") as f:
+        for raw in f:
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError:
+                break
+            if not raw.endswith(b"\n"):
+                break
+            completed.add(record["line"])
+            valid_bytes += len(raw)
+
+    if valid_bytes < os.path.getsize(output_path):
+        logger.warning(f"Discarding a partial record at the end of {output_path}")
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return completed
+
+def parse_question(raw: str) -> Dict[str, Any]:
+    value = json.loads(raw)
+    if isinstance(value, str):
+        value = {"query": value}
+    query = str(value.get("query") or value.get("question") or "").strip()
+    if not query:
+        raise ValueError("line has no 'query' or 'question'")
+    return {**value, "query": query}
+
+class BatchRunner:
+    """Streams a question file through the answering engine with bounded concurrency.
+
+    Questions are pulled off the input in dynamic batches (up to ``batch_size``, or
+    whatever has arrived after ``batch_max_wait`` seconds) so each batch is safety
+    screened in one Prompt-Guard pass; at most ``batch_concurrency`` questions then run
+    through their pipelines at the same time.
+    """
+
+    def __init__(self, engine: AnsweringEngine, output_path: str, pipeline: str = "1", mode: Optional[str] = None, config: Optional[Config] = None) -> None:
+        self.engine = engine
+        self.config = config or engine.config
+        self.output_path = output_path
+        self.pipeline = resolve_pipeline(pipeline)
+        self.mode = mode or engine.mode
+
+        self._slots = asyncio.Semaphore(self.config.batch_concurrency)
+        self._write_lock = asyncio.Lock()
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._unflushed: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._output = None
+
+        self.stats = {"answered": 0, "cached": 0, "duplicates": 0, "flagged": 0, "errors": 0, "skipped": 0}
+        self.start_time = 0.0
+
+    @property
+    def processed(self) -> int:
+        return sum(count for key, count in self.stats.items() if key != "skipped")
+
+    @property
+    def questions_per_minute(self) -> float:
+        elapsed = time.time() - self.start_time
+        return self.processed / elapsed * 60 if elapsed > 0 else 0.0
+
+    async def _read_input(self, input_path: str, completed: Set[int], queue: asyncio.Queue) -> None:
+        try:
+            async with aiofiles.open(input_path, mode="r") as f:
+                line_number = 0
+                async for raw in f:
+                    line_number += 1
+                    if not raw.strip():
+                        continue
+                    if line_number in completed:
+                        self.stats["skipped"] += 1
+                        continue
+                    await queue.put((line_number, raw))
+        finally:
+            await queue.put(_END)
+
+    async def _next_batch(self, queue: asyncio.Queue) -> Tuple[List[Tuple[int, str]], bool]:
+        """Wait for one question, then take whatever else arrives within the batch window."""
+        item = await queue.get()
+        if item is _END:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.config.batch_max_wait
+        while len(batch) < self.config.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _END:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _write(self, record: Dict[str, Any]) -> None:
+        async with self._write_lock:
+            await self._output.write(json.dumps(record, default=str) + "\n")
+            await self._output.flush()
+        if self.processed % self.config.batch_size == 0:
+            logger.info(f"{self.processed} questions done ({self.questions_per_minute:.1f}/min)")
+
+    async def _flush_cache(self, force: bool = False) -> None:
+        if self._unflushed and (force or len(self._unflushed) >= self.config.batch_cache_flush):
+            entries, self._unflushed = self._unflushed, {}
+            try:
+                await cache_results(entries)
+            except Exception as cache_error:
+                log_error("Error caching batch results", cache_error)
+
+    async def _answer(self, line: int, question: Dict[str, Any], safety: Tuple[bool, float, float], future: asyncio.Future) -> None:
+        query = question["query"]
+        record = {"line": line, "id": question.get("id"), "query": query}
+        try:
+            result = await self.engine.answer(
+                query,
+                pipeline=question.get("pipeline", self.pipeline),
+                mode=question.get("mode", self.mode),
+                use_cache=False,
+                safety=safety
+            )
+            future.set_result(result)
+            record["result"] = result
+            if result.get("flagged"):
+                self.stats["flagged"] += 1
+            else:
+                self.stats["answered"] += 1
+                self._cache[query] = self._unflushed[query] = result
+        except Exception as e:
+            logger.error(f"Error answering line {line}: {str(e)}", exc_info=True)
+            future.set_exception(e)
+            future.exception()  # Duplicates re-raise it; nobody else needs to retrieve it
+            record["error"] = str(e)
+            self.stats["errors"] += 1
+        finally:
+            self._in_flight.pop(query, None)
+            self._slots.release()
+        await self._write(record)
+        await self._flush_cache()
+
+    async def _answer_duplicate(self, line: int, question: Dict[str, Any], future: asyncio.Future) -> None:
+        record = {"line": line, "id": question.get("id"), "query": question["query"]}
+        try:
+            record["result"] = {**await asyncio.shield(future), "duplicate": True}
+            self.stats["duplicates"] += 1
+        except Exception as e:
+            record["error"] = str(e)
+            self.stats["errors"] += 1
+        await self._write(record)
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[int, str]]) -> None:
+        to_screen: List[Tuple[int, Dict[str, Any]]] = []
+        for line, raw in batch:
+            try:
+                question = parse_question(raw)
+            except (ValueError, AttributeError) as e:
+                self.stats["errors"] += 1
+                await self._write({"line": line, "id": None, "query": None, "error": f"Invalid question: {str(e)}"})
+                continue
+
+            query = question["query"]
+            if query in self._cache:
+                self.stats["cached"] += 1
+                await self._write({"line": line, "id": question.get("id"), "query": query, "result": {**self._cache[query], "cached": True}})
+            elif query in self._in_flight:
+                self._spawn(self._answer_duplicate(line, question, self._in_flight[query]))
+            else:
+                self._in_flight[query] = asyncio.get_running_loop().create_future()
+                to_screen.append((line, question))
+
+        if not to_screen:
+            return
+        verdicts = await self.engine.screen([question["query"] for _, question in to_screen])
+        for (line, question), safety in zip(to_screen, verdicts):
+            await self._slots.acquire()  # Backpressure: stop reading while every slot is busy
+            self._spawn(self._answer(line, question, safety, self._in_flight[question["query"]]))
+
+    async def run(self, input_path: str) -> Dict[str, int]:
+        completed = load_completed_lines(self.output_path)
+        if completed:
+            logger.info(f"Resuming: {len(completed)} questions already answered in {self.output_path}")
+        self._cache = await get_cached_results()
+
+        self.start_time = time.time()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.config.batch_size * 2)
+        reader = asyncio.create_task(self._read_input(input_path, completed, queue))
+
+        async with aiofiles.open(self.output_path, mode="a") as self._output:
+            try:
+                finished = False
+                while not finished:
+                    batch, finished = await self._next_batch(queue)
+                    if batch:
+                        await self._dispatch(batch)
+                while self._tasks:
+                    await asyncio.gather(*list(self._tasks))
+                await reader  # Surfaces errors reading the input file
+            finally:
+                reader.cancel()
+                await self._flush_cache(force=True)
+        return self.stats
+
+def print_batch_report(runner: BatchRunner, console: Console) -> None:
+    elapsed = time.time() - runner.start_time
+    table = Table(title="Batch Answering", show_header=True, header_style="bold magenta")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green", justify="right")
+    for key, count in runner.stats.items():
+        table.add_row(key.capitalize(), str(count))
+    table.add_row("Elapsed", f"{elapsed:.1f} s")
+    table.add_row("Questions / minute", f"{runner.questions_per_minute:.1f}")
+    console.print(table)
+
+async def run_batch(input_path: str, output_path: str, pipeline: str = "1", mode: str = "power", warm: bool = True, concurrency: Optional[int] = None) -> Dict[str, int]:
+    config = Config()
+    if concurrency:
+        config.batch_concurrency = concurrency
+
+    engine = AnsweringEngine(mode=mode, internet_connected=await check_internet_connection(), config=config)
+    runner = BatchRunner(engine, output_path, pipeline=pipeline, mode=mode, config=config)
+    async with engine:
+        if warm:
+            logger.info("Preloading models before answering")
+            await engine.warm([runner.pipeline])
+        stats = await runner.run(input_path)
+    print_batch_report(runner, Console())
+    return stats
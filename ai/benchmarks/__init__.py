@@ -0,0 +1,4 @@
+"""Benchmarks for the answering pipeline.
+
+Run from the ``ai`` directory, e.g. ``python -m benchmarks.final_summarize``.
+"""
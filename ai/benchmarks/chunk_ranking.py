@@ -0,0 +1,66 @@
+"""Chunk ranking on large pages: dense only vs. hybrid BM25 + dense, with and without pre-filter.
+
+Dense ranking embeds every chunk of a page. The hybrid ranker fuses BM25 with the dense
+ranking (reciprocal rank fusion) and, with a pre-filter, embeds only the BM25 top-k.
+Each query is planted in a few chunks; the benchmark reports encoder rows, time and
+how many planted chunks reach the top 3. The embedding cache is cleared per run.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks.chunk_ranking [--chunks 400] [--words 120] [--prefilter-k 50]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.final_summarize import make_page
+from components.embeddings import get_embedding_service
+from components.ranking import HybridRanker
+
+QUERIES = [
+    ("how does garbage collection pause a web server", "Garbage collection pauses stall the web server while the heap is scanned."),
+    ("what limits tokenizer throughput on large pages", "Tokenizer throughput on large pages is limited by per-call overhead."),
+    ("why rotate the event log file", "The event log file is rotated so it never grows without bound."),
+]
+
+
+def make_chunks(count: int, words: int, planted: str, seed: int) -> tuple:
+    rng = random.Random(seed)
+    chunks = [make_page(seed * 100000 + i, words) for i in range(count)]
+    targets = rng.sample(range(count), 3)
+    for index in targets:
+        chunks[index] = f"{chunks[index][:len(chunks[index]) // 2]} {planted} {chunks[index][len(chunks[index]) // 2:]}"
+    return chunks, set(targets)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=400, help="Chunks per page")
+    parser.add_argument("--words", type=int, default=120, help="Words per chunk")
+    parser.add_argument("--prefilter-k", type=int, default=50)
+    args = parser.parse_args()
+
+    service = get_embedding_service()
+    service.encode(["warm up"])
+    rankers = {
+        "dense": HybridRanker(service, mode="dense"),
+        "hybrid": HybridRanker(service, mode="hybrid"),
+        f"hybrid, top-{args.prefilter_k}": HybridRanker(service, mode="hybrid", prefilter_k=args.prefilter_k),
+    }
+
+    print(f"{'ranker':<20}{'encoder rows':>14}{'time (s)':>10}{'planted in top 3':>18}")
+    for name, ranker in rankers.items():
+        rows, elapsed, found = 0, 0.0, 0
+        for seed, (query, planted) in enumerate(QUERIES):
+            chunks, targets = make_chunks(args.chunks, args.words, planted, seed)
+            service.cache.clear()
+            encoded = service.encoded_rows
+            start = time.perf_counter()
+            ranked = ranker.rank(query, chunks)
+            elapsed += time.perf_counter() - start
+            rows += service.encoded_rows - encoded
+            found += len(targets & {index for index, _ in ranked[:3]})
+        print(f"{name:<20}{rows:>14}{elapsed:>10.2f}{found:>12} / {3 * len(QUERIES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Chunking multi-MB pages: word-count packing vs. the batched TokenChunker.
+
+The word-count chunker joins sentences into new strings, then ``preprocess_chunks``
+splits and re-joins every chunk again; neither knows how many model tokens a chunk
+holds, so chunks overflow the summarizer's input. ``TokenChunker`` tokenizes all
+sentences in one batched call and returns spans of the page, sliced once at the end.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks.chunking [--sizes-mb 1 4] [--chunk-size 512] [--tokenizer google/flan-t5-base]
+"""
+import argparse
+import statistics
+import time
+
+import nltk
+import transformers
+
+from benchmarks.final_summarize import make_page
+from components.chunking import TokenChunker
+from components.data_utility import Config
+
+
+def word_chunks(sentences, chunk_size: int, min_chunk_length: int = 100, min_chunk_threshold: int = 10):
+    """The previous DataProcessor.chunk_text followed by preprocess_chunks."""
+    chunks, current, length = [], [], 0
+    for sentence in sentences:
+        words = len(sentence.split())
+        if length + words > chunk_size and current:
+            chunks.append(" ".join(current))
+            current, length = [sentence], words
+        else:
+            current.append(sentence)
+            length += words
+    if current:
+        chunks.append(" ".join(current))
+
+    processed, pending = [], ""
+    for chunk in chunks:
+        if len(chunk.split()) < min_chunk_threshold:
+            continue
+        if len(pending) + len(chunk) < min_chunk_length:
+            pending += " " + chunk
+        else:
+            if pending:
+                processed.append(pending.strip())
+            pending = chunk
+    if pending:
+        processed.append(pending.strip())
+    return processed
+
+
+def token_chunks(chunker: TokenChunker, text: str, sentences):
+    return [text[start:end] for start, end, _ in chunker.chunk(text, sentences)]
+
+
+def measure(name: str, function, text: str, tokenizer, repeats: int) -> None:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = function()
+        timings.append(time.perf_counter() - start)
+    seconds = statistics.median(timings)
+    # Token counts as the summarizer sees them, special tokens included
+    lengths = [len(ids) for ids in tokenizer(chunks, verbose=False)["input_ids"]]
+    over = sum(length > tokenizer.model_max_length for length in lengths)
+    print(f"  {name:<14}{seconds * 1000:>10.0f}{len(text) / 2 ** 20 / seconds:>10.2f}{len(chunks):>9}{max(lengths):>12}{over:>11}")
+
+
+def main() -> None:
+    config = Config()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="*", default=[1, 4], help="Page sizes to chunk")
+    parser.add_argument("--chunk-size", type=int, default=config.default_chunk_size, help="Words (word-count) or tokens (TokenChunker) per chunk")
+    parser.add_argument("--tokenizer", default=config.chunk_tokenizer)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(args.tokenizer, use_fast=True)
+    tokenizer.model_max_length = args.chunk_size
+    chunker = TokenChunker(tokenizer, args.chunk_size, config.chunk_overlap_tokens, config.chunk_min_tokens)
+
+    for size in args.sizes_mb:
+        # About 8 characters per word in the generated pages
+        text = make_page(int(size * 1000), words=int(size * 2 ** 20 / 8))
+        sentences = nltk.sent_tokenize(text)
+        print(f"\n{len(text) / 2 ** 20:.1f} MB, {len(sentences)} sentences, chunk size {args.chunk_size}")
+        print(f"  {'chunker':<14}{'ms':>10}{'MB/s':>10}{'chunks':>9}{'max tokens':>12}{'over limit':>11}")
+        measure("word count", lambda: word_chunks(sentences, args.chunk_size), text, tokenizer, args.repeats)
+        measure("TokenChunker", lambda: token_chunks(chunker, text, sentences), text, tokenizer, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
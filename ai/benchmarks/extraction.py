@@ -0,0 +1,95 @@
+"""Main-content extraction throughput and quality on multi-MB HTML pages.
+
+Pages are generated with article paragraphs between navigation menus, sidebars,
+cookie banners, share links and footers. Each extractor is timed (MB/s of HTML) and
+scored on the article sentences it keeps and the boilerplate sentences it lets through.
+The previous cog extractor (BeautifulSoup ``get_text``) is included when bs4 is installed.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks.extraction [--sizes-mb 1 8] [--repeats 3]
+"""
+import argparse
+import random
+import re
+import statistics
+import time
+
+from benchmarks.final_summarize import make_page
+from components.extraction import etree, extract_text
+
+BOILERPLATE = "Boilerplate marker text for the page chrome"
+_MARKER = re.compile(r"Sentence (\d+) of the article")
+
+
+def make_html(size: int, seed: int = 0) -> tuple:
+    """An HTML page of about ``size`` bytes and the number of article sentences in it."""
+    rng = random.Random(seed)
+    menu = "".join(f'<li><a href="/section/{i}">{BOILERPLATE} link {i}</a></li>' for i in range(12))
+    parts = [
+        "<!doctype html><html><head><title>Benchmark</title><style>body{margin:0}</style>",
+        "<script>window.analytics = {track: function () {}};</script></head><body>",
+        f'<header class="site-header"><nav><ul>{menu}</ul></nav></header>',
+        f'<div class="cookie-banner">{BOILERPLATE}: we use cookies to improve your experience.</div><main><article>',
+    ]
+    length, sentence = sum(map(len, parts)), 0
+    while length < size:
+        paragraph = []
+        for _ in range(rng.randint(2, 5)):
+            paragraph.append(f"Sentence {sentence} of the article {make_page(rng.random(), rng.randint(10, 25))}")
+            sentence += 1
+        block = f"<p>{' '.join(paragraph)}</p>"
+        if rng.random() < 0.1:
+            block += f'<div class="share-buttons"><a href="/t">{BOILERPLATE} share</a> <a href="/f">{BOILERPLATE} like</a></div>'
+        if rng.random() < 0.05:
+            block += f'<aside class="related"><ul>{menu}</ul></aside>'
+        parts.append(block)
+        length += len(block)
+    parts.append(f"</article></main><footer><p>{BOILERPLATE}. Copyright, privacy policy and terms of use.</p></footer></body></html>")
+    return "".join(parts), sentence
+
+
+def bs4_get_text(html: str) -> str:
+    """The previous cogs/ai.py scraper."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="*", default=[1, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    extractors = {"extract_text (html.parser)": lambda html: extract_text(html, backend="html.parser")}
+    if etree is not None:
+        extractors["extract_text (lxml)"] = lambda html: extract_text(html, backend="lxml")
+    try:
+        import bs4  # noqa: F401
+        extractors["bs4 get_text"] = bs4_get_text
+    except ImportError:
+        pass
+
+    for size in args.sizes_mb:
+        html, sentences = make_html(int(size * 2 ** 20))
+        megabytes = len(html.encode("utf-8")) / 2 ** 20
+        print(f"\n{megabytes:.1f} MB page, {sentences} article sentences")
+        print(f"  {'extractor':<28}{'MB/s':>8}{'article kept':>14}{'boilerplate kept':>18}")
+        for name, extractor in extractors.items():
+            timings = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                text = extractor(html)
+                timings.append(time.perf_counter() - start)
+            kept = len(set(_MARKER.findall(text)))
+            leaked = text.count(BOILERPLATE)
+            print(f"  {name:<28}{megabytes / statistics.median(timings):>8.1f}{kept / sentences:>14.1%}{leaked:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Latency of DataProcessor.final_summarize on 1, 5 and 20 page contexts.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks.final_summarize [--repeats 3] [--map-reduce]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from components.data_processing import DataProcessor
+
+WORDS_PER_PAGE = 500
+PAGE_COUNTS = [1, 5, 20]
+
+_VOCABULARY = (
+    "the model search result page answer context summary token query language network "
+    "system data training inference memory latency batch python research article science "
+    "history example method evaluation performance quality source document information"
+).split()
+
+
+def make_page(seed: int, words: int = WORDS_PER_PAGE) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 20))
+        sentence = " ".join(rng.choice(_VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+async def run(repeats: int, map_reduce: bool) -> None:
+    processor = DataProcessor()
+    # Warm up so the first measurement does not include lazy CUDA/tokenizer setup
+    await processor.final_summarize(make_page(0, 50), map_reduce=map_reduce)
+
+    print(f"{'pages':>6} {'chars':>9} {'p50 (s)':>9} {'min (s)':>9}")
+    for pages in PAGE_COUNTS:
+        text = " ".join(make_page(seed) for seed in range(pages))
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            await processor.final_summarize(text, max_new_tokens=processor.max_summary_tokens, map_reduce=map_reduce)
+            timings.append(time.perf_counter() - start)
+        print(f"{pages:>6} {len(text):>9} {statistics.median(timings):>9.3f} {min(timings):>9.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--map-reduce", action="store_true", help="Reduce chunk summaries into a single summary")
+    args = parser.parse_args()
+    asyncio.run(run(args.repeats, args.map_reduce))
+
+
+if __name__ == "__main__":
+    main()
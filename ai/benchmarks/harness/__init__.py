@@ -0,0 +1,7 @@
+"""Pipeline-level benchmark harness.
+
+Runs fixed question sets through the combined, enhanced, fallback and offline pipelines
+against a local stand-in for Google Custom Search and the scraped pages, and writes a
+JSON report (per-stage latency, peak RSS, model loads) that can be diffed between
+commits. See ``python -m benchmarks.harness --help``.
+"""
@@ -0,0 +1,89 @@
+"""Pipeline benchmark harness.
+
+Serves a fake Google Custom Search endpoint and static pages locally, runs each pipeline
+over a fixed question set in its own worker process and writes a JSON report with
+per-stage latency, peak RSS and model-load counts.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks.harness run [--questions smoke] [--pipelines combined offline]
+                                     [--stand-ins tiny|full|profile.json] [--pages DIR]
+                                     [--output report.json]
+    python -m benchmarks.harness compare base.json new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from .questions import QUESTION_SETS
+from .report import build_report, compare_reports, write_report
+from .runner import PIPELINE_NAMES, spawn_worker, worker_main
+
+async def run(args: argparse.Namespace) -> None:
+    from .fake_web import FakeWeb
+
+    web = FakeWeb(pages_dir=args.pages, words_per_page=args.words_per_page)
+    await web.start()
+    print(f"Fake web backend at {web.base_url}")
+
+    pipelines = {}
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            for pipeline in args.pipelines:
+                before = dict(web.stats)
+                print(f"Running {pipeline} over {len(QUESTION_SETS[args.questions])} questions...")
+                result = await spawn_worker(
+                    pipeline, args.questions, args.mode, args.stand_ins, web.search_url,
+                    os.path.join(scratch, f"{pipeline}.json")
+                )
+                result["web"] = {key: web.stats[key] - before[key] for key in web.stats}
+                pipelines[pipeline] = result
+                if result.get("failed"):
+                    print(f"  failed (exit {result['returncode']}):\n    " + "\n    ".join(result["stderr_tail"]))
+                else:
+                    print(f"  {result['wall_s']['total']:.2f} s, peak RSS {result['peak_rss_mb']:.0f} MB, "
+                          f"{sum(result['model_loads'].values())} model loads")
+    finally:
+        await web.stop()
+
+    write_report(build_report(pipelines, args.questions, args.mode, args.stand_ins), args.output)
+    print(f"Report written to {args.output}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Benchmark the pipelines and write a report")
+    run_parser.add_argument("--questions", choices=list(QUESTION_SETS), default="smoke")
+    run_parser.add_argument("--pipelines", nargs="+", choices=PIPELINE_NAMES, default=list(PIPELINE_NAMES))
+    run_parser.add_argument("--mode", choices=["power", "performance"], default="performance")
+    run_parser.add_argument("--stand-ins", default="tiny", help="Model profile: tiny, full or a JSON file")
+    run_parser.add_argument("--pages", help="Directory of recorded <topic>-<n>.html pages to serve")
+    run_parser.add_argument("--words-per-page", type=int, default=1200, help="Size of generated pages")
+    run_parser.add_argument("--output", default="benchmark_report.json")
+
+    compare_parser = subparsers.add_parser("compare", help="Show the change between two reports")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+
+    worker_parser = subparsers.add_parser("worker", help=argparse.SUPPRESS)
+    worker_parser.add_argument("--pipeline", required=True)
+    worker_parser.add_argument("--questions", required=True)
+    worker_parser.add_argument("--mode", required=True)
+    worker_parser.add_argument("--stand-ins", required=True)
+    worker_parser.add_argument("--output", required=True)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    elif args.command == "compare":
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        compare_reports(base, new)
+    else:
+        worker_main(args.pipeline, args.questions, args.mode, args.stand_ins, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Local stand-in for Google Custom Search and the pages it links to.
+
+``/customsearch/v1`` answers in the Custom Search JSON format with links back to
+``/pages/<topic>-<n>.html`` on the same server. Pages come from a directory of recorded
+HTML when one is given (same file names), otherwise they are generated
+deterministically from the topic facts in ``questions.py``, padded with filler text and
+wrapped in navigation, footer and script boilerplate so cleaning has real work to do.
+"""
+import os
+import re
+import zlib
+from typing import Dict, Optional
+from aiohttp import web
+from benchmarks.final_summarize import make_page
+from .questions import QUESTION_SETS, TOPICS, PAGES_PER_TOPIC
+
+_WORD = re.compile(r"\w+")
+
+_BOILERPLATE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script>window.dataLayer = window.dataLayer || []; function gtag(){{dataLayer.push(arguments);}}</script>
+<style>body {{ font-family: sans-serif; }} nav a {{ margin: 0 4px; }}</style>
+</head>
+<body>
+<nav><a href="/">Home</a> | <a href="/topics">Topics</a> | <a href="/about">About</a> | <a href="/contact">Contact</a></nav>
+<div class="cookie-banner">We use cookies to improve your experience. <button>Accept</button></div>
+<main><article>
+<h1>{title}</h1>
+"""
+
+_BOILERPLATE_TAIL = """</article></main>
+<aside><h3>Related</h3><ul><li><a href="/r/1">Ten facts you did not know</a></li><li><a href="/r/2">Subscribe to our newsletter</a></li></ul></aside>
+<footer>&copy; Example Encyclopedia. All rights reserved. <a href="/privacy">Privacy</a> <a href="/terms">Terms</a></footer>
+<script src="/static/analytics.js"></script>
+</body>
+</html>
+"""
+
+# Query text -> topic, for the fixed question sets
+_QUESTION_TOPICS = {question["query"]: question["topic"] for questions in QUESTION_SETS.values() for question in questions}
+
+def topic_for_query(query: str) -> str:
+    """Topic whose pages answer a query: exact for known questions, else by word overlap."""
+    if query in _QUESTION_TOPICS:
+        return _QUESTION_TOPICS[query]
+    words = set(_WORD.findall(query.lower()))
+    return max(TOPICS, key=lambda topic: len(words & set(_WORD.findall(" ".join(TOPICS[topic]).lower()))))
+
+def render_page(topic: str, index: int, words: int) -> str:
+    """A deterministic HTML page: the topic facts spread between paragraphs of filler."""
+    facts = TOPICS[topic]
+    filler_words = max(words - sum(len(fact.split()) for fact in facts), 0)
+    per_paragraph = filler_words // len(facts)
+    title = f"{topic.capitalize()} explained, part {index + 1}"
+
+    paragraphs = []
+    for i, fact in enumerate(facts[index:] + facts[:index]):
+        filler = make_page(seed=zlib.crc32(f"{topic}-{index}-{i}".encode()), words=per_paragraph) if per_paragraph else ""
+        paragraphs.append(f"<p>{fact} {filler}</p>")
+    return _BOILERPLATE_HEAD.format(title=title) + "\n".join(paragraphs) + "\n" + _BOILERPLATE_TAIL
+
+class FakeWeb:
+    """Serves search results and pages, counting requests and bytes sent."""
+
+    def __init__(self, pages_dir: Optional[str] = None, words_per_page: int = 1200, results_per_query: int = PAGES_PER_TOPIC) -> None:
+        self.pages_dir = pages_dir
+        self.words_per_page = words_per_page
+        self.results_per_query = results_per_query
+        self.stats: Dict[str, int] = {"searches": 0, "pages": 0, "bytes": 0}
+        self.base_url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    def _page(self, name: str) -> Optional[str]:
+        if self.pages_dir:
+            path = os.path.join(self.pages_dir, f"{name}.html")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return f.read()
+        topic, _, index = name.rpartition("-")
+        if topic not in TOPICS or not index.isdigit():
+            return None
+        return render_page(topic, int(index), self.words_per_page)
+
+    async def search(self, request: web.Request) -> web.Response:
+        self.stats["searches"] += 1
+        query = request.query.get("q", "")
+        num = min(int(request.query.get("num", self.results_per_query)), self.results_per_query)
+        topic = topic_for_query(query)
+        items = [
+            {
+                "title": f"{topic.capitalize()} explained, part {i + 1}",
+                "link": f"{self.base_url}/pages/{topic}-{i}.html",
+                "snippet": TOPICS[topic][i % len(TOPICS[topic])],
+            }
+            for i in range(num)
+        ]
+        return web.json_response({"kind": "customsearch#search", "items": items})
+
+    async def page(self, request: web.Request) -> web.Response:
+        html = self._page(request.match_info["name"])
+        if html is None:
+            raise web.HTTPNotFound()
+        self.stats["pages"] += 1
+        self.stats["bytes"] += len(html.encode("utf-8"))
+        return web.Response(text=html, content_type="text/html")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/customsearch/v1", self.search)
+        app.router.add_get("/pages/{name}.html", self.page)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{bound_host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.base_url}/customsearch/v1"
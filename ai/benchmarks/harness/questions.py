@@ -0,0 +1,53 @@
+"""Fixed question sets and the page content the fake web backend serves for them."""
+
+# Each question names the topic whose pages the fake search engine returns for it
+QUESTION_SETS = {
+    "smoke": [
+        {"query": "How does photosynthesis turn light into chemical energy?", "topic": "photosynthesis"},
+        {"query": "Why did the Roman Empire split into east and west?", "topic": "rome"},
+    ],
+    "standard": [
+        {"query": "How does photosynthesis turn light into chemical energy?", "topic": "photosynthesis"},
+        {"query": "What role does chlorophyll play in plants?", "topic": "photosynthesis"},
+        {"query": "Why did the Roman Empire split into east and west?", "topic": "rome"},
+        {"query": "When did the Western Roman Empire fall?", "topic": "rome"},
+        {"query": "How do transformers use attention in language models?", "topic": "transformers"},
+        {"query": "What is the difference between an encoder and a decoder?", "topic": "transformers"},
+        {"query": "What causes ocean tides?", "topic": "tides"},
+        {"query": "Why are spring tides stronger than neap tides?", "topic": "tides"},
+    ],
+}
+
+# Hand-written facts per topic; the fake backend pads them into full-size pages
+TOPICS = {
+    "photosynthesis": [
+        "Photosynthesis is the process by which green plants, algae and some bacteria convert light energy into chemical energy.",
+        "Chlorophyll molecules in the thylakoid membranes of chloroplasts absorb mostly red and blue light.",
+        "In the light-dependent reactions, water is split, oxygen is released and ATP and NADPH are produced.",
+        "The Calvin cycle uses ATP and NADPH to fix carbon dioxide into three-carbon sugars in the stroma.",
+        "The overall reaction turns six molecules of carbon dioxide and six of water into one molecule of glucose and six of oxygen.",
+    ],
+    "rome": [
+        "In 285 AD the emperor Diocletian divided the administration of the Roman Empire into eastern and western halves.",
+        "The empire had become too large for a single ruler to defend its long frontiers against simultaneous threats.",
+        "Constantine founded Constantinople in 330 AD, and the eastern capital grew wealthier than Rome itself.",
+        "After the death of Theodosius I in 395 AD the empire was permanently split between his two sons.",
+        "The Western Roman Empire ended in 476 AD when Odoacer deposed the emperor Romulus Augustulus.",
+    ],
+    "transformers": [
+        "The transformer architecture was introduced in 2017 in the paper Attention Is All You Need.",
+        "Self-attention lets every token compute a weighted sum of the representations of all other tokens in the sequence.",
+        "Queries, keys and values are linear projections of the token embeddings, and attention weights come from scaled dot products.",
+        "An encoder builds contextual representations of the input, while a decoder generates output tokens one at a time.",
+        "Decoder-only models such as GPT use causal masking so that each position only attends to earlier positions.",
+    ],
+    "tides": [
+        "Ocean tides are caused mainly by the gravitational pull of the Moon and, to a lesser degree, the Sun.",
+        "The difference in gravitational force across the Earth raises two bulges of water, one facing the Moon and one opposite it.",
+        "Most coasts see two high tides and two low tides roughly every 24 hours and 50 minutes.",
+        "Spring tides occur at new and full moon, when the Sun and Moon are aligned and their effects add up.",
+        "Neap tides occur at the quarter moons, when the Sun and Moon pull at right angles and partly cancel out.",
+    ],
+}
+
+PAGES_PER_TOPIC = 3
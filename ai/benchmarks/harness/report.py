@@ -0,0 +1,58 @@
+"""JSON report layout and the comparison of two reports."""
+import json
+import platform
+import subprocess
+from typing import Any, Dict, Optional
+from .runner import AI_DIR
+from .stages import STAGES
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=AI_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def build_report(pipelines: Dict[str, Any], question_set: str, mode: str, profile_name: str) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(terse=True),
+            "questions": question_set,
+            "mode": mode,
+            "stand_ins": profile_name,
+        },
+        "pipelines": pipelines,
+    }
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    # Sorted keys and one value per line keep `git diff` / `diff -u` of two reports readable
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "new" if new else ""
+    return f"{(new - old) / old * 100:+.1f}%"
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    print(f"base {old['meta'].get('commit')} ({old['meta'].get('stand_ins')}) -> {new['meta'].get('commit')} ({new['meta'].get('stand_ins')})")
+    for pipeline in sorted(set(old["pipelines"]) | set(new["pipelines"])):
+        before, after = old["pipelines"].get(pipeline, {}), new["pipelines"].get(pipeline, {})
+        print(f"\n{pipeline}")
+        print(f"  {'metric':<18} {'base':>10} {'new':>10} {'change':>9}")
+        rows = [("wall total (s)", before.get("wall_s", {}).get("total", 0), after.get("wall_s", {}).get("total", 0))]
+        for stage in STAGES:
+            rows.append((
+                f"{stage} (s)",
+                before.get("stages", {}).get(stage, {}).get("total_s", 0),
+                after.get("stages", {}).get(stage, {}).get("total_s", 0),
+            ))
+        rows.append(("peak RSS (MB)", before.get("peak_rss_mb", 0), after.get("peak_rss_mb", 0)))
+        rows.append(("model loads", sum(before.get("model_loads", {}).values()), sum(after.get("model_loads", {}).values())))
+        for name, base, current in rows:
+            if base or current:
+                print(f"  {name:<18} {base:>10.3f} {current:>10.3f} {_delta(base, current):>9}")
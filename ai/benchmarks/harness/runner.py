@@ -0,0 +1,105 @@
+"""Runs one pipeline over a question set inside a worker process and measures it.
+
+Every pipeline gets its own interpreter so peak RSS and model-load counts are not
+polluted by the pipelines that ran before it.
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+from .stand_ins import apply_models, load_profile
+from .stages import StageTimer, instrument
+
+PIPELINE_NAMES = ("combined", "enhanced", "fallback", "offline")
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows: psutil only reports the current working set peak
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+async def run_pipeline(pipeline: str, questions: List[Dict[str, str]], mode: str, profile_name: str) -> Dict[str, Any]:
+    """Worker side: answer every question with one pipeline, inline enrichment included."""
+    apply_models(load_profile(profile_name))
+    timer = StageTimer()
+    instrument(timer)
+
+    from components.data_processing import DataProcessor
+    from components.answering import AnsweringEngine, resolve_pipeline
+
+    # Page scanning and query screening are benchmarked separately (benchmarks.safety)
+    engine = AnsweringEngine(mode=mode)
+    engine.data_processor = DataProcessor()
+    choice = resolve_pipeline(pipeline)
+
+    wall_times, errors = [], 0
+    async with engine:
+        for question in questions:
+            start = time.perf_counter()
+            try:
+                raw_context, processed_context = "", ""
+                if choice in ("1", "2"):
+                    raw_context, processed_context, _ = await engine.fetch_context(question["query"])
+                result = await engine.run_pipeline(choice, question["query"], raw_context, processed_context, mode)
+                if "error" in result:
+                    errors += 1
+            except Exception:
+                errors += 1
+            wall_times.append(time.perf_counter() - start)
+
+    model_loads = dict(timer.model_loads)
+    if engine.data_processor._summarizer is not None:
+        model_loads["summarizer"] = 1
+
+    return {
+        "questions": len(questions),
+        "errors": errors,
+        "wall_s": {
+            "total": round(sum(wall_times), 4),
+            "p50": round(statistics.median(wall_times), 4) if wall_times else 0.0,
+            "max": round(max(wall_times), 4) if wall_times else 0.0,
+        },
+        "stages": timer.summary(),
+        "model_loads": dict(sorted(model_loads.items())),
+        "model_load_s": round(timer.model_load_seconds, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+def worker_main(pipeline: str, question_set: str, mode: str, profile_name: str, output_path: str) -> None:
+    from .questions import QUESTION_SETS
+
+    report = asyncio.run(run_pipeline(pipeline, QUESTION_SETS[question_set], mode, profile_name))
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+
+async def spawn_worker(pipeline: str, question_set: str, mode: str, profile_name: str, search_url: str, output_path: str) -> Dict[str, Any]:
+    """Parent side: run a worker for one pipeline against the fake web backend."""
+    env = {
+        **os.environ,
+        **load_profile(profile_name)["env"],
+        "GOOGLE_SEARCH_URL": search_url,
+        "GOOGLE_API_KEY": "benchmark",
+        "GOOGLE_CX": "benchmark",
+    }
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.harness", "worker",
+        "--pipeline", pipeline, "--questions", question_set, "--mode", mode,
+        "--stand-ins", profile_name, "--output", output_path,
+        cwd=AI_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        tail = stderr.decode(errors="replace").strip().splitlines()[-20:]
+        return {"failed": True, "returncode": process.returncode, "stderr_tail": tail}
+    with open(output_path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,115 @@
+"""Per-stage timing and model-load counting by wrapping the pipeline's call sites.
+
+Stages may nest (``scrape`` includes ``clean``); each records its own inclusive time.
+``generate`` only counts answer generation: model ``generate`` calls made while another
+stage is running (context summaries, enrichment) are attributed to that stage.
+"""
+import asyncio
+import contextvars
+import functools
+import statistics
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+STAGES = ("search", "scrape", "clean", "chunk", "summarize", "rank", "qa", "generate", "enrich")
+
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("benchmark_stage", default=None)
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.model_loads: Counter = Counter()
+        self.model_load_seconds: float = 0.0
+
+    def timed(self, func: Callable, stage: str, skip: Optional[Callable[..., bool]] = None, outermost_only: bool = False) -> Callable:
+        """Wrap a sync or async callable so every call is recorded under ``stage``."""
+        def should_record(args, kwargs) -> bool:
+            if skip is not None and skip(*args, **kwargs):
+                return False
+            return not (outermost_only and _current_stage.get() is not None)
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not should_record(args, kwargs):
+                    return await func(*args, **kwargs)
+                token = _current_stage.set(stage)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.samples[stage].append(time.perf_counter() - start)
+                    _current_stage.reset(token)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not should_record(args, kwargs):
+                return func(*args, **kwargs)
+            token = _current_stage.set(stage)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+                _current_stage.reset(token)
+        return wrapper
+
+    def patch(self, owner: Any, attr: str, stage: str, **options) -> None:
+        setattr(owner, attr, self.timed(getattr(owner, attr), stage, **options))
+
+    def counted_loader(self, alias: str, loader: Callable) -> Callable:
+        """Count (and time) model loads; flan-t5's ``generate`` becomes the generate stage."""
+        @functools.wraps(loader)
+        def wrapper(model_path: str):
+            start = time.perf_counter()
+            model = loader(model_path)
+            self.model_load_seconds += time.perf_counter() - start
+            self.model_loads[alias] += 1
+            if alias == "flan-t5":
+                model["model"].generate = self.timed(model["model"].generate, "generate", outermost_only=True)
+            return model
+        return wrapper
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                "calls": len(self.samples[stage]),
+                "total_s": round(sum(self.samples[stage]), 4),
+                "p50_s": round(statistics.median(self.samples[stage]), 4),
+                "max_s": round(max(self.samples[stage]), 4),
+            }
+            for stage in STAGES
+            if self.samples.get(stage)
+        }
+
+def instrument(timer: StageTimer) -> None:
+    """Patch the stage call sites of the components package (import it first)."""
+    from components import data_processing, generation_utils, enhanced_answer, fallback_answer, offline_answer, combined_answer, model_manager
+
+    processor = data_processing.DataProcessor
+    timer.patch(processor, "google_search", "search")
+    timer.patch(processor, "scrape_website", "scrape")
+    timer.patch(processor, "clean_text", "clean")
+    timer.patch(processor, "chunk_text", "chunk")
+    timer.patch(processor, "summarize_chunks", "summarize")
+    timer.patch(processor, "final_summarize", "summarize")
+    timer.patch(processor, "rank_chunks", "rank")
+
+    timer.patch(enhanced_answer, "generate_context_summary", "summarize")
+    timer.patch(enhanced_answer, "select_relevant_context", "rank")
+    timer.patch(enhanced_answer, "find_answer_spans", "qa")
+
+    # Sub-pipelines of the combined answer skip enrichment; only time the real work
+    def no_enrichment(*args, **kwargs) -> bool:
+        return kwargs.get("enrichment") == "none"
+
+    for module in (enhanced_answer, fallback_answer, offline_answer, combined_answer):
+        timer.patch(module, "enrich_result", "enrich", skip=no_enrichment)
+
+    for alias, loader in list(model_manager.MODEL_LOADERS.items()):
+        model_manager.MODEL_LOADERS[alias] = timer.counted_loader(alias, loader)
+    load_spacy = timer.counted_loader("spacy", model_manager.load_spacy)
+    data_processing.load_spacy = load_spacy
+    generation_utils.load_spacy = load_spacy
@@ -0,0 +1,53 @@
+"""Swappable model stand-ins.
+
+A profile maps ModelManager aliases to checkpoints (used for both modes) and sets the
+environment Config reads for models loaded outside ModelManager. ``full`` keeps the
+production checkpoints; ``tiny`` uses the randomly initialised test checkpoints from
+the Hugging Face hub, so a CI run exercises every stage in seconds (answers are
+gibberish, timings and memory are what matter). A JSON file with the same
+``{"models": {...}, "env": {...}}`` layout can be passed instead of a profile name,
+e.g. to point at checkpoints saved in a local directory.
+"""
+import json
+import os
+from typing import Any, Dict
+
+STAND_IN_PROFILES: Dict[str, Dict[str, Dict[str, str]]] = {
+    "full": {"models": {}, "env": {}},
+    "tiny": {
+        "models": {
+            "flan-t5": "hf-internal-testing/tiny-random-t5",
+            "bart-cnn": "hf-internal-testing/tiny-random-bart",
+            "bart-summarization": "hf-internal-testing/tiny-random-bart",
+            "roberta-qa": "hf-internal-testing/tiny-random-RobertaForQuestionAnswering",
+            "sentiment-analysis": "hf-internal-testing/tiny-random-DistilBertForSequenceClassification",
+            # Same BERT architecture as the MS MARCO MiniLM cross-encoders; two-class head
+            "cross-encoder": "hf-internal-testing/tiny-random-BertForSequenceClassification",
+            "sentence-transformer": "sentence-transformers-testing/stsb-bert-tiny-safetensors",
+        },
+        "env": {
+            "SUMMARIZER_MODEL": "hf-internal-testing/tiny-random-t5",
+            "EMBEDDING_MODEL": "sentence-transformers-testing/stsb-bert-tiny-safetensors",
+            "SPACY_MODEL": "blank:en",
+            "SPACY_NER_MODEL": "blank:en",
+        },
+    },
+}
+
+def load_profile(name_or_path: str) -> Dict[str, Any]:
+    if os.path.isfile(name_or_path):
+        with open(name_or_path, encoding="utf-8") as f:
+            profile = json.load(f)
+        return {"models": profile.get("models", {}), "env": profile.get("env", {})}
+    if name_or_path not in STAND_IN_PROFILES:
+        raise ValueError(f"Unknown stand-in profile '{name_or_path}'. Choose from {list(STAND_IN_PROFILES)} or pass a JSON file")
+    return STAND_IN_PROFILES[name_or_path]
+
+def apply_models(profile: Dict[str, Any]) -> None:
+    """Point ModelManager aliases at the profile's checkpoints (call after applying env)."""
+    from components.model_manager import MODEL_PATHS
+
+    for alias, path in profile["models"].items():
+        if alias not in MODEL_PATHS:
+            raise ValueError(f"Stand-in for unknown model alias '{alias}'")
+        MODEL_PATHS[alias] = (path, path)
@@ -0,0 +1,44 @@
+"""Encoder rows per query for enhanced-answer segment ranking.
+
+The old ranking encoded every whitespace-separated word of the processed context as
+its own segment (plus the query). The current ranking encodes sentence windows in a
+single batched call and reuses cached rows, so repeated contexts cost nothing.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks.segment_ranking [--words 400] [--queries 5]
+"""
+import argparse
+import time
+
+from components.embeddings import get_embedding_service
+from components.generation_utils import build_context_segments, select_relevant_context
+from components.data_utility import Config
+from benchmarks.final_summarize import make_page
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=400, help="Words of processed context per query")
+    parser.add_argument("--queries", type=int, default=5)
+    args = parser.parse_args()
+
+    config = Config()
+    service = get_embedding_service()
+    queries = [f"what is the role of {topic} in search" for topic in ("memory", "latency", "training", "batch", "quality")]
+
+    print(f"{'query':>5} {'rows before':>12} {'segments':>9} {'rows encoded':>13} {'time (s)':>9}")
+    for i in range(args.queries):
+        # Every other query reuses the previous context to show cache reuse
+        context = make_page(i // 2, args.words)
+        rows_before = len(context.split()) + 1
+        _, spans = build_context_segments(context, config.segment_window, config.segment_stride, config.segment_window_words)
+
+        encoded = service.encoded_rows
+        start = time.perf_counter()
+        select_relevant_context(queries[i % len(queries)], context, config)
+        elapsed = time.perf_counter() - start
+        print(f"{i:>5} {rows_before:>12} {len(spans):>9} {service.encoded_rows - encoded:>13} {elapsed:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
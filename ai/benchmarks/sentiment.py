@@ -0,0 +1,89 @@
+"""Memory footprint and latency of the sentiment backends.
+
+Each backend runs in its own interpreter so the RSS growth from loading it is not
+hidden by models loaded earlier. Reports load time, RSS delta, parameter count,
+single-answer latency and batched throughput.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks.sentiment [--backends textblob distilbert bart-mnli] [--batch 64]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ANSWERS = [
+    "The Eiffel Tower was completed in 1889 and remains one of the most visited monuments in the world.",
+    "Unfortunately the study found no significant improvement, and several participants reported side effects.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The project was a great success and the team delivered ahead of schedule.",
+]
+
+
+def measure(backend_name: str, batch: int) -> dict:
+    import psutil
+    from components.sentiment import get_sentiment_backend
+
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+    backend = get_sentiment_backend(backend_name)
+    backend.preload()
+    load_time = time.perf_counter() - start
+    rss_delta = process.memory_info().rss - rss_before
+
+    model = getattr(getattr(backend, "pipeline", None), "model", None)
+    params = sum(p.numel() for p in model.parameters()) if model is not None else 0
+
+    single = []
+    for answer in ANSWERS * 5:
+        start = time.perf_counter()
+        backend.score_many([answer])
+        single.append(time.perf_counter() - start)
+    single.sort()
+
+    texts = [ANSWERS[i % len(ANSWERS)] for i in range(batch)]
+    start = time.perf_counter()
+    backend.score_many(texts)
+    batch_time = time.perf_counter() - start
+
+    return {
+        "backend": backend_name,
+        "load_s": load_time,
+        "rss_mb": rss_delta / 2 ** 20,
+        "params_m": params / 1e6,
+        "p50_ms": single[len(single) // 2] * 1e3,
+        "batch_per_s": batch / batch_time,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["textblob", "distilbert", "bart-mnli"])
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.batch)))
+        return
+
+    print(f"{'backend':<12} {'load (s)':>9} {'RSS (MB)':>9} {'params (M)':>11} {'p50 (ms)':>9} {'batch/s':>9}")
+    for name in args.backends:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sentiment", "--worker", name, "--batch", str(args.batch)],
+            cwd=AI_DIR, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(f"{name:<12} failed: {completed.stderr.strip().splitlines()[-1]}")
+            continue
+        row = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"{row['backend']:<12} {row['load_s']:>9.2f} {row['rss_mb']:>9.1f} {row['params_m']:>11.1f} {row['p50_ms']:>9.2f} {row['batch_per_s']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
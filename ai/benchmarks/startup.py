@@ -0,0 +1,79 @@
+"""Startup cost of the components package, measured with ``python -X importtime``.
+
+Each scenario runs in a fresh interpreter. The import-time report is parsed and
+the slowest top-level packages are listed, so eager heavy imports stand out.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks.startup [--top 10] [--warm]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import components": "import components",
+    "import main": "import main",
+    "DataProcessor()": "from components.data_processing import DataProcessor; DataProcessor()",
+}
+
+WARM_SCENARIO = (
+    "from components.data_processing import DataProcessor; "
+    "from components.generation_utils import get_nlp; "
+    "DataProcessor().preload(); get_nlp()"
+)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Return cumulative import time in microseconds per top-level package."""
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Only top-level entries (no extra indentation) carry the full cumulative cost
+        name = name[1:]
+        if not name.startswith(" "):
+            totals[name.split(".")[0]] += int(cumulative_us)
+    return totals
+
+
+def run_scenario(code: str) -> tuple:
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=AI_DIR, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return wall, parse_importtime(completed.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest packages to list")
+    parser.add_argument("--warm", action="store_true", help="Also measure an eager preload of every model")
+    args = parser.parse_args()
+
+    scenarios = dict(SCENARIOS)
+    if args.warm:
+        scenarios["preload (--warm)"] = WARM_SCENARIO
+
+    for label, code in scenarios.items():
+        try:
+            wall, totals = run_scenario(code)
+        except RuntimeError as e:
+            print(f"{label}: failed ({e})")
+            continue
+        print(f"\n{label}: {wall:.3f}s wall, {sum(totals.values()) / 1e6:.3f}s in imports")
+        for name, micros in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"  {name:<30} {micros / 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,68 +2,78 @@
 
 This package provides various components for AI-powered answer generation,
 data processing, and model management.
+
+Public names are resolved lazily (PEP 562) so that ``import components`` does not
+pull in torch, transformers, spaCy and friends until something actually uses them.
 """
 
-from .combined_answer import combined_answer_generation
-from .data_processing import DataProcessor
-from .enhanced_answer import enhanced_answer_generation
-from .fallback_answer import (
-    fallback_pipeline, generate_fallback_answer
-)
-from .model_manager import ModelManager
-from .offline_answer import offline_mode
-from .generation_utils import (
-    generate_context_summary,
-    generate_follow_up_questions,
-    generate_summary,
-    calculate_confidence_score,
-    calculate_ner_score,
-    filter_and_sort_sentences,
-    score_sentence
-)
-from .utils import (
-    check_internet_connection,
-    cache_result,
-    get_cached_result,
-    format_processing_time,
-    get_user_preferences,
-    apply_user_preferences,
-    performance_monitor,
-    log_user_feedback,
-    print_result,
-    add_to_query_history
-)
+import importlib
 
-__all__ = [
+# Maps every exported name to the submodule that defines it
+_EXPORTS = {
     # Main components
-    'combined_answer_generation',
-    'DataProcessor',
-    'enhanced_answer_generation',
-    'fallback_pipeline',
-    'generate_fallback_answer',
-    'ModelManager',
-    'offline_mode',
-    'generate_context_summary',
-    'generate_follow_up_questions',
-    'generate_summary',
-    'calculate_confidence_score',
-    'calculate_ner_score',
-    'filter_and_sort_sentences',
-    'score_sentence',
-    
+    'combined_answer_generation': 'combined_answer',
+    'DataProcessor': 'data_processing',
+    'enhanced_answer_generation': 'enhanced_answer',
+    'fallback_pipeline': 'fallback_answer',
+    'generate_fallback_answer': 'fallback_answer',
+    'ModelManager': 'model_manager',
+    'EmbeddingService': 'embeddings',
+    'get_embedding_service': 'embeddings',
+    'offline_mode': 'offline_answer',
+    'AnsweringEngine': 'answering',
+    'enrich_result': 'enrichment',
+    'complete_enrichment': 'enrichment',
+    'get_sentiment_backend': 'sentiment',
+    'score_sentiments': 'sentiment',
+    'generate_context_summary': 'generation_utils',
+    'generate_follow_up_questions': 'generation_utils',
+    'schedule_follow_up_questions': 'generation_utils',
+    'generate_summary': 'generation_utils',
+    'calculate_confidence_score': 'generation_utils',
+    'calculate_ner_score': 'generation_utils',
+    'score_many': 'generation_utils',
+    'filter_and_sort_sentences': 'generation_utils',
+    'score_sentence': 'generation_utils',
+    'find_answer_spans': 'extractive_qa',
+    'get_tracer': 'tracing',
+    'get_memory_governor': 'memory',
+    'get_event_log': 'event_log',
+    'get_retrieval_controller': 'adaptive',
+    'extract_text': 'extraction',
+    'get_reranker': 'reranking',
+    'traced': 'tracing',
+
     # Utility components
-    'check_internet_connection',
-    'cache_result',
-    'get_cached_result',
-    'format_processing_time',
-    'get_user_preferences',
-    'apply_user_preferences',
-    'performance_monitor',
-    'log_user_feedback',
-    'print_result',
-    'add_to_query_history',
+    'check_internet_connection': 'utils',
+    'cache_result': 'utils',
+    'get_cached_result': 'utils',
+    'format_processing_time': 'utils',
+    'get_user_preferences': 'utils',
+    'apply_user_preferences': 'utils',
+    'log_user_feedback': 'utils',
+    'print_result': 'utils',
+    'print_enrichment_update': 'utils',
+    'add_to_query_history': 'utils',
+    'get_query_history': 'utils',
+
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Cache so later lookups bypass __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
 
-]
 
 # Package metadata
 __version__ = '1.2.0'
@@ -0,0 +1,199 @@
+import itertools
+import logging
+import random
+import statistics
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+from .data_utility import Config
+from .event_log import get_event_log
+from .tracing import get_tracer
+
+logger = logging.getLogger("rich")
+
+ADAPTIVE_MODES = ("off", "rules", "bandit")
+
+# (num_results, chunk_size, max_summary_tokens)
+Arm = Tuple[int, int, int]
+
+def _step(values: Sequence[int], current: int, direction: int) -> int:
+    """The neighbouring configured value above (direction 1) or below (-1) ``current``."""
+    ordered = sorted(values)
+    candidates = [value for value in ordered if (value > current if direction > 0 else value < current)]
+    if not candidates:
+        return current
+    return candidates[0] if direction > 0 else candidates[-1]
+
+class RetrievalDecision:
+    """Retrieval parameters chosen for one query, plus what was observed while using them."""
+
+    __slots__ = (
+        "query", "num_results", "chunk_size", "max_summary_tokens", "first_wave", "max_results",
+        "high_similarity", "low_similarity", "reason", "results_used", "top_similarity", "latency",
+        "duplicates_eliminated",
+    )
+
+    def __init__(self, query: str, arm: Arm, reason: str, config: Config, waves: bool = True) -> None:
+        self.query = query
+        self.num_results, self.chunk_size, self.max_summary_tokens = arm
+        self.reason = reason
+        self.high_similarity = config.adaptive_high_similarity
+        self.low_similarity = config.adaptive_low_similarity
+        if waves:
+            self.first_wave = min(config.adaptive_first_wave, self.num_results)
+            self.max_results = max(max(config.num_results), self.num_results)
+        else:
+            self.first_wave = self.max_results = self.num_results
+        self.results_used: Optional[int] = None
+        self.top_similarity: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.duplicates_eliminated: Optional[float] = None
+
+    @property
+    def arm(self) -> Arm:
+        return self.num_results, self.chunk_size, self.max_summary_tokens
+
+    def wants_more(self, processed: int, top_similarity: float) -> bool:
+        """Whether to process another wave of results after ``processed`` of them."""
+        if processed >= self.max_results or top_similarity >= self.high_similarity:
+            return False
+        return processed < self.num_results or top_similarity < self.low_similarity
+
+    def next_wave(self, processed: int, top_similarity: float) -> int:
+        target = self.num_results if processed < self.num_results else self.max_results
+        return target - processed
+
+    def observe_retrieval(self, results_used: int, top_similarity: float, latency: float, duplicates_eliminated: Optional[float] = None) -> None:
+        self.results_used = results_used
+        self.top_similarity = round(float(top_similarity), 4)
+        self.latency = round(latency, 4)
+        if duplicates_eliminated is not None:
+            self.duplicates_eliminated = round(duplicates_eliminated, 4)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "num_results": self.num_results,
+            "chunk_size": self.chunk_size,
+            "max_summary_tokens": self.max_summary_tokens,
+            "reason": self.reason,
+            "results_used": self.results_used,
+            "top_similarity": self.top_similarity,
+            "latency": self.latency,
+            "duplicates_eliminated": self.duplicates_eliminated,
+        }
+
+class RetrievalController:
+    """Picks num_results, chunk_size and max_summary_tokens per query.
+
+    ``rules`` starts from the defaults and steps along the Config candidate lists using
+    the recent retrieval latency and answer confidence: slower than
+    ``adaptive_latency_budget`` means fewer results in smaller chunks, low confidence
+    with time to spare means more results and longer summaries. ``bandit`` treats every
+    combination as an arm of an epsilon-greedy bandit rewarded with
+    ``confidence / 100 - adaptive_latency_weight * latency / budget``, exploiting the
+    rules' choice until arms have rewards. Either way the decision processes results in
+    waves, so a query whose best chunk is already similar stops early. Decisions and
+    outcomes go to the event log (``retrieval`` and ``retrieval_outcome``).
+    """
+
+    def __init__(self, config: Optional[Config] = None) -> None:
+        self.config = config or Config()
+        if self.config.adaptive_mode not in ADAPTIVE_MODES:
+            raise ValueError(f"adaptive_mode must be one of {ADAPTIVE_MODES}")
+        self.mode = self.config.adaptive_mode
+        self.arms = list(itertools.product(self.config.num_results, self.config.chunk_sizes, self.config.max_summary_tokens))
+        self._rewards: Dict[Arm, Tuple[int, float]] = {}  # arm -> (pulls, mean reward)
+        self._recent: deque = deque(maxlen=self.config.adaptive_window)  # (latency, confidence in 0-1)
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    def _defaults(self) -> Arm:
+        config = self.config
+        return config.default_num_results, config.default_chunk_size, config.default_max_summary_tokens
+
+    def _rules(self) -> Tuple[Arm, str]:
+        config = self.config
+        num_results, chunk_size, max_summary_tokens = self._defaults()
+        with self._lock:
+            latencies = [latency for latency, _ in self._recent]
+            confidences = [confidence for _, confidence in self._recent if confidence is not None]
+        if not latencies:
+            return (num_results, chunk_size, max_summary_tokens), "default"
+
+        latency = statistics.median(latencies)
+        low_confidence = bool(confidences) and statistics.fmean(confidences) < config.adaptive_confidence_target
+        reasons = []
+        if latency > config.adaptive_latency_budget:
+            num_results = _step(config.num_results, num_results, -1)
+            chunk_size = _step(config.chunk_sizes, chunk_size, -1)
+            reasons.append("slow")
+        elif low_confidence and latency < config.adaptive_latency_budget / 2:
+            num_results = _step(config.num_results, num_results, 1)
+            reasons.append("fast")
+        if low_confidence:
+            max_summary_tokens = _step(config.max_summary_tokens, max_summary_tokens, 1)
+            reasons.append("low_confidence")
+        return (num_results, chunk_size, max_summary_tokens), "+".join(reasons) or "on_target"
+
+    def _bandit(self) -> Tuple[Arm, str]:
+        if self._rng.random() < self.config.adaptive_epsilon:
+            return self._rng.choice(self.arms), "explore"
+        with self._lock:
+            rewarded = dict(self._rewards)
+        if not rewarded:
+            arm, _ = self._rules()
+            return arm, "exploit:rules"
+        return max(rewarded, key=lambda arm: rewarded[arm][1]), "exploit"
+
+    def plan(self, query: str, caps: Optional[Tuple[int, int]] = None) -> RetrievalDecision:
+        """Choose the parameters for a query; ``caps`` bounds (num_results, chunk_size),
+        e.g. the memory governor's under pressure."""
+        if self.mode == "off":
+            arm, reason = self._defaults(), "off"
+        elif self.mode == "bandit":
+            arm, reason = self._bandit()
+        else:
+            arm, reason = self._rules()
+
+        if caps is not None:
+            capped = (min(arm[0], caps[0]), min(arm[1], caps[1]), arm[2])
+            if capped != arm:
+                arm, reason = capped, f"{reason}+memory"
+        decision = RetrievalDecision(query, arm, reason, self.config, waves=self.mode != "off")
+        if caps is not None:
+            decision.max_results = min(decision.max_results, caps[0])
+        get_tracer().count("ai_retrieval_decisions_total", reason=reason.split("+")[0].split(":")[0])
+        logger.info(f"Retrieval plan ({reason}): num_results={arm[0]}, chunk_size={arm[1]}, max_summary_tokens={arm[2]}")
+        return decision
+
+    def observe(self, decision: Dict[str, Any], confidence: Optional[float], query: Optional[str] = None) -> Optional[float]:
+        """Feed back a finished query: its decision (``as_dict``) and answer confidence (0-100)."""
+        latency = decision.get("latency")
+        if latency is None:
+            return None
+        arm = (decision["num_results"], decision["chunk_size"], decision["max_summary_tokens"])
+        reward = None
+        # Answers report confidence as a percentage; the target and reward use 0-1
+        score = None if confidence is None else confidence / 100
+        with self._lock:
+            self._recent.append((latency, score))
+            if score is not None:
+                reward = score - self.config.adaptive_latency_weight * latency / self.config.adaptive_latency_budget
+                pulls, mean = self._rewards.get(arm, (0, 0.0))
+                self._rewards[arm] = (pulls + 1, mean + (reward - mean) / (pulls + 1))
+        get_event_log().record("retrieval_outcome", query=query, mode=self.mode, **decision, confidence=confidence, reward=reward)
+        return reward
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "recent": len(self._recent),
+                "arms": {"/".join(map(str, arm)): {"pulls": pulls, "mean_reward": round(mean, 4)} for arm, (pulls, mean) in self._rewards.items()},
+            }
+
+@lru_cache(maxsize=None)
+def get_retrieval_controller() -> RetrievalController:
+    """Return the process-wide retrieval controller."""
+    return RetrievalController()
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .data_utility import Config
+from .model_manager import ModelManager
+from .data_processing import DataProcessor
+from .safety import SafetyChecker
+from .memory import get_memory_governor
+from .event_log import get_event_log, get_result_log
+from .adaptive import RetrievalDecision, get_retrieval_controller
+from .provenance import ChunkRecord, attribute, pack_provenance
+from .sentiment import get_sentiment_backend
+from .generation_utils import get_nlp
+from .enhanced_answer import enhanced_answer_generation
+from .fallback_answer import fallback_pipeline
+from .combined_answer import combined_answer_generation
+from .offline_answer import offline_mode
+from .utils import cache_result, get_cached_result, log_error
+from .tracing import span, traced, current_span
+
+logger = logging.getLogger("rich")
+
+# Pipeline choices, numbered as in the interactive menu
+PIPELINES = {
+    "1": "combined",
+    "2": "enhanced",
+    "3": "fallback",
+    "4": "offline",
+}
+
+# Models used by each pipeline choice, preloaded when warming up
+PIPELINE_MODELS = {
+    "1": ["bart-cnn", "sentence-transformer", "roberta-qa", "flan-t5", "bart-summarization"],
+    "2": ["bart-cnn", "sentence-transformer", "roberta-qa", "flan-t5", "bart-summarization"],
+    "3": ["flan-t5", "bart-summarization"],
+    "4": ["flan-t5", "bart-summarization"],
+}
+
+MODES = ("power", "performance")
+
+def resolve_pipeline(pipeline: str) -> str:
+    """Accept either a menu number ("1") or a pipeline name ("combined")."""
+    if pipeline in PIPELINES:
+        return pipeline
+    for choice, name in PIPELINES.items():
+        if name == pipeline:
+            return choice
+    raise ValueError(f"Unknown pipeline '{pipeline}'. Choose from {list(PIPELINES.values())}")
+
+class AnsweringEngine:
+    """Non-interactive front end to the answering pipelines.
+
+    Owns the safety checker and data processor, so one engine serves every query of a
+    session; the interactive CLI, the HTTP server and batch mode all answer through it.
+    """
+
+    def __init__(self, mode: str = "power", internet_connected: bool = True, config: Optional[Config] = None) -> None:
+        self.config = config or Config()
+        self.mode = mode
+        self.internet_connected = internet_connected
+        self.api_key = self.config.google_api_key
+        self.cx = self.config.google_cx
+        self.safety_checker = SafetyChecker(mode=mode)
+        self.data_processor = DataProcessor(safety_checker=self.safety_checker)
+
+    async def start(self) -> None:
+        await self.data_processor.initialize_session()
+
+    async def close(self) -> None:
+        await self.data_processor.close_session()
+        await get_event_log().close()
+        await get_result_log().close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def warm(self, choices: Iterable[str], modes: Iterable[str] = ()) -> None:
+        """Load every model the given pipeline choices need, once, before serving."""
+        await self.safety_checker.initialize()
+        await asyncio.to_thread(self.data_processor.preload)
+        await asyncio.to_thread(get_nlp)
+        await asyncio.to_thread(get_sentiment_backend().preload)
+        names = list(dict.fromkeys(name for choice in choices for name in PIPELINE_MODELS[choice]))
+        for mode in dict.fromkeys([self.mode, *modes]):
+            await ModelManager.preload(names, mode)
+
+    def admit(self, mode: str) -> str:
+        """Let the memory governor pick a new request's mode and retrieval sizes."""
+        governor = get_memory_governor()
+        mode = governor.admit(mode)
+        governor.tune(self.data_processor)
+        return mode
+
+    @traced("safety")
+    async def check_safety(self, query: str) -> Tuple[str, bool, float, float]:
+        return await self.safety_checker.process_prompt(query)
+
+    @traced("safety")
+    async def screen(self, queries: List[str]) -> List[Tuple[bool, float, float]]:
+        """Safety-check many queries in one batched Prompt-Guard pass."""
+        current_span().set(queries=len(queries))
+        return await self.safety_checker.check_many(queries)
+
+    def plan_retrieval(self, query: str) -> RetrievalDecision:
+        """Per-query retrieval parameters, within the memory governor's limits under pressure."""
+        caps = None
+        if get_memory_governor().level != "normal":
+            caps = (self.data_processor.num_results, self.data_processor.chunk_size)
+        return get_retrieval_controller().plan(query, caps)
+
+    async def fetch_context(
+        self, query: str, decision: Optional[RetrievalDecision] = None, records: Optional[List[ChunkRecord]] = None
+    ) -> Tuple[str, str, List[str]]:
+        decision = decision or self.plan_retrieval(query)
+        context = await self.data_processor.fetch_and_process_results(query, self.api_key, self.cx, decision=decision, records=records)
+        get_event_log().record("retrieval", query=query, **decision.as_dict())
+        return context
+
+    def attach_provenance(self, result: Dict[str, Any], records: List[ChunkRecord]) -> None:
+        """Add the chunks (URL and character span) backing the answer, packed against result["sources"]."""
+        if records and result.get("sources") is not None:
+            result["provenance"] = pack_provenance(attribute(result, records), result["sources"])
+
+    def observe(self, result: Dict[str, Any]) -> None:
+        """Feed a finished (fully enriched) answer back to the retrieval controller."""
+        if result.get("retrieval") and not result.get("cached"):
+            get_retrieval_controller().observe(result["retrieval"], result.get("confidence_score"), query=result.get("query"))
+
+    async def run_pipeline(
+        self, choice: str, query: str, raw_context: str, processed_context: str, mode: str, enrichment: str = "inline"
+    ) -> Dict[str, Any]:
+        with span("pipeline", pipeline=PIPELINES.get(choice, choice), mode=mode):
+            if choice == "1":
+                return await combined_answer_generation(query, raw_context, processed_context, mode, enrichment=enrichment)
+            elif choice == "2":
+                return await enhanced_answer_generation(query, raw_context, processed_context, mode, enrichment=enrichment)
+            elif choice == "3":
+                return await fallback_pipeline(query, mode, enrichment=enrichment)
+            elif choice == "4":
+                return await offline_mode(query, mode, enrichment=enrichment)
+            logger.warning(f"Invalid choice '{choice}'. Using default (combined pipeline).")
+            return await combined_answer_generation(query, raw_context, processed_context, mode, enrichment=enrichment)
+
+    @traced("answer")
+    async def answer(
+        self,
+        query: str,
+        pipeline: str = "1",
+        mode: Optional[str] = None,
+        enrichment: str = "inline",
+        use_cache: bool = True,
+        safety: Optional[Tuple[bool, float, float]] = None
+    ) -> Dict[str, Any]:
+        """Answer one query end to end: safety check, cache, retrieval, pipeline.
+
+        Unsafe queries are not answered; the returned result has ``flagged`` set along
+        with the Prompt-Guard scores. Cached results carry ``cached: True``. With
+        ``enrichment="deferred"`` the result still holds ``pending`` tasks and is not
+        cached; the caller finishes it with ``complete_enrichment`` and ``cache``.
+        ``safety`` takes a precomputed ``(is_safe, jailbreak, indirect)`` from ``screen``.
+        """
+        choice = resolve_pipeline(pipeline)
+        mode = mode or self.mode
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        mode = self.admit(mode)
+        start_time = time.time()
+        current_span().set(pipeline=PIPELINES[choice], mode=mode)
+
+        if safety is None:
+            _, is_safe, jailbreak_score, indirect_score = await self.check_safety(query)
+        else:
+            is_safe, jailbreak_score, indirect_score = safety
+        if not is_safe:
+            result = {
+                "query": query,
+                "flagged": True,
+                "jailbreak_score": jailbreak_score,
+                "indirect_score": indirect_score,
+            }
+            self.log_query(query, result, pipeline=PIPELINES[choice], mode=mode)
+            return result
+
+        if use_cache:
+            cached = await get_cached_result(query)
+            if cached:
+                current_span().set(cache_hits=1)
+                result = {**cached, "query": query, "cached": True}
+                self.log_query(query, result, cache="hit", processing_time=time.time() - start_time)
+                return result
+            current_span().set(cache_misses=1)
+
+        raw_context, processed_context, sources = "", "", []
+        decision, records = None, []
+        if choice in ("1", "2"):
+            if self.internet_connected:
+                try:
+                    decision = self.plan_retrieval(query)
+                    raw_context, processed_context, sources = await self.fetch_context(query, decision, records)
+                except Exception as fetch_error:
+                    decision, records = None, []
+                    log_error("Error fetching and processing results", fetch_error)
+                    choice = "4"
+            else:
+                choice = "4"
+
+        try:
+            result = await self.run_pipeline(choice, query, raw_context, processed_context, mode, enrichment)
+        except Exception as answer_error:
+            log_error(f"Error in answer generation (choice: {choice})", answer_error)
+            result = await fallback_pipeline(query, mode, enrichment=enrichment)
+
+        result.setdefault("sources", sources)
+        self.attach_provenance(result, records)
+        result["query"] = query
+        result["pipeline"] = PIPELINES.get(choice, choice)
+        result["mode"] = mode
+        result["processing_time"] = time.time() - start_time
+        if decision is not None:
+            result["retrieval"] = decision.as_dict()
+        self.log_query(query, result, cache="miss" if use_cache else "off")
+        if not result.get("pending"):
+            self.observe(result)
+
+        if use_cache and not result.get("pending"):
+            await self.cache(query, result)
+        return result
+
+    def log_query(self, query: str, result: Dict[str, Any], **fields: Any) -> None:
+        """Append a query event (pipeline, mode, timings, cache outcome) to the event log."""
+        event = {
+            "pipeline": result.get("pipeline"),
+            "mode": result.get("mode"),
+            "processing_time": result.get("processing_time"),
+            "enrichment_time": result.get("enrichment_time"),
+            "flagged": bool(result.get("flagged")),
+            "error": result.get("error"),
+            "sources": len(result.get("sources") or []),
+        }
+        event.update(fields)
+        get_event_log().record("query", query=query, **{key: value for key, value in event.items() if value is not None})
+
+    async def cache(self, query: str, result: Dict[str, Any]) -> None:
+        try:
+            await cache_result(query, result)
+        except Exception as cache_error:
+            log_error("Error caching result", cache_error)
@@ -0,0 +1,94 @@
+import logging
+from typing import Any, List, Sequence, Tuple
+
+logger = logging.getLogger("rich")
+
+# (start, end, tokens): a character span of the source text and its token count
+ChunkSpan = Tuple[int, int, int]
+
+def sentence_spans(text: str, sentences: Sequence[str]) -> List[Tuple[int, int]]:
+    """Character spans of already-split sentences in the text they came from.
+
+    Sentence splitters drop the whitespace between sentences but keep the sentences
+    themselves verbatim, so each is found by searching forward from the previous one.
+    """
+    spans = []
+    position = 0
+    for sentence in sentences:
+        start = text.find(sentence, position)
+        if start < 0:
+            continue  # Not verbatim (normalized by the splitter); skipped rather than guessed
+        end = start + len(sentence)
+        spans.append((start, end))
+        position = end
+    return spans
+
+class TokenChunker:
+    """Packs sentences into chunks of at most ``max_tokens`` model tokens.
+
+    All sentences are tokenized in one batched call of a fast tokenizer and packed
+    greedily; consecutive chunks share up to ``overlap_tokens`` tokens of whole
+    sentences. Sentences longer than the budget are cut at token boundaries. Chunks are
+    returned as ``(start, end, tokens)`` spans of the source text, so nothing is copied
+    until a caller slices out the chunks it keeps. Chunks under ``min_tokens`` are
+    dropped.
+    """
+
+    def __init__(self, tokenizer: Any, max_tokens: int, overlap_tokens: int = 0, min_tokens: int = 0) -> None:
+        self.tokenizer = tokenizer
+        # Budget for content tokens: the model adds its special tokens on top
+        self.budget = max(max_tokens - tokenizer.num_special_tokens_to_add(), 1)
+        self.overlap_tokens = min(overlap_tokens, self.budget // 2)
+        self.min_tokens = min_tokens
+
+    def _units(self, text: str, spans: List[Tuple[int, int]]) -> List[ChunkSpan]:
+        """Sentence spans with token counts; over-long sentences split to fit the budget."""
+        encoded = self.tokenizer(
+            [text[start:end] for start, end in spans],
+            add_special_tokens=False, return_attention_mask=False, return_token_type_ids=False, verbose=False
+        )["input_ids"]
+        counts = [len(ids) for ids in encoded]
+        long = [i for i, count in enumerate(counts) if count > self.budget]
+        pieces = {}
+        if long:
+            offsets = self.tokenizer(
+                [text[spans[i][0]:spans[i][1]] for i in long],
+                add_special_tokens=False, return_offsets_mapping=True, return_attention_mask=False,
+                return_token_type_ids=False, verbose=False
+            )["offset_mapping"]
+            for i, sentence_offsets in zip(long, offsets):
+                base = spans[i][0]
+                pieces[i] = [
+                    (base + window[0][0], base + window[-1][1], len(window))
+                    for window in (sentence_offsets[j:j + self.budget] for j in range(0, len(sentence_offsets), self.budget))
+                ]
+
+        units = []
+        for i, (start, end) in enumerate(spans):
+            units.extend(pieces.get(i, [(start, end, counts[i])]))
+        return units
+
+    def chunk(self, text: str, sentences: Sequence[str]) -> List[ChunkSpan]:
+        spans = sentence_spans(text, sentences)
+        if not spans:
+            return []
+        units = self._units(text, spans)
+
+        chunks: List[ChunkSpan] = []
+        first = 0
+        while first < len(units):
+            last, tokens = first, 0
+            while last < len(units) and (tokens + units[last][2] <= self.budget or last == first):
+                tokens += units[last][2]
+                last += 1
+            chunks.append((units[first][0], units[last - 1][1], tokens))
+            if last >= len(units):
+                break
+            # Start the next chunk with the trailing sentences that fit in the overlap
+            next_first, overlap = last, 0
+            while next_first - 1 > first and overlap + units[next_first - 1][2] <= self.overlap_tokens:
+                next_first -= 1
+                overlap += units[next_first][2]
+            first = next_first
+
+        return [chunk for chunk in chunks if chunk[2] >= self.min_tokens]
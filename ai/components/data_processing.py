@@ -1,5 +1,5 @@
 import asyncio
-import gc
+import json
 import aiohttp
 import time
 import os
@@ -8,14 +8,8 @@ import logging
 from typing import List, Dict, Tuple, Optional, Any
 from collections import Counter
 import ssl
-import torch
-from transformers import pipeline
-from crawl4ai import AsyncWebCrawler
-from spacy.lang.en.stop_words import STOP_WORDS
-import spacy
-from sentence_transformers import SentenceTransformer
-from nltk.tokenize import sent_tokenize
 import re
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from rich.traceback import install as install_rich_traceback
@@ -24,6 +18,21 @@ from rich.console import Console
 from cachetools import TTLCache, LRUCache
 from aiolimiter import AsyncLimiter
 from .data_utility import Config
+from .model_manager import ModelManager, get_device, load_spacy
+from .embeddings import get_embedding_service
+from .tracing import traced, current_span
+from .memory import get_memory_governor
+from .chunking import ChunkSpan, TokenChunker
+from .dedup import NearDuplicateIndex
+from .extraction import extract_text, parser_backend
+from .ranking import HybridRanker
+from .reranking import get_reranker
+from .provenance import ChunkRecord
+from .lazy_loader import lazy_import
+
+transformers = lazy_import("transformers")
+crawl4ai = lazy_import("crawl4ai")
+nltk = lazy_import("nltk")
 
 load_dotenv()
 
@@ -38,17 +47,27 @@ logger = logging.getLogger("rich")
 console = Console()
 
 class DataProcessor:
-    def __init__(self) -> None:
+    def __init__(self, safety_checker: Optional[Any] = None) -> None:
         logger.info("Initializing DataProcessor")
         
+        # Optional SafetyChecker used to scan scraped pages for indirect prompt injection
+        self.safety_checker = safety_checker
+        
         # Load configuration
         self.config = Config()  # Create an instance of the Config class
-        self.device: torch.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.summarizer: Any = pipeline("summarization", model="google/flan-t5-large", device=self.device)
-        self.nlp: spacy.language.Language = spacy.load("en_core_web_md")
-        self.nlp.add_pipe("sentencizer")
-        self.sentence_model: SentenceTransformer = SentenceTransformer('all-MiniLM-L6-v2')
-        self.sentence_model.to(self.device)
+
+        # Models are loaded on first use (see the properties below) or eagerly via preload()
+        self._summarizer: Any = None
+        self._nlp: Any = None
+        self._chunk_tokenizer: Any = None
+        self._model_lock = threading.Lock()
+        self.embeddings = get_embedding_service()
+        self.ranker = HybridRanker(
+            self.embeddings,
+            mode=self.config.ranking_mode,
+            rrf_k=self.config.ranking_rrf_k,
+            prefilter_k=self.config.ranking_prefilter_k
+        )
 
         # Use default parameters from the config
         self.chunk_size: int = self.config.default_chunk_size
@@ -64,6 +83,53 @@ class DataProcessor:
         # Use the cleaned text pattern from data_utility.py
         self.clean_text_pattern: re.Pattern = re.compile(r'http[s]?://\S+|\S+@\S+|[^\w\s.,!?-]|\s+')
 
+    @property
+    def device(self) -> Any:
+        return get_device()
+
+    @property
+    def summarizer(self) -> Any:
+        if self._summarizer is None:
+            with self._model_lock:
+                if self._summarizer is None:
+                    logger.info("Loading summarization model")
+                    self._summarizer = transformers.pipeline("summarization", model=self.config.summarizer_model, device=self.device)
+        return self._summarizer
+
+    @property
+    def nlp(self) -> Any:
+        if self._nlp is None:
+            with self._model_lock:
+                if self._nlp is None:
+                    logger.info("Loading spaCy model")
+                    nlp = load_spacy(self.config.spacy_model)
+                    nlp.add_pipe("sentencizer")
+                    self._nlp = nlp
+        return self._nlp
+
+    @property
+    def chunk_tokenizer(self) -> Any:
+        if self._chunk_tokenizer is None:
+            with self._model_lock:
+                if self._chunk_tokenizer is None:
+                    logger.info(f"Loading chunk tokenizer: {self.config.chunk_tokenizer}")
+                    self._chunk_tokenizer = transformers.AutoTokenizer.from_pretrained(self.config.chunk_tokenizer, use_fast=True)
+        return self._chunk_tokenizer
+
+    @property
+    def sentence_model(self) -> Any:
+        return self.embeddings.model
+
+    def preload(self) -> None:
+        """Load every model up front instead of on the first query."""
+        logger.info("Preloading DataProcessor models")
+        self.summarizer
+        self.nlp
+        self.chunk_tokenizer
+        self.sentence_model
+        if self.config.rerank_enabled:
+            ModelManager.load_model("cross-encoder", self.config.rerank_mode)
+
     def _create_ssl_context(self) -> ssl.SSLContext:
         logger.debug("Creating SSL context")
         ssl_context = ssl.create_default_context()
@@ -86,21 +152,26 @@ class DataProcessor:
     def _get_cache_key(func_name: str, *args: Any, **kwargs: Any) -> str:
         return f"{func_name}:{hash(str(args) + str(kwargs))}"
 
+    @traced("search")
     async def google_search(self, query: str, api_key: str, cx: str, num_results: int = 5) -> Dict[str, Any]:
         cache_key = self._get_cache_key("google_search", query, num_results)
         if cache_key in self.cache:
             logger.info(f"Cache hit for Google search query: {query}")
+            current_span().set(cache_hits=1)
             return self.cache[cache_key]
+        current_span().set(cache_misses=1)
 
         logger.info(f"Performing Google search for query: {query}")
-        url = "https://www.googleapis.com/customsearch/v1"
+        url = self.config.google_search_url
         params = {'q': query, 'key': api_key, 'cx': cx, 'num': num_results}
         
         await self.initialize_session()
         try:
             async with self.rate_limiter:
                 async with self.session.get(url, params=params, raise_for_status=True) as response:
-                    result = await response.json()
+                    body = await response.read()
+                    current_span().set(bytes=len(body))
+                    result = json.loads(body)
                     self.cache[cache_key] = result
                     return result
         except aiohttp.ClientError as e:
@@ -118,20 +189,26 @@ class DataProcessor:
         return [{'title': item.get('title', ''), 'link': item.get('link', ''), 'snippet': item.get('snippet', '')} 
                 for item in search_results.get('items', [])]
 
+    @traced("scrape")
     async def scrape_website(self, url: str) -> Tuple[str, List[str]]:
         logger.info(f"Scraping website: {url}")
         cache_key = self._get_cache_key("scrape_website", url)
         if cache_key in self.local_cache:
             logger.info(f"Cache hit for scraping website: {url}")
+            current_span().set(cache_hits=1)
             return self.local_cache[cache_key]
+        current_span().set(cache_misses=1, url=url)
 
         try:
-            async with AsyncWebCrawler(verbose=True) as crawler:
+            async with crawl4ai.AsyncWebCrawler(verbose=True) as crawler:
                 result = await crawler.arun(url=url)
-                text_content = result.markdown
+                current_span().set(bytes=len((result.html or result.markdown or "").encode("utf-8")))
+                text_content = await self.extract_content(result.html or "")
+                if len(text_content.split()) < self.config.extraction_fallback_words:
+                    text_content = result.markdown or text_content
                 
                 clean_text = await self.clean_text(text_content)
-                sentences = sent_tokenize(clean_text)
+                sentences = nltk.sent_tokenize(clean_text)
                 
                 self.local_cache[cache_key] = (clean_text, sentences)
                 return clean_text, sentences
@@ -139,67 +216,52 @@ class DataProcessor:
             logger.exception(f"Unexpected error while scraping {url}: {str(e)}")
             raise
 
+    @traced("extract")
+    async def extract_content(self, html: str) -> str:
+        """Main text of a page with navigation, footers, cookie banners and link lists removed."""
+        current_span().set(parser=parser_backend(), chars=len(html))
+        return await asyncio.to_thread(
+            extract_text,
+            html,
+            min_words=self.config.extraction_min_words,
+            max_link_density=self.config.extraction_max_link_density,
+            max_chars=self.config.extraction_max_chars
+        )
+
+    @traced("clean")
     async def clean_text(self, text: str) -> str:
         logger.debug("Cleaning text asynchronously")
         clean_text = await asyncio.to_thread(self.clean_text_pattern.sub, ' ', text)
         return clean_text.strip()
 
-    async def chunk_text(self, sentences: List[str]) -> List[str]:
+    def chunk_spans(self, text: str, sentences: List[str], chunk_size: Optional[int] = None) -> List[ChunkSpan]:
+        """``(start, end, tokens)`` spans of ``text`` packing its sentences into chunk_size tokens."""
+        chunker = TokenChunker(
+            self.chunk_tokenizer,
+            max_tokens=chunk_size or self.chunk_size,
+            overlap_tokens=self.config.chunk_overlap_tokens,
+            min_tokens=self.config.chunk_min_tokens
+        )
+        return chunker.chunk(text, sentences)
+
+    @traced("chunk")
+    async def chunk_text(self, text: str, sentences: List[str], chunk_size: Optional[int] = None, url: str = "") -> List[ChunkRecord]:
         logger.debug(f"Chunking {len(sentences)} sentences")
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for sentence in sentences:
-            sentence_length = len(sentence.split())
-            
-            if current_length + sentence_length > self.chunk_size:
-                if current_chunk:
-                    chunks.append(' '.join(current_chunk))
-                current_chunk = [sentence]
-                current_length = sentence_length
-            else:
-                current_chunk.append(sentence)
-                current_length += sentence_length
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
+        spans = await asyncio.to_thread(self.chunk_spans, text, sentences, chunk_size)
+        chunks = [ChunkRecord(url, start, end, text[start:end], page=text) for start, end, _ in spans]
         
         logger.debug(f"Created {len(chunks)} chunks")
+        current_span().set(sentences=len(sentences), chunks=len(chunks), tokens=sum(tokens for _, _, tokens in spans))
         return chunks
 
-    def preprocess_chunks(self, chunks: List[str], min_chunk_length: int = 100, min_chunk_threshold: int = 10) -> List[str]:
-        logger.info(f"Preprocessing {len(chunks)} chunks")
-        processed_chunks = []
-        current_chunk = ""
-        
-        for chunk in chunks:
-            if len(chunk.split()) < min_chunk_threshold:
-                logger.warning(f"Discarding short chunk: '{chunk}'")
-                continue
-            
-            if len(current_chunk) + len(chunk) < min_chunk_length:
-                current_chunk += " " + chunk
-            else:
-                if current_chunk:
-                    processed_chunks.append(current_chunk.strip())
-                current_chunk = chunk
-        
-        if current_chunk:
-            processed_chunks.append(current_chunk.strip())
-        
-        logger.info(f"Preprocessed into {len(processed_chunks)} chunks")
-        return processed_chunks
-
+    @traced("summarize", method="extractive")
     async def summarize_chunks(self, chunks: List[str]) -> List[str]:
-        logger.info("Preprocessing chunks for summarization")
-        preprocessed_chunks = self.preprocess_chunks(chunks)
-        logger.info(f"Summarizing {len(preprocessed_chunks)} preprocessed chunks")
+        logger.info(f"Summarizing {len(chunks)} chunks")
 
         loop = asyncio.get_running_loop()
         with ThreadPoolExecutor() as pool:
             summarize_func = partial(self._summarize_chunk)
-            summaries = await asyncio.gather(*[loop.run_in_executor(pool, summarize_func, chunk) for chunk in preprocessed_chunks])
+            summaries = await asyncio.gather(*[loop.run_in_executor(pool, summarize_func, chunk) for chunk in chunks])
 
         logger.info(f"Summarization complete. Generated {len(summaries)} summaries.")
         return summaries
@@ -214,7 +276,8 @@ class DataProcessor:
 
         try:
             doc = self.nlp(chunk)
-            word_frequencies = Counter(token.text.lower() for token in doc if token.is_alpha and token.text.lower() not in STOP_WORDS)
+            stop_words = self.nlp.Defaults.stop_words
+            word_frequencies = Counter(token.text.lower() for token in doc if token.is_alpha and token.text.lower() not in stop_words)
             max_frequency = max(word_frequencies.values())
             word_frequencies = {word: freq / max_frequency for word, freq in word_frequencies.items()}
 
@@ -236,25 +299,63 @@ class DataProcessor:
             logger.exception(f"Error summarizing chunk: {str(e)}")
             return chunk[:self.max_summary_tokens]
 
-    async def final_summarize(self, text: str, max_new_tokens: int = 50) -> str:
+    def _token_chunks(self, text: str, max_tokens: int) -> List[str]:
+        """Split text into spans of at most max_tokens model tokens."""
+        tokenizer = self.summarizer.tokenizer
+        budget = max_tokens - tokenizer.num_special_tokens_to_add()
+        encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        offsets = encoding["offset_mapping"]
+        current_span().add(tokens_in=len(offsets))
+        if not offsets:
+            return []
+
+        chunks = []
+        for i in range(0, len(offsets), budget):
+            window = offsets[i:i + budget]
+            chunk = text[window[0][0]:window[-1][1]].strip()
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+    def _summarize_batch(self, chunks: List[str], max_new_tokens: int) -> List[str]:
+        outputs = self.summarizer(
+            chunks,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            truncation=True,
+            batch_size=self.config.summary_batch_size
+        )
+        summaries = [output['summary_text'] for output in outputs]
+        tokenized = self.summarizer.tokenizer(summaries, add_special_tokens=False)["input_ids"]
+        current_span().add(tokens_out=sum(len(ids) for ids in tokenized))
+        return summaries
+
+    @traced("summarize", method="abstractive")
+    async def final_summarize(self, text: str, max_new_tokens: int = 50, map_reduce: Optional[bool] = None) -> str:
         logger.info("Performing final summarization with T5")
-        try:
-            max_input_length = 512
-            chunks = [text[i:i + max_input_length] for i in range(0, len(text), max_input_length)]
-            
-            summaries = []
-            for chunk in chunks:
-                summary = self.summarizer(
-                    chunk, 
-                    max_new_tokens=max_new_tokens,
-                    do_sample=False
-                )[0]['summary_text']
-                summaries.append(summary)
+        current_span().set(model=self.config.summarizer_model)
+        if map_reduce is None:
+            map_reduce = self.config.summary_map_reduce
+        max_input_tokens = self.config.summary_max_input_tokens
 
-                gc.collect()
+        try:
+            chunks = self._token_chunks(text, max_input_tokens)
+            if not chunks:
+                return ""
 
+            logger.debug(f"Summarizing {len(chunks)} token chunks in one batch")
+            summaries = await asyncio.to_thread(self._summarize_batch, chunks, max_new_tokens)
             final_summary = ' '.join(summaries)
-            gc.collect()
+
+            # Reduce step: keep summarizing the joined partial summaries until they fit a single chunk
+            while map_reduce and len(summaries) > 1:
+                previous_count = len(chunks)
+                chunks = self._token_chunks(final_summary, max_input_tokens)
+                if len(chunks) >= previous_count:
+                    logger.warning("Reduce step is not shrinking the summary; stopping map-reduce early")
+                    break
+                summaries = await asyncio.to_thread(self._summarize_batch, chunks, max_new_tokens)
+                final_summary = ' '.join(summaries)
 
             return final_summary
 
@@ -262,77 +363,201 @@ class DataProcessor:
             logger.exception(f"Error in final summarization: {str(e)}")
             return text[:max_new_tokens]
 
-    @torch.no_grad()
-    def compute_embeddings(self, texts: List[str]) -> torch.Tensor:
+    def compute_embeddings(self, texts: List[str]) -> Any:
         logger.debug(f"Computing embeddings for {len(texts)} texts")
-        return self.sentence_model.encode(texts, convert_to_tensor=True, show_progress_bar=False)
+        return self.embeddings.encode(texts)
 
-    def rank_chunks(self, query: str, chunks: List[str]) -> List[Tuple[str, float]]:
+    @traced("rank")
+    def rank_chunks(self, query: str, chunks: List[ChunkRecord]) -> List[ChunkRecord]:
+        """Chunks best first (see ``HybridRanker``), with their cosine similarity set."""
         logger.info("Ranking chunks")
         if not chunks:
             logger.warning("No chunks to rank")
             return []
         
-        query_embedding = self.compute_embeddings([query])[0]
-        chunk_embeddings = self.compute_embeddings(chunks)
-        
-        similarities = torch.matmul(chunk_embeddings, query_embedding)
-        
-        ranked_chunks = list(zip(chunks, similarities.cpu().numpy()))
-        ranked_chunks.sort(key=lambda x: x[1], reverse=True)
-        
-        return ranked_chunks
+        current_span().set(mode=self.ranker.mode)
+        ranked = []
+        for index, similarity in self.ranker.rank(query, [chunk.text for chunk in chunks]):
+            chunk = chunks[index]
+            chunk.similarity = similarity
+            ranked.append(chunk)
+        return ranked
+
+    def _page_is_safe(self, verdict: Tuple[bool, float, float], url: str) -> bool:
+        is_safe, jailbreak_score, indirect_score = verdict
+        if not is_safe:
+            logger.warning(
+                f"Dropping {url}: possible prompt injection "
+                f"(jailbreak {jailbreak_score:.4f}, indirect {indirect_score:.4f})"
+            )
+        return is_safe
+
+    def new_dedup_index(self) -> Optional[NearDuplicateIndex]:
+        """A near-duplicate index for the pages of one query, or None when disabled."""
+        if not self.config.dedup_enabled:
+            return None
+        return NearDuplicateIndex(
+            threshold=self.config.dedup_threshold,
+            num_perm=self.config.dedup_num_perm,
+            bands=self.config.dedup_bands,
+            shingle_size=self.config.dedup_shingle_size
+        )
+
+    async def _scrape_result(self, result: Dict[str, str]) -> Optional[Tuple[str, List[str]]]:
+        try:
+            return await self.scrape_website(result.get('link', ''))
+        except Exception as e:
+            logger.error(f"Error scraping result {result.get('link', '')}: {e}")
+            return None
+
+    async def _chunk_page(
+        self, result: Dict[str, str], page: Optional[Tuple[str, List[str]]], chunk_size: Optional[int] = None
+    ) -> Optional[List[ChunkRecord]]:
+        """Chunks of one scraped page, or None when it has no text or chunking failed."""
+        if page is None:
+            return None
+        raw_text, sentences = page
+        if not sentences:
+            logger.warning(f"No sentences extracted from {result.get('link', '')}")
+            return None
+        try:
+            return await self.chunk_text(raw_text, sentences, chunk_size, result.get('link', ''))
+        except Exception as e:
+            logger.exception(f"Error chunking result {result.get('link', '')}: {e}")
+            return None
 
-    async def process_result(self, result: Dict[str, str], query: str) -> Tuple[Optional[str], List[str], str]:
+    async def process_result(
+        self, result: Dict[str, str], raw_text: str, chunks: List[ChunkRecord], query: str
+    ) -> Tuple[Optional[str], List[ChunkRecord], str]:
+        """Summarize and rank the chunks of one page, keeping its top chunks."""
         logger.info(f"Processing result: {result.get('link', '')}")
         try:
-            raw_text, sentences = await self.scrape_website(result.get('link', ''))
-            if not sentences:
-                logger.warning(f"No sentences extracted from {result.get('link', '')}")
-                return None, [], result.get('link', '')
-
-            chunks = await self.chunk_text(sentences)
-            
             if not chunks:
                 logger.warning(f"No valid chunks created from {result.get('link', '')}")
                 return raw_text, [], result.get('link', '')
             
-            summarized_chunks = await self.summarize_chunks(chunks)
-            ranked_chunks = self.rank_chunks(query, summarized_chunks)
-
-            top_chunks = [chunk for chunk, score in ranked_chunks[:min(len(ranked_chunks), 3)]]
+            # Summaries replace the chunks' text; their offsets still point at the full chunk
+            for chunk, summary in zip(chunks, await self.summarize_chunks([chunk.text for chunk in chunks])):
+                chunk.text = summary
+            ranked_chunks = self.rank_chunks(query, chunks)
 
+            top_chunks = ranked_chunks[:min(len(ranked_chunks), 3)]
             return raw_text, top_chunks, result.get('link', '')
         except Exception as e:
             logger.exception(f"Error processing result {result.get('link', '')}: {e}")
             return None, [], result.get('link', '')
 
-    async def fetch_and_process_results(self, processed_query: str, api_key: str, cx: str) -> Tuple[str, str, List[str]]:
+    async def process_wave(
+        self, wave: List[Dict[str, str]], query: str, chunk_size: Optional[int] = None, dedup: Optional[NearDuplicateIndex] = None
+    ) -> List[Tuple[Optional[str], List[ChunkRecord], str]]:
+        """Scrape and chunk a wave of results under one batched safety scan, then process the safe pages.
+
+        Every window of every page goes through Prompt-Guard in a single ``scan_texts``
+        call that runs alongside chunking. Pages flagged as possible prompt injection
+        are dropped before deduplication and summarization, so they neither cost the
+        summarizer nor claim content that a safe mirror also has. Deduplication then
+        runs in result order, so the best-ranked copy of mirrored content is kept.
+        """
+        pages = await asyncio.gather(*[self._scrape_result(result) for result in wave])
+        scanned = [index for index, page in enumerate(pages) if page is not None and page[1]]
+        safety_task = None
+        if scanned and self.safety_checker is not None and self.config.scan_scraped_context:
+            safety_task = asyncio.create_task(self.safety_checker.scan_texts([pages[index][0] for index in scanned]))
+
+        try:
+            chunked = await asyncio.gather(*[self._chunk_page(result, page, chunk_size) for result, page in zip(wave, pages)])
+            verdicts = dict(zip(scanned, await safety_task)) if safety_task is not None else {}
+        finally:
+            if safety_task is not None and not safety_task.done():
+                safety_task.cancel()
+
+        outcomes: List[Any] = [None] * len(wave)
+        work = {}  # index -> process_result coroutine of a safe page
+        for index, (result, page, chunks) in enumerate(zip(wave, pages, chunked)):
+            if index in verdicts and not self._page_is_safe(verdicts[index], result.get('link', '')):
+                outcomes[index] = (None, [], '')
+            elif chunks is None:
+                outcomes[index] = (None, [], result.get('link', ''))
+            else:
+                if dedup is not None and chunks:
+                    # Mirrored and syndicated pages: skip summarizing and embedding what another page already has
+                    chunks = dedup.filter(chunks, result.get('link', ''), key=lambda chunk: chunk.text)
+                work[index] = self.process_result(result, page[0], chunks, query)
+
+        for index, outcome in zip(work, await asyncio.gather(*work.values())):
+            outcomes[index] = outcome
+        return outcomes
+
+    @traced("retrieve")
+    async def fetch_and_process_results(
+        self, processed_query: str, api_key: str, cx: str, decision: Optional[Any] = None, records: Optional[List[ChunkRecord]] = None
+    ) -> Tuple[str, str, List[str]]:
+        """Search, scrape, chunk and rank pages, and summarize the best chunks as context.
+
+        ``decision`` (a ``RetrievalDecision``) sets num_results, chunk_size and
+        max_summary_tokens for this query and may process results in waves: it stops
+        early once the best chunk is similar enough to the query, or goes beyond
+        num_results while it is not. The observed similarity and latency are written
+        back to it. Without one, the processor's own parameters are used. ``records``,
+        when given, receives the ChunkRecords the context was built from, best first.
+        """
         logger.info(f"Fetching and processing results for query: {processed_query}")
+        start_time = time.perf_counter()
+        num_results = decision.num_results if decision else self.num_results
+        chunk_size = decision.chunk_size if decision else self.chunk_size
+        max_summary_tokens = decision.max_summary_tokens if decision else self.max_summary_tokens
+        dedup = self.new_dedup_index()
         
         try:
-            search_results = await self.google_search(processed_query, api_key, cx)
+            search_count = decision.max_results if decision else num_results
+            search_results = await self.google_search(processed_query, api_key, cx, num_results=search_count)
             top_results = self.get_top_results(search_results)
             
-            tasks = [self.process_result(result, processed_query) for result in top_results]
-            results = await asyncio.gather(*tasks)
+            results, final_ranked_chunks = [], []
+            wave_size = decision.first_wave if decision else num_results
+            while True:
+                wave = top_results[len(results):len(results) + wave_size]
+                results += await self.process_wave(wave, processed_query, chunk_size, dedup)
+                processed_chunks = [chunk for _, chunks, _ in results for chunk in chunks if chunks]
+                final_ranked_chunks = self.rank_chunks(processed_query, processed_chunks)
+                # Fused ranking: the best-ranked chunk need not be the most similar one
+                top_similarity = max((chunk.similarity for chunk in final_ranked_chunks), default=0.0)
+                if decision is None or len(results) >= len(top_results) or not decision.wants_more(len(results), top_similarity):
+                    break
+                wave_size = decision.next_wave(len(results), top_similarity)
+            
+            duplicates_eliminated = None
+            if dedup is not None:
+                duplicates_eliminated = dedup.eliminated
+                current_span().set(dedup_chunks=dedup.seen, dedup_dropped=dedup.dropped)
+                if dedup.dropped:
+                    logger.info(f"Dropped {dedup.dropped} of {dedup.seen} chunks as near-duplicates ({duplicates_eliminated:.0%} of summarization and embedding work)")
             
             raw_texts = [raw for raw, _, _ in results if raw]
-            processed_chunks = [chunk for _, chunks, _ in results for chunk in chunks if chunks]
             sources = [url for _, _, url in results if url]
             
             combined_raw_text = " ".join(raw_texts)
             
-            if not processed_chunks:
+            if not final_ranked_chunks:
                 logger.warning("No processed chunks available for final ranking")
+                if decision is not None:
+                    decision.observe_retrieval(len(results), top_similarity, time.perf_counter() - start_time, duplicates_eliminated)
                 return combined_raw_text, "", sources
             
-            final_ranked_chunks = self.rank_chunks(processed_query, processed_chunks)
-            top_final_chunks = [chunk for chunk, _ in final_ranked_chunks[:min(len(final_ranked_chunks), 5)]]
+            if self.config.rerank_enabled:
+                reranked = await asyncio.to_thread(get_reranker().rerank, processed_query, [chunk.text for chunk in final_ranked_chunks])
+                for index, score in reranked:
+                    final_ranked_chunks[index].rerank_score = score
+                final_ranked_chunks = [final_ranked_chunks[index] for index, _ in reranked]
+            top_final_chunks = final_ranked_chunks[:5]
+            if records is not None:
+                records.extend(top_final_chunks)
             
-            processed_context1 = " ".join(top_final_chunks)
+            processed_context1 = " ".join(chunk.text for chunk in top_final_chunks)
             
-            processed_context = await self.final_summarize(processed_context1, max_new_tokens=self.max_summary_tokens)
+            processed_context = await self.final_summarize(processed_context1, max_new_tokens=max_summary_tokens)
+            if decision is not None:
+                decision.observe_retrieval(len(results), top_similarity, time.perf_counter() - start_time, duplicates_eliminated)
             
             logger.info("Processing complete")
             logger.info(f"Raw text length: {len(combined_raw_text)} characters")
@@ -340,7 +565,7 @@ class DataProcessor:
             logger.info(f"Final summary length: {len(processed_context)} characters")
             logger.info(f"Number of sources: {len(sources)}")
             
-            gc.collect()
+            get_memory_governor().collect("retrieve")
             
             return combined_raw_text, processed_context, sources
         except Exception as e:
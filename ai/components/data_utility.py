@@ -10,17 +10,150 @@ class Config:
         # API configurations
         self.google_api_key: str = os.getenv("GOOGLE_API_KEY")
         self.google_cx: str = os.getenv("GOOGLE_CX")
+        self.google_search_url: str = os.getenv("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1")
 
-        # Processing parameters
-        self.chunk_sizes: list = [512, 768, 1024]
+        # Processing parameters (chunk sizes are in tokens of the chunk tokenizer)
+        self.chunk_sizes: list = [256, 384, 512]
         self.max_summary_tokens: list = [30, 50, 70]
         self.num_results: list = [3, 5, 7]
 
         # Other application parameters
-        self.default_chunk_size: int = 1024
+        self.default_chunk_size: int = 512
         self.default_max_summary_tokens: int = 50
         self.default_num_results: int = 5
 
+        # Adaptive retrieval: num_results, chunk_size and max_summary_tokens are picked per
+        # query from the lists above ("off" always uses the defaults)
+        self.adaptive_mode: str = os.getenv("AI_ADAPTIVE_MODE", "rules")  # "off", "rules" or "bandit"
+        self.adaptive_first_wave: int = 3  # Results processed before deciding whether more are needed
+        self.adaptive_high_similarity: float = 0.6  # Stop early once the best chunk is this similar to the query
+        self.adaptive_low_similarity: float = 0.35  # Go beyond num_results while the best chunk is below this
+        self.adaptive_latency_budget: float = 8.0  # Seconds of retrieval per query
+        self.adaptive_confidence_target: float = 0.6  # Mean answer confidence (0-1, answers report 0-100) below which to widen retrieval
+        self.adaptive_window: int = 50  # Recent queries the rules look at
+        self.adaptive_epsilon: float = 0.1  # Bandit exploration rate
+        self.adaptive_latency_weight: float = 0.3  # Reward = confidence - weight * latency / budget
+
+        # Models loaded outside ModelManager ("blank:<lang>" gives an empty spaCy pipeline)
+        self.summarizer_model: str = os.getenv("SUMMARIZER_MODEL", "google/flan-t5-large")
+        self.spacy_model: str = os.getenv("SPACY_MODEL", "en_core_web_md")
+        self.spacy_ner_model: str = os.getenv("SPACY_NER_MODEL", "en_core_web_sm")
+
+        # Main-content extraction from scraped HTML (components/extraction.py)
+        self.extraction_min_words: int = 10  # Blocks shorter than this need good neighbours
+        self.extraction_max_link_density: float = 0.33
+        self.extraction_max_chars: int = 8 * 2 ** 20  # Rest of larger documents is not parsed
+        self.extraction_fallback_words: int = 50  # Less extracted text than this: use crawl4ai's markdown
+
+        # Token-aware chunking of scraped pages
+        self.chunk_tokenizer: str = os.getenv("CHUNK_TOKENIZER") or self.summarizer_model
+        self.chunk_overlap_tokens: int = 32  # Whole sentences repeated at the start of the next chunk
+        self.chunk_min_tokens: int = 12  # Shorter chunks are dropped
+
+        # Near-duplicate chunk elimination across the pages of a query (MinHash + LSH)
+        self.dedup_enabled: bool = os.getenv("AI_DEDUP", "1") != "0"
+        self.dedup_threshold: float = 0.8  # Estimated Jaccard similarity of word shingles
+        self.dedup_num_perm: int = 128
+        self.dedup_bands: int = 32
+        self.dedup_shingle_size: int = 5
+
+        # Final summarization parameters
+        self.summary_max_input_tokens: int = 512
+        self.summary_batch_size: int = 8
+        self.summary_map_reduce: bool = False
+
+        # Shared sentence embedding model (one instance for every pipeline stage)
+        self.embedding_model: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+        self.embedding_dimensions: int = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None  # Truncate (matryoshka) when set
+        self.embedding_batch_size: int = 64
+        self.embedding_cache_size: int = 10000
+
+        # Chunk ranking: dense cosine similarity alone, or fused with BM25 (reciprocal rank fusion)
+        self.ranking_mode: str = os.getenv("AI_RANKING_MODE", "hybrid")  # "dense" or "hybrid"
+        self.ranking_rrf_k: int = 60
+        self.ranking_prefilter_k: int = int(os.getenv("AI_RANKING_PREFILTER_K", "50"))  # Embed only the BM25 top-k (0: all)
+
+        # Cross-encoder re-ranking of the best chunks before they become the context
+        self.rerank_enabled: bool = os.getenv("AI_RERANK", "0") == "1"
+        self.rerank_mode: str = os.getenv("AI_RERANK_MODE", "performance")  # MiniLM-L-12 (power) or L-6 (performance)
+        self.rerank_top_n: int = 20  # Candidates re-ranked at most
+        self.rerank_latency_budget: float = 0.5  # Seconds of cross-encoder time per re-ranking
+        self.rerank_max_length: int = 512
+        self.rerank_batch_size: int = 32  # Larger than rerank_top_n so a re-ranking is one batch
+        self.rerank_cache_size: int = 10000
+
+        # Context segment ranking (windows of sentences, or of words for unpunctuated text)
+        self.segment_window: int = 2
+        self.segment_stride: int = 1
+        self.segment_window_words: int = 48
+        self.segment_top_k: int = 4
+
+        # Sliding-window extractive QA
+        self.qa_max_length: int = 384
+        self.qa_stride: int = 128
+        self.qa_max_answer_tokens: int = 30
+        self.qa_n_best: int = 5
+
+        # Prompt-Guard safety checks
+        self.safety_batch_size: int = 32
+        self.safety_cache_size: int = 4096
+        self.safety_prefilter_max_words: int = 12
+        self.safety_window_tokens: int = 512
+        self.safety_window_stride: int = 64
+        self.scan_scraped_context: bool = True
+
+        # Follow-up question generation
+        self.follow_up_fast_path: bool = True  # flan-t5-small with greedy decoding
+        self.follow_up_max_new_tokens: int = 64
+        self.follow_up_cache_size: int = 1024
+
+        # Sentiment scoring backend: "textblob" (lexicon), "distilbert" or "bart-mnli"
+        self.sentiment_backend: str = os.getenv("SENTIMENT_BACKEND", "textblob")
+        self.sentiment_batch_size: int = 32
+
+        # Memory governor: RSS ceiling (0 = memory_ceiling_fraction of physical memory) and
+        # the fractions of it at which requests are degraded and idle models evicted
+        self.memory_ceiling_mb: int = int(os.getenv("AI_MEMORY_CEILING_MB", "0"))
+        self.memory_ceiling_fraction: float = 0.85
+        self.memory_pressure_threshold: float = 0.8  # power -> performance, smaller num_results/chunk_size
+        self.memory_critical_threshold: float = 0.95  # also evict idle models
+        self.memory_recovery_margin: float = 0.05  # RSS must fall this far below a threshold to leave its level
+        self.memory_model_idle_seconds: float = 120.0
+        self.memory_check_interval: float = 1.0
+
+        # Full garbage collections at stage boundaries only run once this many blocks were
+        # allocated since the last one, or while the memory governor reports pressure
+        self.gc_allocation_threshold: int = 500000
+        self.gc_min_interval: float = 2.0  # Seconds between collections under pressure
+
+        # Append-only JSON Lines event log (queries, timings, cache outcomes, feedback)
+        self.event_log_file: str = os.getenv("AI_EVENT_LOG", "events.jsonl")
+        self.event_log_batch_size: int = 100  # Buffered events that trigger a flush
+        self.event_log_flush_interval: float = 2.0
+        self.event_log_max_bytes: int = 10 * 2 ** 20  # Rotate past this size (0 disables)
+        self.event_log_backups: int = 5
+
+        # Result cache, appended to the same way; the oldest results go with rotated backups
+        self.result_cache_file: str = os.getenv("AI_RESULT_CACHE", "query_cache.jsonl")
+        self.result_cache_max_bytes: int = 50 * 2 ** 20
+        self.result_cache_backups: int = 2
+
+        # Stage tracing: spans feed /metrics; a Chrome trace is written when a file is set
+        self.trace_file: str = os.getenv("AI_TRACE_FILE") or None
+        self.trace_max_spans: int = 100000
+
+        # Headless HTTP server (python main.py serve)
+        self.server_host: str = os.getenv("AI_SERVER_HOST", "127.0.0.1")
+        self.server_port: int = int(os.getenv("AI_SERVER_PORT", "8080"))
+        self.server_max_concurrency: int = int(os.getenv("AI_SERVER_MAX_CONCURRENCY", "4"))
+        self.server_warm_pipelines: list = ["1", "2", "3", "4"]
+
+        # Bulk answering over JSONL files (python main.py batch in.jsonl out.jsonl)
+        self.batch_concurrency: int = 4
+        self.batch_size: int = 16  # Questions safety-screened together
+        self.batch_max_wait: float = 0.05  # Seconds to wait for a batch to fill
+        self.batch_cache_flush: int = 25  # Answers written to the result cache at a time
+
     def get_google_config(self):
         """Returns Google API configurations."""
         return {
@@ -0,0 +1,117 @@
+import logging
+import re
+import zlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .tracing import get_tracer
+
+logger = logging.getLogger("rich")
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; a, b < 2**31 keep it in uint64
+_PRIME = np.uint64(4294967311)
+_WORD_PATTERN = re.compile(r"\w+")
+
+def shingle_hashes(text: str, size: int) -> np.ndarray:
+    """32-bit hashes of the word ``size``-grams of a text (lowercased, punctuation ignored)."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    word_hashes = np.fromiter((zlib.crc32(word.encode()) for word in words), dtype=np.uint64, count=len(words))
+    size = min(size, len(words))
+    count = len(words) - size + 1
+    hashes = word_hashes[:count].copy()
+    for offset in range(1, size):
+        hashes = ((hashes * np.uint64(1000003)) ^ word_hashes[offset:offset + count]) & np.uint64(0xFFFFFFFF)
+    return np.unique(hashes)
+
+class NearDuplicateIndex:
+    """Drops chunks that are near-duplicates of chunks already seen, across pages.
+
+    Each chunk gets a MinHash signature of ``num_perm`` permutations over its word
+    shingles, split into ``bands`` LSH bands. Chunks sharing a band bucket are candidates
+    and count as duplicates when their estimated Jaccard similarity reaches
+    ``threshold``, so a chunk is compared with a handful of candidates rather than every
+    chunk seen. One index lives for one query; ``DataProcessor.process_wave`` filters
+    the chunks of the pages that passed the safety scan in result order, so the
+    best-ranked safe mirror is kept.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 32, shingle_size: int = 5, seed: int = 1) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 31, size=(num_perm, 1), dtype=np.uint64)
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self._signatures: List[np.ndarray] = []
+        self._sources: List[str] = []
+        self.seen = 0
+        self.dropped = 0
+        self.seen_chars = 0
+        self.dropped_chars = 0
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not hashes.size:
+            return None
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def duplicate_of(self, text: str, source: str = "") -> Optional[str]:
+        """Index a chunk; return the source of the chunk it duplicates (and skip indexing it), if any."""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        keys = self._band_keys(signature)
+        candidates = {index for key in keys for index in self._buckets.get(key, ())}
+        for index in sorted(candidates):
+            if np.mean(self._signatures[index] == signature) >= self.threshold:
+                return self._sources[index]
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._sources.append(source)
+        for key in keys:
+            self._buckets[key].append(index)
+        return None
+
+    def filter(self, chunks: List[Any], source: str = "", key: Optional[Callable[[Any], str]] = None) -> List[Any]:
+        """The chunks that are not near-duplicates of earlier ones (``key`` gives a chunk's text)."""
+        kept = []
+        for chunk in chunks:
+            text = key(chunk) if key else chunk
+            original = self.duplicate_of(text, source)
+            self.seen += 1
+            self.seen_chars += len(text)
+            if original is None:
+                kept.append(chunk)
+            else:
+                self.dropped += 1
+                self.dropped_chars += len(text)
+                logger.debug(f"Dropping chunk from {source or 'page'}: near-duplicate of {original or 'an earlier chunk'}")
+        dropped = len(chunks) - len(kept)
+        tracer = get_tracer()
+        tracer.count("ai_dedup_chunks_total", len(kept), outcome="kept")
+        if dropped:
+            tracer.count("ai_dedup_chunks_total", dropped, outcome="dropped")
+        return kept
+
+    @property
+    def eliminated(self) -> float:
+        """Fraction of chunks (and so of summarization and embedding work) dropped."""
+        return self.dropped / self.seen if self.seen else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "chunks": self.seen,
+            "dropped": self.dropped,
+            "eliminated": round(self.eliminated, 4),
+            "eliminated_chars": round(self.dropped_chars / self.seen_chars, 4) if self.seen_chars else 0.0,
+        }
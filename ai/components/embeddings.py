@@ -0,0 +1,108 @@
+import logging
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence
+from cachetools import LRUCache
+from .data_utility import Config
+from .model_manager import ModelManager
+from .lazy_loader import lazy_import
+from .tracing import current_span
+
+np = lazy_import("numpy")
+torch = lazy_import("torch")
+
+logger = logging.getLogger("rich")
+
+class EmbeddingService:
+    """One sentence embedding model shared by ranking, segment selection and confidence scoring.
+
+    Every vector is returned as a row of a float32 matrix with unit L2 norm, so a plain
+    dot product is the cosine similarity. Embeddings are cached per text, and an optional
+    matryoshka-style truncation keeps only the first ``dimensions`` components (renormalized).
+    """
+
+    def __init__(self, config: Optional[Config] = None) -> None:
+        config = config or Config()
+        self.model_name: str = config.embedding_model
+        self.dimensions: Optional[int] = config.embedding_dimensions
+        self.batch_size: int = config.embedding_batch_size
+        self.cache: LRUCache = LRUCache(maxsize=config.embedding_cache_size)
+        self._cache_lock = threading.Lock()
+
+        # Counters for benchmarking encoder work
+        self.encoded_rows: int = 0
+        self.cache_hits: int = 0
+
+    @property
+    def model(self):
+        return ModelManager.load_model("sentence-transformer")
+
+    @property
+    def embedding_dimension(self) -> int:
+        return self.dimensions or self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Sequence[str], dimensions: Optional[int] = None):
+        """Encode texts into an (n, d) float32 matrix, reusing cached rows."""
+        dimensions = dimensions or self.dimensions
+
+        # Hits are copied out now: later inserts (ours or another caller's) may evict them
+        vectors, missing = {}, []
+        with self._cache_lock:
+            for text in dict.fromkeys(texts):
+                vector = self.cache.get(text)
+                if vector is None:
+                    missing.append(text)
+                else:
+                    vectors[text] = vector
+            self.cache_hits += len(texts) - len(missing)
+        current_span().add(cache_hits=len(texts) - len(missing), cache_misses=len(missing))
+
+        if missing:
+            logger.debug(f"Encoding {len(missing)} new texts ({len(texts) - len(missing)} cached)")
+            with torch.no_grad():
+                encoded = self.model.encode(
+                    missing,
+                    batch_size=self.batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                ).astype(np.float32, copy=False)
+            with self._cache_lock:
+                self.encoded_rows += len(missing)
+                for text, vector in zip(missing, encoded):
+                    # A copy, not a view: a cached row must not keep the whole batch alive
+                    self.cache[text] = vector.copy()
+            vectors.update(zip(missing, encoded))
+
+        if not texts:
+            return np.empty((0, self.embedding_dimension), dtype=np.float32)
+
+        matrix = np.stack([vectors[text] for text in texts])
+
+        if dimensions and dimensions < matrix.shape[1]:
+            matrix = matrix[:, :dimensions]
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return matrix
+
+    def encode_one(self, text: str, dimensions: Optional[int] = None):
+        return self.encode([text], dimensions)[0]
+
+    def similarities(self, query: str, texts: Sequence[str], dimensions: Optional[int] = None):
+        """Cosine similarity of the query against each text, as a 1-D float32 array."""
+        matrix = self.encode([query, *texts], dimensions)
+        return matrix[1:] @ matrix[0]
+
+    def encode_many(self, batches: List[Sequence[str]], dimensions: Optional[int] = None) -> list:
+        """Encode several text lists with one model call, returning one matrix per list."""
+        flat = [text for batch in batches for text in batch]
+        matrix = self.encode(flat, dimensions)
+        results, offset = [], 0
+        for batch in batches:
+            results.append(matrix[offset:offset + len(batch)])
+            offset += len(batch)
+        return results
+
+@lru_cache(maxsize=None)
+def get_embedding_service() -> EmbeddingService:
+    """Return the process-wide embedding service."""
+    return EmbeddingService()
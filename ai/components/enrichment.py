@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+from .sentiment import score_sentiment
+from .generation_utils import generate_summary, schedule_follow_up_questions, calculate_confidence_score
+
+logger = logging.getLogger("rich")
+
+# Result fields that are not needed to show the answer and can arrive after it
+ENRICHMENT_FIELDS = ("summary", "sentiment_score", "follow_up_questions", "confidence_score")
+
+# How a pipeline handles enrichment: compute before returning, return tasks in
+# result["pending"], or skip entirely (when a caller enriches a combined answer itself)
+ENRICHMENT_MODES = ("inline", "deferred", "none")
+
+# Confidence reported when there is no retrieved context to check the answer against
+DEFAULT_CONFIDENCE = 50.0
+
+async def _constant(value: Any) -> Any:
+    return value
+
+def start_enrichment(result: Dict[str, Any], query: str, mode: str, context: Optional[str] = None) -> Dict[str, asyncio.Task]:
+    """Start every enrichment field of a result as a concurrent task."""
+    answer = result.get("abstractive_answer", "")
+
+    if context is not None:
+        confidence = calculate_confidence_score(answer, result.get("extractive_answer", ""), context, query)
+    else:
+        confidence = _constant(DEFAULT_CONFIDENCE)
+
+    return {
+        "summary": asyncio.create_task(generate_summary(answer, mode)),
+        "sentiment_score": asyncio.create_task(score_sentiment(answer)),
+        "follow_up_questions": schedule_follow_up_questions(query, answer),
+        "confidence_score": asyncio.create_task(confidence),
+    }
+
+async def complete_enrichment(
+    result: Dict[str, Any],
+    on_update: Optional[Callable[[str, Any], Optional[Awaitable[None]]]] = None
+) -> Dict[str, Any]:
+    """Wait for the pending enrichment tasks of a result, filling in fields as they finish.
+
+    ``on_update(field, value)`` is called for each field as soon as it arrives (it may be
+    a coroutine function), so a CLI or chat embed can refresh incrementally.
+    """
+    pending = result.pop("pending", None) or {}
+
+    async def labelled(field: str, task: asyncio.Task):
+        try:
+            return field, await task
+        except Exception as e:
+            logger.error(f"Enrichment of {field} failed: {str(e)}", exc_info=True)
+            return field, None
+
+    for next_done in asyncio.as_completed([labelled(field, task) for field, task in pending.items()]):
+        field, value = await next_done
+        if value is None:
+            continue
+        result[field] = value
+        logger.info(f"Enrichment field ready: {field}")
+        if on_update is not None:
+            update = on_update(field, value)
+            if asyncio.iscoroutine(update):
+                await update
+
+    return result
+
+async def enrich_result(result: Dict[str, Any], query: str, mode: str, context: Optional[str] = None, enrichment: str = "inline") -> Dict[str, Any]:
+    """Attach summary, sentiment, follow-up questions and confidence to a pipeline result."""
+    if enrichment not in ENRICHMENT_MODES:
+        raise ValueError(f"enrichment must be one of {ENRICHMENT_MODES}")
+    if enrichment == "none":
+        return result
+
+    result["pending"] = start_enrichment(result, query, mode, context)
+    if enrichment == "deferred":
+        return result
+    return await complete_enrichment(result)
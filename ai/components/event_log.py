@@ -0,0 +1,184 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+from .data_utility import Config
+
+logger = logging.getLogger("rich")
+
+class EventLog:
+    """Append-only JSON Lines log, written in batches by a background task.
+
+    ``record`` only serializes the event and buffers the line, so it is cheap on the
+    hot path. Buffered lines are appended once ``batch_size`` accumulate, every
+    ``flush_interval`` seconds, on ``flush``/``close`` and at interpreter exit. When the
+    file would grow past ``max_bytes`` it is rotated to ``<path>.1`` ... ``<path>.<backups>``
+    (``max_bytes=0`` disables rotation). ``select``/``query`` read the backups, the live
+    file and the buffer, oldest first.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 2.0, max_bytes: int = 0, backups: int = 5) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._buffer: List[str] = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        atexit.register(self._flush_sync)
+
+    def record(self, event_type: str, **fields: Any) -> None:
+        """Buffer one event; ``ts`` (epoch seconds) and ``type`` are added."""
+        line = json.dumps({"ts": round(time.time(), 3), "type": event_type, **fields}, default=str)
+        with self._buffer_lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.batch_size
+        if self._ensure_flusher() and full:
+            self._wakeup.set()
+
+    def _ensure_flusher(self) -> bool:
+        """Start the flush task on the running loop; False outside one (e.g. a worker thread)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False  # Written by the next flush or at exit
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._flusher = loop.create_task(self._flush_loop(), name=f"event-log-flush:{os.path.basename(self.path)}")
+        return True
+
+    async def _flush_loop(self) -> None:
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+        except asyncio.CancelledError:
+            self._flush_sync()
+            raise
+
+    def _take(self) -> List[str]:
+        with self._buffer_lock:
+            lines, self._buffer = self._buffer, []
+        return lines
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        logger.info(f"Rotated event log {self.path}")
+
+    def _write(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        data = "\n".join(lines) + "\n"
+        with self._write_lock:
+            if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+
+    def _flush_sync(self) -> None:
+        try:
+            self._write(self._take())
+        except OSError as e:
+            logger.error(f"Could not write event log {self.path}: {e}")
+
+    async def flush(self) -> None:
+        lines = self._take()
+        if lines:
+            await asyncio.to_thread(self._write, lines)
+
+    async def close(self) -> None:
+        """Stop the background flusher and write everything still buffered."""
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        self._flusher = None
+        await self.flush()
+
+    def _files(self) -> List[str]:
+        backups = [f"{self.path}.{index}" for index in range(self.backups, 0, -1)]
+        return [path for path in [*backups, self.path] if os.path.exists(path)]
+
+    def _read(self) -> Iterator[Dict[str, Any]]:
+        # Open under the write lock: an open handle keeps reading the same file if a
+        # rotation renames or deletes it meanwhile
+        handles = []
+        with self._write_lock:
+            for path in self._files():
+                try:
+                    handles.append(open(path, encoding="utf-8"))
+                except FileNotFoundError:
+                    continue  # Rotated away by another process
+        for f in handles:
+            with f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by a crash
+        with self._buffer_lock:
+            pending = list(self._buffer)
+        for line in pending:
+            yield json.loads(line)
+
+    def select(self, event_type: Optional[str] = None, since: Optional[float] = None, limit: Optional[int] = None, **match: Any) -> List[Dict[str, Any]]:
+        """Events of a type (and with the given field values) since an epoch time, oldest first.
+
+        With ``limit`` only the most recent ``limit`` matches are returned.
+        """
+        events = [
+            event for event in self._read()
+            if (event_type is None or event.get("type") == event_type)
+            and (since is None or event.get("ts", 0) >= since)
+            and all(event.get(field) == value for field, value in match.items())
+        ]
+        return events[-limit:] if limit else events
+
+    async def query(self, event_type: Optional[str] = None, since: Optional[float] = None, limit: Optional[int] = None, **match: Any) -> List[Dict[str, Any]]:
+        """``select`` off the event loop."""
+        return await asyncio.to_thread(self.select, event_type, since, limit, **match)
+
+@lru_cache(maxsize=None)
+def get_event_log() -> EventLog:
+    """Return the process-wide log of queries, feedback, timings and cache outcomes."""
+    config = Config()
+    return EventLog(
+        config.event_log_file,
+        batch_size=config.event_log_batch_size,
+        flush_interval=config.event_log_flush_interval,
+        max_bytes=config.event_log_max_bytes,
+        backups=config.event_log_backups,
+    )
+
+@lru_cache(maxsize=None)
+def get_result_log() -> EventLog:
+    """Return the append-only store behind the result cache (latest entry per query wins)."""
+    config = Config()
+    return EventLog(
+        config.result_cache_file,
+        batch_size=config.event_log_batch_size,
+        flush_interval=config.event_log_flush_interval,
+        max_bytes=config.result_cache_max_bytes,
+        backups=config.result_cache_backups,
+    )
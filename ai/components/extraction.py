@@ -0,0 +1,260 @@
+"""Main-content extraction from HTML, shared by DataProcessor and the Discord cog.
+
+Documents are parsed in a single streaming pass: the parser calls back into
+``BlockBuilder`` (``start``/``data``/``end``/``close``, the lxml parser-target protocol)
+which groups text into blocks at block-level tags, noting for each how much of it is
+link text and whether it sits in navigation-like markup. Blocks are then kept or
+dropped by text and link density, in the spirit of jusText/boilerpipe. lxml's C parser
+is used when it is installed and the standard library's ``html.parser`` otherwise;
+either can be fed the document piece by piece as it downloads.
+
+This module only depends on the standard library (lxml optionally), so it can be
+imported without loading any models.
+"""
+import codecs
+import html.parser
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    from lxml import etree
+except ImportError:  # Optional fast path
+    etree = None
+
+logger = logging.getLogger("rich")
+
+# Tags whose content is never text of the page
+SKIP_TAGS = frozenset({"script", "style", "noscript", "template", "svg", "iframe", "head", "object", "canvas", "math"})
+# Page chrome: content inside is boilerplate
+BOILERPLATE_TAGS = frozenset({"nav", "header", "footer", "aside", "form", "button", "select", "menu", "dialog"})
+# Tags that start and end a block of text
+BLOCK_TAGS = frozenset({
+    "address", "article", "blockquote", "br", "caption", "dd", "details", "div", "dl", "dt", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre", "section", "summary", "table", "td",
+    "th", "tr", "ul", *BOILERPLATE_TAGS,
+})
+HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"})
+
+# class/id/role tokens of page chrome ("site-footer", "nav_main"; not "has-sidebar")
+BOILERPLATE_ATTRIBUTE = re.compile(
+    r"(?:^|\s)(?:site[_-]|page[_-]|global[_-]|main[_-])?(?:nav|navbar|navigation|menu|breadcrumbs?|header|footer|sidebar|"
+    r"banner|cookies?|consent|share|sharing|social|related|comments?|advert|ads|promo|newsletter|subscribe|popup|modal|"
+    r"skip|contentinfo|complementary)(?:$|[\s_-])",
+    re.IGNORECASE
+)
+# Containers whose attributes are not trusted to mark everything inside as chrome
+CONTENT_TAGS = frozenset({"html", "body", "main", "article"})
+# Sentences that are page chrome even when they slip through the DOM-level filter
+BOILERPLATE_TEXT = re.compile(r"^(navigation|menu|search|home|about|contact)\b|cookie|privacy policy|terms of use", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_STOP_PUNCTUATION = re.compile(r"[.!?]")
+
+FEED_SIZE = 1 << 16
+
+class Block:
+    """A run of text between block-level tags."""
+
+    __slots__ = ("text", "words", "link_density", "boilerplate", "heading", "good")
+
+    def __init__(self, text: str, link_chars: int, boilerplate: bool, heading: bool) -> None:
+        self.text = text
+        self.words = text.count(" ") + 1
+        self.link_density = min(link_chars / len(text), 1.0)
+        self.boilerplate = boilerplate
+        self.heading = heading
+        self.good: Optional[bool] = None
+
+class BlockBuilder:
+    """Parser target grouping a document's text into ``Block``s.
+
+    ``start``/``end`` accept both parsers' events; unbalanced end tags from
+    ``html.parser`` are matched against the open-tag stack rather than trusted.
+    """
+
+    def __init__(self) -> None:
+        self.blocks: List[Block] = []
+        self._stack: List[str] = []
+        self._boilerplate: List[bool] = [False]
+        self._skip = 0
+        self._links = 0
+        self._parts: List[str] = []
+        self._link_chars = 0  # Text inside links or inline chrome
+        self._heading = False
+
+    def _flush(self) -> None:
+        if self._parts:
+            text = _WHITESPACE.sub(" ", "".join(self._parts)).strip()
+            if text:
+                link_chars = min(self._link_chars, len(text))
+                self.blocks.append(Block(text, link_chars, self._boilerplate[-1], self._heading))
+            self._parts, self._link_chars = [], 0
+        self._heading = False
+
+    def start(self, tag: str, attrib: Dict[str, Optional[str]]) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""  # lxml passes comments as functions
+        if tag == "body" and "head" in self._stack:
+            self.end("head")  # html.parser does not close an unterminated <head>
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in VOID_TAGS:
+            return
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        boilerplate = self._boilerplate[-1] or tag in BOILERPLATE_TAGS or (tag not in CONTENT_TAGS and any(
+            value and BOILERPLATE_ATTRIBUTE.search(value) for value in (attrib.get("class"), attrib.get("id"), attrib.get("role"))
+        ))
+        self._stack.append(tag)
+        self._boilerplate.append(boilerplate)
+        if tag == "a":
+            self._links += 1
+        elif tag in HEADING_TAGS:
+            self._heading = True
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag not in self._stack:
+            return
+        while self._stack:
+            open_tag = self._stack.pop()
+            if open_tag in BLOCK_TAGS:
+                self._flush()
+            self._boilerplate.pop()
+            if open_tag in SKIP_TAGS:
+                self._skip -= 1
+            elif open_tag == "a":
+                self._links -= 1
+            if open_tag == tag:
+                break
+
+    def data(self, text: str) -> None:
+        if self._skip:
+            return
+        self._parts.append(text)
+        if self._links or self._boilerplate[-1]:
+            self._link_chars += len(text.strip())
+
+    def comment(self, text: str) -> None:
+        pass
+
+    def close(self) -> List[Block]:
+        self._flush()
+        return self.blocks
+
+class _StdlibParser(html.parser.HTMLParser):
+    """``html.parser`` driving a parser target, for when lxml is not installed."""
+
+    def __init__(self, target: BlockBuilder) -> None:
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag: str, attrs: List[Any]) -> None:
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag: str, attrs: List[Any]) -> None:
+        self.target.start(tag, dict(attrs))
+        if tag not in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        self.target.end(tag)
+
+    def handle_data(self, data: str) -> None:
+        self.target.data(data)
+
+    def close(self) -> List[Block]:
+        super().close()
+        return self.target.close()
+
+# Raised by lxml when a document holds no elements (e.g. only whitespace or a comment)
+_PARSE_ERRORS = (etree.XMLSyntaxError,) if etree is not None else ()
+
+def parser_backend() -> str:
+    return "lxml" if etree is not None else "html.parser"
+
+def _new_parser(target: BlockBuilder, backend: Optional[str] = None) -> Any:
+    backend = backend or parser_backend()
+    if backend == "lxml":
+        if etree is None:
+            raise ImportError("lxml is not installed")
+        return etree.HTMLParser(target=target, remove_comments=True, remove_pis=True, no_network=True)
+    return _StdlibParser(target)
+
+def parse_blocks(chunks: Iterable[Union[str, bytes]], backend: Optional[str] = None, max_chars: int = 0) -> List[Block]:
+    """Blocks of a document fed piece by piece; text past ``max_chars`` characters is ignored."""
+    builder = BlockBuilder()
+    parser = _new_parser(builder, backend)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    fed = 0
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if not chunk:
+            continue
+        if max_chars and fed + len(chunk) > max_chars:
+            if max_chars > fed:
+                parser.feed(chunk[:max_chars - fed])
+                fed = max_chars
+            logger.debug(f"Document truncated at {max_chars} characters")
+            break
+        parser.feed(chunk)
+        fed += len(chunk)
+    # lxml refuses to close a parser that was never fed, and empty bodies are common
+    if not fed:
+        return []
+    try:
+        return parser.close()
+    except _PARSE_ERRORS as e:
+        logger.debug(f"HTML parser gave up: {e}")
+        return builder.close()
+
+def classify(blocks: List[Block], min_words: int = 10, max_link_density: float = 0.33) -> List[Block]:
+    """Mark each block good or bad and return the good ones.
+
+    Blocks in page chrome or made mostly of links are bad. Blocks of at least
+    ``min_words`` words with sentence punctuation are good. The rest (short lines,
+    headings) take the verdict of their neighbours: they are kept between good blocks,
+    and headings are kept before a good block.
+    """
+    for block in blocks:
+        if block.boilerplate or block.link_density > max_link_density:
+            block.good = False
+        elif block.words >= min_words and _STOP_PUNCTUATION.search(block.text):
+            block.good = True
+        else:
+            block.good = None
+
+    # Nearest decided verdict before and after each block, in two linear passes
+    following: List[Optional[bool]] = [None] * len(blocks)
+    verdict = None
+    for index in range(len(blocks) - 1, -1, -1):
+        following[index] = verdict
+        if blocks[index].good is not None:
+            verdict = blocks[index].good
+    previous = None
+    for index, block in enumerate(blocks):
+        if block.good is None:
+            block.good = bool(following[index]) and (bool(previous) or block.heading)
+        else:
+            previous = block.good
+    return [block for block in blocks if block.good]
+
+def extract_text(
+    document: Union[str, bytes, Iterable[Union[str, bytes]]],
+    backend: Optional[str] = None,
+    min_words: int = 10,
+    max_link_density: float = 0.33,
+    max_chars: int = 0,
+    separator: str = "\n\n"
+) -> str:
+    """Main text of an HTML document (or of an iterable of its pieces), one block per paragraph."""
+    if isinstance(document, (str, bytes)):
+        chunks = [document[i:i + FEED_SIZE] for i in range(0, len(document), FEED_SIZE)]
+    else:
+        chunks = document
+    blocks = parse_blocks(chunks, backend, max_chars)
+    return separator.join(block.text for block in classify(blocks, min_words, max_link_density))
+
+def is_boilerplate_text(text: str) -> bool:
+    return BOILERPLATE_TEXT.search(text) is not None
@@ -0,0 +1,88 @@
+import logging
+from typing import Any, Dict, List, Optional
+from .data_utility import Config
+from .lazy_loader import lazy_import
+
+torch = lazy_import("torch")
+
+logger = logging.getLogger("rich")
+
+def find_answer_spans(query: str, context: str, qa_model: Dict[str, Any], config: Optional[Config] = None) -> List[Dict[str, Any]]:
+    """Extractive QA over an arbitrarily long context.
+
+    The context is split into overlapping token windows (``qa_max_length`` tokens with
+    ``qa_stride`` tokens of overlap) that go through the QA model in a single batched
+    forward pass. The best span is then searched jointly over all windows: every
+    (start, end) pair inside the context part of a window with start <= end and at most
+    ``qa_max_answer_tokens`` tokens is scored as start_logit + end_logit.
+
+    Returns up to ``qa_n_best`` answers, best first, each with its text, raw score,
+    probability among the returned candidates and character offsets into ``context``.
+    """
+    config = config or Config()
+    if not query.strip() or not context.strip():
+        return []
+
+    tokenizer, model = qa_model["tokenizer"], qa_model["model"]
+    encoding = tokenizer(
+        query,
+        context,
+        truncation="only_second",
+        max_length=config.qa_max_length,
+        stride=config.qa_stride,
+        return_overflowing_tokens=True,
+        return_offsets_mapping=True,
+        padding=True,
+        return_tensors="pt"
+    )
+    offsets = encoding.pop("offset_mapping")
+    encoding.pop("overflow_to_sample_mapping", None)
+    num_windows, seq_len = encoding["input_ids"].shape
+    logger.debug(f"Running QA over {num_windows} windows of {seq_len} tokens")
+
+    # Only tokens belonging to the context (sequence id 1) can start or end an answer
+    context_mask = torch.tensor(
+        [[sequence_id == 1 for sequence_id in encoding.sequence_ids(i)] for i in range(num_windows)]
+    )
+
+    with torch.no_grad():
+        outputs = model(**{key: value.to(model.device) for key, value in encoding.items()})
+    start_logits = outputs.start_logits.float().cpu().masked_fill(~context_mask, float("-inf"))
+    end_logits = outputs.end_logits.float().cpu().masked_fill(~context_mask, float("-inf"))
+
+    # (windows, start, end) score grid restricted to end >= start and length <= max answer tokens
+    scores = start_logits[:, :, None] + end_logits[:, None, :]
+    positions = torch.arange(seq_len)
+    span_length = positions[None, :] - positions[:, None]
+    valid = (span_length >= 0) & (span_length < config.qa_max_answer_tokens)
+    scores = scores.masked_fill(~valid, float("-inf")).view(-1)
+
+    # Overlapping windows yield the same span more than once, so over-fetch before de-duplicating
+    k = min(config.qa_n_best * 4, scores.numel())
+    top_scores, top_indices = scores.topk(k)
+
+    answers, seen = [], set()
+    for score, index in zip(top_scores.tolist(), top_indices.tolist()):
+        if score == float("-inf"):
+            break
+        window, remainder = divmod(index, seq_len * seq_len)
+        start_token, end_token = divmod(remainder, seq_len)
+        start_char = int(offsets[window, start_token, 0])
+        end_char = int(offsets[window, end_token, 1])
+        if (start_char, end_char) in seen or end_char <= start_char:
+            continue
+        seen.add((start_char, end_char))
+        answers.append({
+            "text": context[start_char:end_char].strip(),
+            "score": score,
+            "start": start_char,
+            "end": end_char
+        })
+        if len(answers) == config.qa_n_best:
+            break
+
+    if answers:
+        probabilities = torch.tensor([answer["score"] for answer in answers]).softmax(dim=0).tolist()
+        for answer, probability in zip(answers, probabilities):
+            answer["probability"] = probability
+    return answers
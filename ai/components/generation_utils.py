@@ -1,19 +1,27 @@
-import torch
-from typing import Dict, List
-from sklearn.metrics.pairwise import cosine_similarity
-from nltk.tokenize import sent_tokenize
-from textblob import TextBlob
-from .model_manager import ModelManager
+from typing import Dict, List, Optional, Tuple
+from .model_manager import ModelManager, get_device, load_spacy
+from .embeddings import get_embedding_service
+from .tracing import traced, current_span
+from .memory import get_memory_governor
+from .data_utility import Config
+from .extraction import is_boilerplate_text
+from .reranking import get_reranker
+from .lazy_loader import lazy_import
 import logging
-import spacy
+import hashlib
 import re
+import threading
 import traceback
 from rich.logging import RichHandler
 from rich.traceback import install as install_rich_traceback
 from rich.console import Console
-from rich import print as rprint
 import asyncio
-import gc
+from cachetools import LRUCache
+
+torch = lazy_import("torch")
+np = lazy_import("numpy")
+nltk = lazy_import("nltk")
+textblob = lazy_import("textblob")
 
 # Set up Rich traceback
 install_rich_traceback(show_locals=True)
@@ -28,25 +36,35 @@ logging.basicConfig(
 logger = logging.getLogger("rich")
 console = Console()
 
-# Initialize device and load spaCy model
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-logger.info(f"Using device: {device}")
+# The spaCy model is loaded on first use (or by --warm) instead of at import time
+nlp = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
 
-try:
-    nlp = spacy.load("en_core_web_sm")
-    logger.info("Loaded spaCy model successfully")
-except Exception as e:
-    logger.error(f"Failed to load spaCy model: {str(e)}")
-    nlp = None
+def get_nlp():
+    global nlp, _nlp_loaded
+    if not _nlp_loaded:
+        with _nlp_lock:
+            if not _nlp_loaded:
+                try:
+                    nlp = load_spacy(Config().spacy_ner_model)
+                    logger.info("Loaded spaCy model successfully")
+                except Exception as e:
+                    logger.error(f"Failed to load spaCy model: {str(e)}")
+                    nlp = None
+                _nlp_loaded = True
+    return nlp
 
+@traced("summarize", method="abstractive")
 async def generate_summary(text: str, mode: str, model_type: str = "bart-summarization") -> str:
     logger.info("Starting summary generation")
+    current_span().set(model=model_type, mode=mode)
     try:
         model_info = await ModelManager.get_model(model_type, mode)
         input_text = f"summarize: {text}"
         logger.debug(f"Input text length: {len(text)}")
         
-        input_ids = model_info["tokenizer"](input_text, return_tensors="pt", max_length=512, truncation=True).input_ids.to(device)
+        input_ids = model_info["tokenizer"](input_text, return_tensors="pt", max_length=512, truncation=True).input_ids.to(get_device())
         logger.debug(f"Tokenized input shape: {input_ids.shape}")
         
         with torch.no_grad():
@@ -60,6 +78,7 @@ async def generate_summary(text: str, mode: str, model_type: str = "bart-summari
                 no_repeat_ngram_size=3
             )
         
+        current_span().set(tokens_in=input_ids.shape[-1], tokens_out=summary_ids.shape[-1])
         summary = model_info["tokenizer"].decode(summary_ids[0], skip_special_tokens=True, clean_up_tokenization_spaces=True)
         logger.info("Summary generated successfully")
         logger.debug(f"Summary length: {len(summary)}")
@@ -78,115 +97,213 @@ async def generate_context_summary(raw_text: str, processed_text: str, query: st
 
     return await generate_summary(combined_text, mode, model_type="bart-cnn")
 
-async def calculate_confidence_score(abstractive_answer: str, extractive_answer: str, context: str, query: str) -> float:
-    logger.info("Starting calculate_confidence_score")
-    
-    if not (abstractive_answer and extractive_answer and context and query):
-        logger.warning("Empty input in calculate_confidence_score")
-        return 0.0
+# Weights of the confidence components, in the column order produced by _confidence_components
+CONFIDENCE_COMPONENTS = [
+    "length_score",
+    "query_sim_abstractive",
+    "query_sim_extractive",
+    "answer_sim_context",
+    "coherence_score",
+    "readability_score",
+    "ner_score",
+]
+CONFIDENCE_WEIGHTS = [0.15, 0.2, 0.15, 0.2, 0.15, 0.1, 0.05]
+
+def calculate_subjectivity_scores(texts: List[str]) -> List[float]:
+    return [textblob.TextBlob(text).sentiment.subjectivity for text in texts]
+
+def calculate_ner_scores(texts: List[str]) -> List[float]:
+    nlp = get_nlp()
+    if nlp is None:
+        logger.warning("spaCy model not loaded, returning default NER score")
+        return [0.5] * len(texts)
+    return [min(len(doc.ents) / 10, 1.0) for doc in nlp.pipe(texts)]
+
+async def _confidence_components(candidates: List[Tuple[str, str, str, str]]):
+    """Return an (n, 7) matrix of confidence components for (abstractive, extractive, context, query) tuples."""
+    # One embedding matrix for every text: rows are [query, abstractive, extractive, context] per candidate
+    texts = [text for abstractive, extractive, context, query in candidates for text in (query, abstractive, extractive, context)]
+    abstractive_answers = [candidate[0] for candidate in candidates]
+
+    embeddings, subjectivity, ner = await asyncio.gather(
+        get_embeddings(texts),
+        asyncio.to_thread(calculate_subjectivity_scores, abstractive_answers),
+        asyncio.to_thread(calculate_ner_scores, abstractive_answers),
+    )
+
+    # Embeddings are unit-norm, so each candidate's 4x4 Gram matrix holds every pairwise cosine
+    embeddings = embeddings.reshape(len(candidates), 4, -1)
+    gram = embeddings @ embeddings.transpose(0, 2, 1)
+
+    length = np.minimum(np.array([len(answer.split()) for answer in abstractive_answers], dtype=np.float32) / 50, 1.0)
+    return np.column_stack([
+        length,
+        gram[:, 0, 1],  # query vs abstractive
+        gram[:, 0, 2],  # query vs extractive
+        gram[:, 1, 3],  # abstractive vs context
+        gram[:, 1, 2],  # abstractive vs extractive
+        np.asarray(subjectivity, dtype=np.float32),
+        np.asarray(ner, dtype=np.float32),
+    ])
+
+@traced("confidence")
+async def score_many(candidates: List[Tuple[str, str, str, str]]) -> List[float]:
+    """Confidence scores for many (abstractive, extractive, context, query) tuples in one batch."""
+    logger.info(f"Scoring confidence for {len(candidates)} answers")
+    scores = [0.0] * len(candidates)
+    valid = [i for i, candidate in enumerate(candidates) if all(candidate)]
+    if len(valid) < len(candidates):
+        logger.warning(f"Empty input for {len(candidates) - len(valid)} answers in score_many")
+    if not valid:
+        return scores
 
     try:
-        length_score = min(len(abstractive_answer.split()) / 50, 1.0)
-        texts = [query, abstractive_answer, extractive_answer, context]
-        embeddings = await get_embeddings(texts)
-
-        query_sim_abstractive = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
-        query_sim_extractive = cosine_similarity([embeddings[0]], [embeddings[2]])[0][0]
-        answer_sim_context = cosine_similarity([embeddings[1]], [embeddings[3]])[0][0]
-        coherence_score = cosine_similarity([embeddings[1]], [embeddings[2]])[0][0]
-        readability_score = TextBlob(abstractive_answer).sentiment.subjectivity
-        ner_score = calculate_ner_score(abstractive_answer)
-
-        combined_score = (
-            length_score * 0.15 +
-            query_sim_abstractive * 0.2 +
-            query_sim_extractive * 0.15 +
-            answer_sim_context * 0.2 +
-            coherence_score * 0.15 +
-            readability_score * 0.1 +
-            ner_score * 0.05
-        ) * 100
-
-        final_score = round(combined_score, 2)
-        logger.info(f"Confidence score calculated: {final_score}")
-        
-        rprint({
-            "length_score": length_score,
-            "query_sim_abstractive": query_sim_abstractive,
-            "query_sim_extractive": query_sim_extractive,
-            "answer_sim_context": answer_sim_context,
-            "coherence_score": coherence_score,
-            "readability_score": readability_score,
-            "ner_score": ner_score,
-            "final_score": final_score
-        })
-        
-        return final_score
+        components = await _confidence_components([candidates[i] for i in valid])
+        combined = components @ np.asarray(CONFIDENCE_WEIGHTS, dtype=np.float32) * 100
+
+        for row, i in enumerate(valid):
+            scores[i] = round(float(combined[row]), 2)
+            if logger.isEnabledFor(logging.DEBUG):
+                details = dict(zip(CONFIDENCE_COMPONENTS, components[row].tolist()))
+                details["final_score"] = scores[i]
+                logger.debug(f"Confidence components: {details}")
+        return scores
     except Exception as e:
-        logger.exception("Error in calculate_confidence_score")
+        logger.exception("Error in score_many")
         console.print_exception(show_locals=True)
-        return 0.0
+        return scores
     finally:
         clean_up()
 
+async def calculate_confidence_score(abstractive_answer: str, extractive_answer: str, context: str, query: str) -> float:
+    logger.info("Starting calculate_confidence_score")
+    final_score = (await score_many([(abstractive_answer, extractive_answer, context, query)]))[0]
+    logger.info(f"Confidence score calculated: {final_score}")
+    return final_score
+
 async def get_embeddings(texts: List[str]):
     logger.info("Generating embeddings")
-    model_info = await ModelManager.get_model("sentence-transformer")
-    embeddings = model_info["model"].encode(texts)
+    embeddings = await asyncio.to_thread(get_embedding_service().encode, texts)
     logger.debug(f"Embeddings shape: {embeddings.shape}")
     return embeddings
 
+def build_context_segments(text: str, window: int = 2, stride: int = 1, window_words: int = 48) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Split text into overlapping windows for ranking.
+
+    Returns the units (sentences, or words when the text has a single sentence) and the
+    (start, end) unit spans of each window, so selected windows can be stitched back
+    together in document order without repeating overlapping units.
+    """
+    units = nltk.sent_tokenize(text)
+    if len(units) <= 1:
+        units = text.split()
+        window, stride = window_words, max(window_words // 2, 1)
+    if not units:
+        return units, []
+
+    spans = [(start, min(start + window, len(units))) for start in range(0, max(len(units) - window, 0) + 1, stride)]
+    if spans[-1][1] < len(units):
+        spans.append((max(len(units) - window, 0), len(units)))
+    return units, spans
+
+@traced("rank")
+def select_relevant_context(query: str, text: str, config: Config = None) -> Tuple[str, int]:
+    """Keep the windows of text most similar to the query, in their original order.
+
+    All windows are encoded in one batched call through the shared embedding service
+    (cached rows are reused). Returns the refined context and the number of segments ranked.
+    """
+    config = config or Config()
+    units, spans = build_context_segments(text, config.segment_window, config.segment_stride, config.segment_window_words)
+    if not spans:
+        return "", 0
+
+    segments = [" ".join(units[start:end]) for start, end in spans]
+    similarities = get_embedding_service().similarities(query, segments)
+
+    top = similarities.argsort()[::-1][:config.segment_top_k]
+    selected = sorted({i for index in top for i in range(*spans[index])})
+    return " ".join(units[i] for i in selected), len(segments)
+
 def calculate_ner_score(text: str) -> float:
     logger.info("Starting calculate_ner_score")
-    if nlp is None:
-        logger.warning("spaCy model not loaded, returning default NER score")
-        return 0.5
-
     try:
-        doc = nlp(text)
-        ner_count = len(doc.ents)
-        score = min(ner_count / 10, 1.0)
+        score = calculate_ner_scores([text])[0]
         logger.info(f"NER score calculated: {score}")
-        logger.debug(f"Named entities found: {', '.join(str(ent) for ent in doc.ents)}")
         return score
     except Exception as e:
         logger.exception("Error in calculate_ner_score")
         console.print_exception(show_locals=True)
         return 0.0
 
-async def generate_follow_up_questions(query: str, answer: str) -> List[str]:
+# Follow-up questions keyed by a hash of (query, answer); in-flight generations are shared
+_follow_up_cache: LRUCache = LRUCache(maxsize=Config().follow_up_cache_size)
+_follow_up_tasks: Dict[str, asyncio.Task] = {}
+
+def _follow_up_key(query: str, answer: str) -> str:
+    normalized = " ".join(query.lower().split()) + "\0" + " ".join(answer.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _follow_up_prompt(query: str, answer: str, fast: bool) -> str:
+    if fast:
+        return f"Question: {query}\nAnswer: {answer}\n\nWrite 3 different follow-up questions about this topic:"
+    return (
+        f"""Human: You are an expert in generating follow-up questions based on a question and its answer. The original question is: "{query}" and the answer provided is: "{answer}".\n\n"""
+        f"""Please generate exactly 3 unique, thought-provoking follow-up questions that:\n"""
+        f"""1. Address different dimensions of the topic that were not directly covered in the original question or the provided answer.\n"""
+        f"""2. Explore specific details, nuances, or implications from the answer provided.\n"""
+        f"""3. Ask the user to think critically about broader implications or real-world applications related to the answer.\n\n"""
+        f"""Make sure each question:\n"""
+        f"""- Is relevant to the given topic.\n"""
+        f"""- Is open-ended and fosters deeper discussion.\n"""
+        f"""- Is concise and well-structured.\n\n"""
+        f"""AI: Here are 3 follow-up questions:\n\n"""
+        f"""Human: Now, give me only the questions without any extra information.\n\n"""
+        f"""AI:"""
+    )
+
+def _parse_questions(response: str) -> List[str]:
+    questions = [question.strip() for question in re.findall(r'\d+\.\s(.+?)(?=\s*\d+\.\s|$)', response, re.DOTALL)]
+    if not questions:
+        # Small models rarely number their output; fall back to splitting on question marks
+        questions = [question.strip() + "?" for question in response.split("?") if question.strip()]
+    return list(dict.fromkeys(questions))[:3]
+
+def _generate_follow_up_response(model_info: Dict, prompt: str, fast: bool, max_new_tokens: int) -> str:
+    input_ids = model_info["tokenizer"](prompt, return_tensors="pt", truncation=True, max_length=512).input_ids.to(get_device())
+    with torch.no_grad():
+        if fast:
+            outputs = model_info["model"].generate(input_ids, max_new_tokens=max_new_tokens, num_beams=1, do_sample=False)
+        else:
+            outputs = model_info["model"].generate(input_ids, max_new_tokens=150, num_beams=5, early_stopping=True)
+    current_span().set(tokens_in=input_ids.shape[-1], tokens_out=outputs.shape[-1])
+    return model_info["tokenizer"].decode(outputs[0], skip_special_tokens=True)
+
+@traced("follow_up")
+async def generate_follow_up_questions(query: str, answer: str, fast: Optional[bool] = None) -> List[str]:
     logger.info("Starting generate_follow_up_questions")
+    config = Config()
+    fast = config.follow_up_fast_path if fast is None else fast
+    key = _follow_up_key(query, answer)
+    if key in _follow_up_cache:
+        logger.info("Follow-up questions served from cache")
+        current_span().set(cache_hits=1)
+        return list(_follow_up_cache[key])
+    current_span().set(cache_misses=1, model="flan-t5", mode="performance" if fast else "power")
+
     try:
-        godel_model = await ModelManager.get_model("flan-t5")
-        logger.info("T5 model loaded")
-
-        prompt = (
-            f"""Human: You are an expert in generating follow-up questions based on a question and its answer. The original question is: "{query}" and the answer provided is: "{answer}".\n\n"""
-            f"""Please generate exactly 3 unique, thought-provoking follow-up questions that:\n"""
-            f"""1. Address different dimensions of the topic that were not directly covered in the original question or the provided answer.\n"""
-            f"""2. Explore specific details, nuances, or implications from the answer provided.\n"""
-            f"""3. Ask the user to think critically about broader implications or real-world applications related to the answer.\n\n"""
-            f"""Make sure each question:\n"""
-            f"""- Is relevant to the given topic.\n"""
-            f"""- Is open-ended and fosters deeper discussion.\n"""
-            f"""- Is concise and well-structured.\n\n"""
-            f"""AI: Here are 3 follow-up questions:\n\n"""
-            f"""Human: Now, give me only the questions without any extra information.\n\n"""
-            f"""AI:"""
-        )
-        
+        # The fast path uses the small flan-t5 with a short prompt and greedy decoding
+        model_info = await ModelManager.get_model("flan-t5", "performance" if fast else "power")
+        prompt = _follow_up_prompt(query, answer, fast)
         logger.debug(f"Prompt length: {len(prompt)}")
-        input_ids = godel_model["tokenizer"](prompt, return_tensors="pt", truncation=True).input_ids.to(device)
-        
-        with torch.no_grad():
-            outputs = godel_model["model"].generate(input_ids, max_new_tokens=150, num_beams=5, early_stopping=True)
 
-        response = godel_model["tokenizer"].decode(outputs[0], skip_special_tokens=True)
+        response = await asyncio.to_thread(_generate_follow_up_response, model_info, prompt, fast, config.follow_up_max_new_tokens)
         logger.info("Follow-up questions generated successfully")
-        
-        questions = re.findall(r'\d+\.\s(.+)', response)
+
+        questions = _parse_questions(response)
         logger.debug(f"Extracted questions: {questions}")
-        return questions[:3]
+        _follow_up_cache[key] = questions
+        return list(questions)
     except Exception as e:
         logger.exception("Error in generate_follow_up_questions")
         console.print_exception(show_locals=True)
@@ -194,35 +311,45 @@ async def generate_follow_up_questions(query: str, answer: str) -> List[str]:
     finally:
         clean_up()
 
-async def filter_and_sort_sentences(text: str, query: str, model_name: str = "roberta-qa", mode: str = "power") -> str:
+def schedule_follow_up_questions(query: str, answer: str, fast: Optional[bool] = None) -> asyncio.Task:
+    """Start generating follow-up questions in the background and return the task.
+
+    Lets callers hand back the main answer first and attach the questions once the
+    task completes. Concurrent requests for the same (query, answer) share one task.
+    """
+    key = _follow_up_key(query, answer)
+    task = _follow_up_tasks.get(key)
+    if task is None:
+        task = asyncio.create_task(generate_follow_up_questions(query, answer, fast))
+        _follow_up_tasks[key] = task
+        task.add_done_callback(lambda _: _follow_up_tasks.pop(key, None))
+    return task
+
+async def filter_and_sort_sentences(text: str, query: str, model_name: str = "cross-encoder", mode: Optional[str] = None) -> str:
     logger.info("Starting filter_and_sort_sentences")
-    sentences = sent_tokenize(text)
+    sentences = nltk.sent_tokenize(text)
     logger.debug(f"Total sentences: {len(sentences)}")
     
     filtered_sentences = [
         sent for sent in sentences
-        if len(sent.split()) > 5 and not re.match(r'^(Navigation|Menu|Search|Home|About|Contact)', sent) and not re.search(r'(cookie|privacy policy|terms of use)', sent.lower())
+        if len(sent.split()) > 5 and not is_boilerplate_text(sent)
     ]
     logger.debug(f"Filtered sentences: {len(filtered_sentences)}")
     
-    sentence_scores = await asyncio.gather(*[score_sentence(query, sent, model_name, mode) for sent in filtered_sentences])
+    sentence_scores = await asyncio.to_thread(get_reranker().score, query, filtered_sentences, mode, model_name)
     
     sorted_sentences = [sent for sent, score in sorted(zip(filtered_sentences, sentence_scores), key=lambda x: x[1], reverse=True)]
     logger.info(f"Sorted sentences based on scores: {sorted_sentences}")
 
     return sorted_sentences[:3]  # Return top 3 sentences
 
-async def score_sentence(query: str, sentence: str, model_name: str, mode: str) -> float:
+async def score_sentence(query: str, sentence: str, model_name: str = "cross-encoder", mode: Optional[str] = None) -> float:
+    """Relevance of a sentence to the query from a cross-encoder (``model_name`` is a
+    sequence classification alias, ``mode`` defaults to ``rerank_mode``); scores are
+    cached per (query, sentence)."""
     logger.info("Scoring a sentence")
     try:
-        model_info = await ModelManager.get_model(model_name, mode)
-        input_text = f"{query} {sentence}"
-        
-        input_ids = model_info["tokenizer"](input_text, return_tensors="pt", truncation=True).input_ids.to(device)
-        
-        with torch.no_grad():
-            outputs = model_info["model"](input_ids)
-            score = outputs.logits.softmax(dim=-1).max().item()  # Get the highest probability
+        score = (await asyncio.to_thread(get_reranker().score, query, [sentence], mode, model_name))[0]
         logger.debug(f"Score for sentence '{sentence}': {score}")
         return score
     except Exception as e:
@@ -231,5 +358,4 @@ async def score_sentence(query: str, sentence: str, model_name: str, mode: str)
         return 0.0
 
 def clean_up():
-    logger.info("Cleaning up resources")
-    gc.collect()  # Trigger garbage collection
+    get_memory_governor().collect("generation")
@@ -0,0 +1,38 @@
+import importlib
+import importlib.util
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        if self.__dict__["_module"] is None:
+            self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return self.__dict__["_module"]
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value) -> None:
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return a module whose body only executes on first attribute access.
+
+    Heavy dependencies (torch, transformers, spaCy, ...) are bound at module level
+    through this helper so that importing the components package stays cheap and
+    the real import cost is paid by the first request that needs the library.
+    """
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
+
@@ -0,0 +1,155 @@
+import gc
+import logging
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+import psutil
+from .data_utility import Config
+from .model_manager import ModelManager, global_models
+from .tracing import get_tracer, span
+
+logger = logging.getLogger("rich")
+
+LEVELS = ("normal", "pressure", "critical")
+
+def _step_down(values: Sequence[int], current: int) -> int:
+    """The next configured value below ``current`` (or ``current`` if it is the smallest)."""
+    smaller = [value for value in values if value < current]
+    return max(smaller) if smaller else current
+
+class MemoryGovernor:
+    """Keeps the process under an RSS ceiling by degrading new work before memory runs out.
+
+    Under ``pressure`` new power-mode requests run the performance models and retrieval
+    fetches fewer results in smaller chunks; at ``critical`` models ModelManager has not
+    handed out for ``memory_model_idle_seconds`` are evicted as well. A level is only left
+    once RSS falls ``memory_recovery_margin`` below its threshold, so requests near the
+    boundary do not flip between modes. Every decision is logged and counted in
+    ``ai_memory_actions_total``.
+    """
+
+    def __init__(self, config: Optional[Config] = None) -> None:
+        self.config = config or Config()
+        if self.config.memory_ceiling_mb:
+            self.ceiling: int = self.config.memory_ceiling_mb * 2 ** 20
+        else:
+            self.ceiling = int(psutil.virtual_memory().total * self.config.memory_ceiling_fraction)
+        self.level: str = "normal"
+        self.rss: int = 0
+        self._process = psutil.Process()
+        self._lock = threading.Lock()
+        self._last_check = float("-inf")
+        self._last_collect = float("-inf")
+        self._blocks_at_collect = sys.getallocatedblocks()
+        get_tracer().gauge("ai_memory_ceiling_bytes", self.ceiling)
+
+    def _level_for(self, rss: int) -> str:
+        fraction = rss / self.ceiling
+        current = LEVELS.index(self.level)
+        thresholds = (self.config.memory_pressure_threshold, self.config.memory_critical_threshold)
+        level = 0
+        for index, threshold in enumerate(thresholds, 1):
+            if fraction >= threshold or (current >= index and fraction >= threshold - self.config.memory_recovery_margin):
+                level = index
+        return LEVELS[level]
+
+    def check(self, force: bool = False) -> str:
+        """Measure RSS (at most once per ``memory_check_interval``) and act on the level."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_check < self.config.memory_check_interval:
+                return self.level
+            self._last_check = now
+            self.rss = self._process.memory_info().rss
+            previous, self.level = self.level, self._level_for(self.rss)
+
+        if self.level != previous:
+            log = logger.warning if LEVELS.index(self.level) > LEVELS.index(previous) else logger.info
+            log(f"Memory {previous} -> {self.level}: RSS {self.rss / 2 ** 20:.0f} MB of {self.ceiling / 2 ** 20:.0f} MB ceiling")
+            self._record("level", level=self.level)
+        if self.level == "critical":
+            self.relieve()
+
+        tracer = get_tracer()
+        tracer.gauge("ai_memory_pressure_level", LEVELS.index(self.level))
+        tracer.gauge("ai_models_loaded", len(global_models))
+        return self.level
+
+    def relieve(self, idle_seconds: Optional[float] = None) -> List[str]:
+        """Evict idle ModelManager models and hand their memory back."""
+        if idle_seconds is None:
+            idle_seconds = self.config.memory_model_idle_seconds
+        evicted = ModelManager.evict_idle(idle_seconds)
+        if evicted:
+            gc.collect()
+            torch = sys.modules.get("torch")
+            if torch is not None and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            logger.warning(f"Memory {self.level}: evicted {len(evicted)} idle model(s): {', '.join(evicted)}")
+            self._record("evict", amount=len(evicted))
+        return evicted
+
+    def collect(self, reason: str) -> bool:
+        """Run a full garbage collection at a stage boundary, if one is worth it.
+
+        With transformer models on the heap a full ``gc.collect()`` costs tens of
+        milliseconds, and the models themselves are freed by reference counting anyway.
+        So only collect once ``gc_allocation_threshold`` new blocks were allocated since
+        the last collection, or under memory pressure (at most every ``gc_min_interval``).
+        """
+        grown = sys.getallocatedblocks() - self._blocks_at_collect
+        if grown < self.config.gc_allocation_threshold:
+            if self.check() == "normal" or time.monotonic() - self._last_collect < self.config.gc_min_interval:
+                return False
+        with span("gc", reason=reason, allocated_blocks=grown):
+            gc.collect()
+            torch = sys.modules.get("torch")
+            if torch is not None and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        self._last_collect = time.monotonic()
+        self._blocks_at_collect = sys.getallocatedblocks()
+        self._record("collect", reason=reason)
+        return True
+
+    def admit(self, mode: str) -> str:
+        """Mode a new request should run in; power requests are downgraded under pressure."""
+        level = self.check()
+        if mode == "power" and level != "normal":
+            logger.warning(f"Memory {level}: running request with performance models")
+            self._record("downgrade")
+            return "performance"
+        return mode
+
+    def tune(self, processor: Any) -> None:
+        """Shrink a DataProcessor's num_results and chunk_size for the level, or restore them."""
+        config = self.config
+        if self.level == "normal":
+            num_results, chunk_size = config.default_num_results, config.default_chunk_size
+        elif self.level == "pressure":
+            num_results = _step_down(config.num_results, config.default_num_results)
+            chunk_size = _step_down(config.chunk_sizes, config.default_chunk_size)
+        else:
+            num_results, chunk_size = min(config.num_results), min(config.chunk_sizes)
+
+        if (processor.num_results, processor.chunk_size) != (num_results, chunk_size):
+            logger.info(f"Memory {self.level}: retrieval set to num_results={num_results}, chunk_size={chunk_size}")
+            self._record("shrink" if num_results < processor.num_results else "restore")
+            processor.num_results, processor.chunk_size = num_results, chunk_size
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "rss_mb": round(self.rss / 2 ** 20, 1),
+            "ceiling_mb": round(self.ceiling / 2 ** 20, 1),
+            "models_loaded": len(global_models),
+        }
+
+    def _record(self, action: str, amount: int = 1, **labels: str) -> None:
+        get_tracer().count("ai_memory_actions_total", amount, action=action, **labels)
+
+@lru_cache(maxsize=None)
+def get_memory_governor() -> MemoryGovernor:
+    """Return the process-wide memory governor."""
+    return MemoryGovernor()
@@ -1,11 +1,20 @@
-import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, AutoModelForQuestionAnswering, AutoModelForCausalLM, pipeline, AutoModelForSequenceClassification
 import os
 import logging
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from functools import lru_cache
+from typing import Iterable, List
 from rich.traceback import install as install_rich_traceback
 from rich.logging import RichHandler
 from rich.console import Console
+from .lazy_loader import lazy_import
+from .data_utility import Config
+from .tracing import get_tracer, span
+
+torch = lazy_import("torch")
+transformers = lazy_import("transformers")
+sentence_transformers = lazy_import("sentence_transformers")
+spacy = lazy_import("spacy")
 
 install_rich_traceback(show_locals=True)
 logging.basicConfig(
@@ -18,87 +27,145 @@ logger = logging.getLogger("rich")
 
 console = Console()
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+@lru_cache(maxsize=None)
+def get_device():
+    """Resolve the torch device on first use rather than at import time."""
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    logger.info(f"Using device: {device}")
+    return device
 
 global_models = {}
+_last_used = {}  # Checkpoint path -> time.monotonic() of the last load_model call
+_load_lock = threading.Lock()
+
+# A single sentence embedding checkpoint is shared by every mode and stage
+_embedding_model = Config().embedding_model
+
+# Hugging Face checkpoints per model alias: (power, performance)
+MODEL_PATHS = {
+    "flan-t5": ("google/flan-t5-large", "google/flan-t5-small"),
+    "roberta-qa": ("deepset/roberta-base-squad2", "distilroberta-base"),
+    "sentence-transformer": (_embedding_model, _embedding_model),
+    "bart-cnn": ("facebook/bart-large-cnn", "facebook/bart-base"),
+    "bart-summarization": ("facebook/bart-large-xsum", "facebook/bart-base-xsum"),
+    "sentiment-analysis": ("distilbert-base-uncased-finetuned-sst-2-english", "distilbert-base-uncased-finetuned-sst-2-english"),
+    "sentiment-mnli": ("facebook/bart-large-mnli", "facebook/bart-large-mnli"),
+    "follow-up-questions": ("bigscience/bloom-560m", "bigscience/bloom-350m"),
+    "prompt-guard": ("meta-llama/Prompt-Guard-86M", "meta-llama/Prompt-Guard-86M"),  # Update with the correct model name
+    "cross-encoder": ("cross-encoder/ms-marco-MiniLM-L-12-v2", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+}
+
+def _load_seq2seq(model_path: str):
+    return {
+        "model": transformers.AutoModelForSeq2SeqLM.from_pretrained(model_path).to(get_device()),
+        "tokenizer": transformers.AutoTokenizer.from_pretrained(model_path)
+    }
+
+def _load_qa(model_path: str):
+    return {
+        "model": transformers.AutoModelForQuestionAnswering.from_pretrained(model_path).to(get_device()),
+        "tokenizer": transformers.AutoTokenizer.from_pretrained(model_path)
+    }
+
+def _load_causal_lm(model_path: str):
+    return {
+        "model": transformers.AutoModelForCausalLM.from_pretrained(model_path).to(get_device()),
+        "tokenizer": transformers.AutoTokenizer.from_pretrained(model_path)
+    }
+
+def _load_sequence_classifier(model_path: str):
+    return {
+        "model": transformers.AutoModelForSequenceClassification.from_pretrained(model_path).to(get_device()),
+        "tokenizer": transformers.AutoTokenizer.from_pretrained(model_path)
+    }
+
+def _load_sentence_transformer(model_path: str):
+    return sentence_transformers.SentenceTransformer(model_path).to(get_device())
+
+def _load_sentiment_pipeline(model_path: str):
+    return transformers.pipeline("sentiment-analysis", model=model_path, device=0 if torch.cuda.is_available() else -1)
+
+def load_spacy(name: str):
+    """Load a spaCy pipeline by package name, or an empty one for ``blank:<lang>``."""
+    if name.startswith("blank:"):
+        return spacy.blank(name.split(":", 1)[1])
+    return spacy.load(name)
+
+MODEL_LOADERS = {
+    "flan-t5": _load_seq2seq,
+    "roberta-qa": _load_qa,
+    "sentence-transformer": _load_sentence_transformer,
+    "bart-cnn": _load_seq2seq,
+    "bart-summarization": _load_seq2seq,
+    "sentiment-analysis": _load_sentiment_pipeline,
+    "sentiment-mnli": _load_sentiment_pipeline,
+    "follow-up-questions": _load_causal_lm,
+    "prompt-guard": _load_sequence_classifier,
+    "cross-encoder": _load_sequence_classifier,
+}
 
 class ModelManager:
     @staticmethod
-    async def get_model(model_name: str, mode: str = "power"):
+    def resolve_model_path(model_name: str, mode: str = "power") -> str:
+        """Return the checkpoint used for a model alias in the given mode."""
         if mode not in ["power", "performance"]:
             raise ValueError("Mode must be either 'power' or 'performance'")
+        if model_name not in MODEL_PATHS:
+            raise ValueError(f"Unsupported model name: {model_name}")
+        power_path, performance_path = MODEL_PATHS[model_name]
+        return power_path if mode == "power" else performance_path
+
+    @staticmethod
+    def load_model(model_name: str, mode: str = "power"):
+        """Synchronous variant of get_model for code running in worker threads."""
+        model_path = ModelManager.resolve_model_path(model_name, mode)
+
+        # Models are cached by checkpoint so power and performance variants can coexist
+        if model_path not in global_models:
+            with _load_lock:
+                if model_path not in global_models:
+                    logger.info(f"Loading {model_name} model: {model_path}")
+                    with span("model_load", model=model_name, mode=mode, path=model_path):
+                        global_models[model_path] = MODEL_LOADERS[model_name](model_path)
+                    get_tracer().count("ai_model_loads_total", model=model_name, mode=mode)
+
+        _last_used[model_path] = time.monotonic()
+        return global_models[model_path]
+
+    @staticmethod
+    async def get_model(model_name: str, mode: str = "power"):
+        return ModelManager.load_model(model_name, mode)
+
+    @staticmethod
+    async def preload(model_names: Iterable[str], mode: str = "power"):
+        """Eagerly load the given models, e.g. when the CLI is started with --warm."""
+        for model_name in model_names:
+            await ModelManager.get_model(model_name, mode)
+
+    @staticmethod
+    def evict_idle(idle_seconds: float) -> List[str]:
+        """Drop models not requested for ``idle_seconds``; returns the evicted checkpoints.
+
+        Callers still holding a model keep it alive until they finish with it.
+        """
+        now = time.monotonic()
+        evicted = []
+        with _load_lock:
+            for model_path in list(global_models):
+                if now - _last_used.get(model_path, 0.0) >= idle_seconds:
+                    del global_models[model_path]
+                    _last_used.pop(model_path, None)
+                    evicted.append(model_path)
+        for model_path in evicted:
+            logger.info(f"Evicted idle model: {model_path}")
+        return evicted
 
-        if model_name not in global_models:
-            if model_name == "flan-t5":
-                model_size = "large" if mode == "power" else "small"
-                global_models[model_name] = {
-                    "model": AutoModelForSeq2SeqLM.from_pretrained(f"google/flan-t5-{model_size}").to(device),
-                    "tokenizer": AutoTokenizer.from_pretrained(f"google/flan-t5-{model_size}")
-                }
-            elif model_name == "roberta-qa":
-                model_name = "deepset/roberta-base-squad2" if mode == "power" else "distilroberta-base"
-                global_models[model_name] = {
-                    "model": AutoModelForQuestionAnswering.from_pretrained(model_name).to(device),
-                    "tokenizer": AutoTokenizer.from_pretrained(model_name)
-                }
-            elif model_name == "sentence-transformer":
-                model_name = 'paraphrase-mpnet-base-v2' if mode == "power" else 'paraphrase-MiniLM-L6-v2'
-                global_models[model_name] = SentenceTransformer(model_name).to(device)
-            elif model_name == "bart-cnn":
-                model_name = "facebook/bart-large-cnn" if mode == "power" else "facebook/bart-base"
-                global_models[model_name] = {
-                    "model": AutoModelForSeq2SeqLM.from_pretrained(model_name).to(device),
-                    "tokenizer": AutoTokenizer.from_pretrained(model_name)
-                }
-            elif model_name == "bart-summarization":
-                model_name = "facebook/bart-large-xsum" if mode == "power" else "facebook/bart-base-xsum"
-                global_models[model_name] = {
-                    "model": AutoModelForSeq2SeqLM.from_pretrained(model_name).to(device),
-                    "tokenizer": AutoTokenizer.from_pretrained(model_name)
-                }
-            elif model_name == "sentiment-analysis":
-                model_name = "facebook/bart-large-mnli" if mode == "power" else "distilbert-base-uncased-finetuned-sst-2-english"
-                global_models[model_name] = pipeline("sentiment-analysis", model=model_name, device=0 if torch.cuda.is_available() else -1)
-            elif model_name == "follow-up-questions":
-                model_name = "bigscience/bloom-560m" if mode == "power" else "bigscience/bloom-350m"
-                global_models[model_name] = {
-                    "model": AutoModelForCausalLM.from_pretrained(model_name).to(device),
-                    "tokenizer": AutoTokenizer.from_pretrained(model_name)
-                }
-            elif model_name == "prompt-guard": 
-                model_name = "meta-llama/Prompt-Guard-86M" if mode == "power" else "meta-llama/Prompt-Guard-86M" # Update with the correct model name
-                global_models[model_name] = {
-                    "model": AutoModelForSequenceClassification.from_pretrained(model_name).to(device),
-                    "tokenizer": AutoTokenizer.from_pretrained(model_name)
-                }
-            
-        return global_models[model_name]
-    
     @staticmethod
     async def check_model_downloaded(model_name: str, mode: str):
         """Checks if the model and tokenizer are downloaded and cached locally. Downloads if not."""
         model_cache_dir = os.path.expanduser("~/.cache/huggingface/hub")
 
-        # Set model paths based on model name and mode
-        if model_name == "flan-t5":
-            model_size = "large" if mode == "power" else "small"
-            model_path = f"google/flan-t5-{model_size}"
-        elif model_name == "roberta-qa":
-            model_path = "deepset/roberta-base-squad2" if mode == "power" else "distilroberta-base"
-        elif model_name == "sentence-transformer":
-            model_path = 'paraphrase-mpnet-base-v2' if mode == "power" else 'paraphrase-MiniLM-L6-v2'
-        elif model_name == "bart-cnn":
-            model_path = "facebook/bart-large-cnn" if mode == "power" else "facebook/bart-base"
-        elif model_name == "bart-summarization":
-            model_path = "facebook/bart-large-xsum" if mode == "power" else "facebook/bart-base-xsum"
-        elif model_name == "sentiment-analysis":
-            model_path = "facebook/bart-large-mnli" if mode == "power" else "distilbert-base-uncased-finetuned-sst-2-english"
-        elif model_name == "follow-up-questions":
-            model_path = "google/flan-t5-large" if mode == "power" else "google/flan-t5-small"
-        elif model_name == "prompt-guard":
-            model_path = "meta-llama/Prompt-Guard-86M" if mode == "power" else "meta-llama/Prompt-Guard-86M"
-        else:
-            raise ValueError(f"Unsupported model name: {model_name}")
+        model_path = ModelManager.resolve_model_path(model_name, mode)
 
         # Check if the model exists in the cache directory
         model_cached = os.path.exists(os.path.join(model_cache_dir, model_path))
@@ -107,7 +174,7 @@ class ModelManager:
             logger.info(f"Model {model_path} not found locally. Downloading...")
             
             # Trigger the download by calling from_pretrained
-            AutoTokenizer.from_pretrained(model_path)
-            AutoModelForSeq2SeqLM.from_pretrained(model_path)
+            transformers.AutoTokenizer.from_pretrained(model_path)
+            transformers.AutoModelForSeq2SeqLM.from_pretrained(model_path)
 
         logger.info(f"Model {model_path} is ready for use.")
\ No newline at end of file
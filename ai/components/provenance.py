@@ -0,0 +1,96 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+# Order of the values in a packed record (``ChunkRecord.pack``); ``source`` indexes result["sources"]
+PROVENANCE_FIELDS = ("source", "start", "end", "answer_start", "answer_end", "similarity", "rerank_score", "support")
+
+_WORD_PATTERN = re.compile(r"\w{3,}")
+
+@dataclass(slots=True)
+class ChunkRecord:
+    """One chunk of a scraped page, from chunking to the answer it backs.
+
+    ``start``/``end`` are character offsets into ``page``, the cleaned text of ``url``
+    (shared by every chunk of the page, not copied). ``text`` is what the pipeline
+    works on (the chunk's extractive summary once summarized). Neither is persisted.
+    Scores are filled in by the stage that computes them: cosine ``similarity`` by
+    ranking, ``rerank_score`` by the cross-encoder, and ``support`` (share of the
+    answer's words found in the chunk) and ``answer_start``/``answer_end`` (where the
+    extractive answer occurs in ``page``) by ``attribute``.
+    """
+
+    url: str
+    start: int
+    end: int
+    text: str
+    page: str = field(default="", repr=False)
+    similarity: Optional[float] = None
+    rerank_score: Optional[float] = None
+    support: Optional[float] = None
+    answer_start: Optional[int] = None
+    answer_end: Optional[int] = None
+
+    def pack(self, sources: List[str]) -> List[Any]:
+        """Compact JSON form: a row of PROVENANCE_FIELDS, the URL as an index into ``sources``."""
+        if self.url not in sources:
+            sources.append(self.url)
+        return [
+            sources.index(self.url), self.start, self.end, self.answer_start, self.answer_end,
+            None if self.similarity is None else round(self.similarity, 4),
+            None if self.rerank_score is None else round(self.rerank_score, 4),
+            None if self.support is None else round(self.support, 4),
+        ]
+
+    def locate(self, answer: str) -> bool:
+        """Set ``answer_start``/``answer_end`` to the answer's first occurrence in the chunk's page span."""
+        if not answer or not self.page:
+            return False
+        offset = self.page[self.start:self.end].lower().find(answer.lower())
+        if offset < 0:
+            return False
+        self.answer_start = self.start + offset
+        self.answer_end = self.answer_start + len(answer)
+        return True
+
+def _words(text: str) -> set:
+    return set(_WORD_PATTERN.findall(text.lower()))
+
+def attribute(result: Dict[str, Any], records: Sequence[ChunkRecord], min_support: float = 0.2) -> List[ChunkRecord]:
+    """The context chunks that back a result's answers, best supported first.
+
+    Uses no model: a chunk backs the answer when its page span contains the extractive
+    answer (which then gets source offsets) or when it holds at least ``min_support``
+    of the abstractive answer's words. The extractive answer is a span of the
+    summarized context, so it has no source offsets when summarization reworded it.
+    """
+    extractive = (result.get("extractive_answer") or "").strip()
+    answer_words = _words(result.get("abstractive_answer") or "") or _words(extractive)
+    backing = []
+    for record in records:
+        record.support = len(answer_words & _words(record.text)) / len(answer_words) if answer_words else 0.0
+        if record.locate(extractive) or record.support >= min_support:
+            backing.append(record)
+    backing.sort(key=lambda record: (record.answer_start is not None, record.support), reverse=True)
+    return backing
+
+def pack_provenance(records: Sequence[ChunkRecord], sources: List[str]) -> List[List[Any]]:
+    return [record.pack(sources) for record in records]
+
+def expand_provenance(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The packed ``provenance`` rows of a (possibly cached) result as dicts with URLs.
+
+    ``answer_start``/``answer_end`` are None for chunks that back the answer only by
+    word overlap, including every chunk when the extractive answer was reworded by
+    summarization and does not occur in any source page.
+    """
+    sources = result.get("sources") or []
+    expanded = []
+    for row in result.get("provenance") or []:
+        if len(row) != len(PROVENANCE_FIELDS):
+            continue  # Cached in an older layout
+        entry = dict(zip(PROVENANCE_FIELDS, row))
+        index = entry.pop("source")
+        entry["url"] = sources[index] if index < len(sources) else None
+        expanded.append(entry)
+    return expanded
@@ -0,0 +1,106 @@
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from .tracing import current_span
+
+logger = logging.getLogger("rich")
+
+RANKING_MODES = ("dense", "hybrid")
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents, built in one pass as an inverted index."""
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)  # term -> [(document, tf)]
+        lengths = []
+        for index, document in enumerate(documents):
+            counts = Counter(tokenize(document))
+            lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                self.postings[term].append((index, frequency))
+        self.size = len(lengths)
+        self.lengths = np.array(lengths, dtype=np.float32)
+        self.average_length = float(self.lengths.mean()) if self.size else 0.0
+
+    def idf(self, term: str) -> float:
+        frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (self.size - frequency + 0.5) / (frequency + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query (0 for documents sharing no term)."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        if not self.size:
+            return scores
+        normalizer = self.k1 * (1 - self.b + self.b * self.lengths / max(self.average_length, 1e-9))
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            documents, frequencies = map(np.array, zip(*postings))
+            scores[documents] += self.idf(term) * frequencies * (self.k1 + 1) / (frequencies + normalizer[documents])
+        return scores
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> Dict[int, float]:
+    """Fused score per item: the sum over rankings of 1 / (k + rank), ranks starting at 1."""
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item] += 1.0 / (k + rank)
+    return fused
+
+class HybridRanker:
+    """Ranks candidate chunks for a query by dense similarity alone or fused with BM25.
+
+    In ``hybrid`` mode a BM25 index over the candidates is built first and its ranking
+    is fused with the dense one by reciprocal rank fusion. With ``prefilter_k`` set,
+    only the BM25 top-k (topped up in original order when fewer share a query term)
+    are embedded, so large pages cost the encoder at most k rows.
+    Dense scores are cosine similarities (the embedding service returns unit vectors).
+    ``rank`` returns ``(index, similarity)`` pairs, best first, with the dense cosine
+    score of each so callers can still threshold on similarity; chunks dropped by the
+    pre-filter are not returned.
+    """
+
+    def __init__(self, embeddings, mode: str = "hybrid", rrf_k: int = 60, prefilter_k: int = 0) -> None:
+        if mode not in RANKING_MODES:
+            raise ValueError(f"ranking mode must be one of {RANKING_MODES}")
+        self.embeddings = embeddings
+        self.mode = mode
+        self.rrf_k = rrf_k
+        self.prefilter_k = prefilter_k
+
+    def _dense(self, query: str, chunks: Sequence[str], candidates: Sequence[int]) -> np.ndarray:
+        matrix = self.embeddings.encode([query, *(chunks[index] for index in candidates)])
+        return matrix[1:] @ matrix[0]
+
+    def rank(self, query: str, chunks: Sequence[str]) -> List[Tuple[int, float]]:
+        if not chunks:
+            return []
+        candidates = list(range(len(chunks)))
+        if self.mode == "dense":
+            similarities = self._dense(query, chunks, candidates)
+            order = np.argsort(-similarities, kind="stable")
+            return [(candidates[i], float(similarities[i])) for i in order]
+
+        bm25 = BM25Index(chunks).scores(query)
+        bm25_order = np.argsort(-bm25, kind="stable")
+        if self.prefilter_k and len(chunks) > self.prefilter_k:
+            candidates = sorted(bm25_order[:self.prefilter_k].tolist())
+        similarities = self._dense(query, chunks, candidates)
+        dense_ranking = [candidates[i] for i in np.argsort(-similarities, kind="stable")]
+        embedded = set(candidates)
+        lexical_ranking = [index for index in bm25_order.tolist() if bm25[index] > 0 and index in embedded]
+        fused = reciprocal_rank_fusion([dense_ranking, lexical_ranking], self.rrf_k)
+        similarity = dict(zip(candidates, similarities.tolist()))
+        current_span().set(candidates=len(chunks), embedded=len(candidates))
+        return [(index, similarity[index]) for index in sorted(candidates, key=lambda index: -fused[index])]
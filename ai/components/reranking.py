@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+from cachetools import LRUCache
+from .data_utility import Config
+from .model_manager import ModelManager, get_device
+from .lazy_loader import lazy_import
+from .tracing import current_span, span
+
+torch = lazy_import("torch")
+
+logger = logging.getLogger("rich")
+
+class CrossEncoderReranker:
+    """Scores (query, passage) pairs with an MS MARCO cross-encoder loaded through ModelManager.
+
+    Unscored pairs are encoded in padded batches (a single one for a re-ranking). Scores
+    are raw relevance logits (higher is more relevant) and cached per checkpoint, query
+    and passage. ``rerank`` only re-orders
+    the head of a ranking: at most ``rerank_top_n`` candidates, and fewer when the
+    measured per-pair cost says more would not fit in ``rerank_latency_budget``.
+    """
+
+    def __init__(self, config: Optional[Config] = None) -> None:
+        self.config = config or Config()
+        self.cache: LRUCache = LRUCache(maxsize=self.config.rerank_cache_size)
+        self._cache_lock = threading.Lock()
+        self._seconds_per_pair: Optional[float] = None  # Moving average of batch time per pair
+
+    def _batch(self, model_info: dict, query: str, passages: List[str]) -> List[float]:
+        tokenizer, model = model_info["tokenizer"], model_info["model"]
+        start = time.perf_counter()
+        inputs = tokenizer(
+            [query] * len(passages), passages, padding=True, truncation="only_second",
+            max_length=self.config.rerank_max_length, return_tensors="pt"
+        ).to(get_device())
+        with torch.no_grad():
+            logits = model(**inputs).logits
+        # Single-logit heads score relevance directly; two-class heads put it in the last column
+        scores = (logits[:, 0] if logits.shape[-1] == 1 else logits[:, -1]).float().cpu().tolist()
+        current_span().add(tokens_in=int(inputs["attention_mask"].sum()))
+
+        per_pair = (time.perf_counter() - start) / len(passages)
+        self._seconds_per_pair = per_pair if self._seconds_per_pair is None else 0.8 * self._seconds_per_pair + 0.2 * per_pair
+        return scores
+
+    def score(self, query: str, passages: Sequence[str], mode: Optional[str] = None, model_name: str = "cross-encoder") -> List[float]:
+        """Relevance of each passage to the query."""
+        model_path = ModelManager.resolve_model_path(model_name, mode or self.config.rerank_mode)
+        # Hits are copied out now: later inserts (ours or another caller's) may evict them
+        scores, missing = {}, []
+        with self._cache_lock:
+            for passage in dict.fromkeys(passages):
+                value = self.cache.get((model_path, query, passage))
+                if value is None:
+                    missing.append(passage)
+                else:
+                    scores[passage] = value
+        current_span().add(cache_hits=len(passages) - len(missing), cache_misses=len(missing))
+
+        if missing:
+            model_info = ModelManager.load_model(model_name, mode or self.config.rerank_mode)
+            batch_size = self.config.rerank_batch_size
+            for offset in range(0, len(missing), batch_size):
+                batch = missing[offset:offset + batch_size]
+                scores.update(zip(batch, self._batch(model_info, query, batch)))
+            with self._cache_lock:
+                for passage in missing:
+                    self.cache[(model_path, query, passage)] = scores[passage]
+
+        return [scores[passage] for passage in passages]
+
+    def budget(self, query: str, candidates: Sequence[str], mode: Optional[str] = None) -> int:
+        """How many of the candidates to re-rank under the top-N and latency budgets."""
+        count = min(len(candidates), self.config.rerank_top_n)
+        if self._seconds_per_pair:
+            model_path = ModelManager.resolve_model_path("cross-encoder", mode or self.config.rerank_mode)
+            with self._cache_lock:
+                head = candidates[:count]
+                uncached = [index for index, passage in enumerate(head) if (model_path, query, passage) not in self.cache]
+            affordable = int(self.config.rerank_latency_budget / self._seconds_per_pair)
+            if affordable < len(uncached):
+                # Cached pairs are free: stop at the first uncached candidate over the budget
+                count = uncached[affordable]
+        return count
+
+    def rerank(self, query: str, ranked: Sequence[str], mode: Optional[str] = None) -> List[Tuple[int, Optional[float]]]:
+        """Re-order the head of a ranking by cross-encoder score; the tail keeps its order.
+
+        Returns ``(index, score)`` pairs indexing ``ranked``; passages left out of the
+        budget score None.
+        """
+        with span("rerank", candidates=len(ranked)) as stage:
+            count = self.budget(query, ranked, mode)
+            if count < 2:
+                stage.set(reranked=0)
+                return [(index, None) for index in range(len(ranked))]
+            scores = self.score(query, ranked[:count], mode)
+            order = sorted(range(count), key=lambda index: -scores[index])
+            stage.set(reranked=count)
+            return [(index, scores[index]) for index in order] + [(index, None) for index in range(count, len(ranked))]
+
+@lru_cache(maxsize=None)
+def get_reranker() -> CrossEncoderReranker:
+    """Return the process-wide cross-encoder re-ranker."""
+    return CrossEncoderReranker()
@@ -1,7 +1,13 @@
-import torch
-from torch.nn.functional import softmax
+import asyncio
+import hashlib
 import logging
-from .model_manager import ModelManager
+import re
+import threading
+from typing import List, Sequence, Tuple
+from cachetools import LRUCache
+from .data_utility import Config
+from .model_manager import ModelManager, get_device
+from .lazy_loader import lazy_import
 from rich.traceback import install as install_rich_traceback
 from rich.logging import RichHandler
 from rich.console import Console
@@ -17,13 +23,34 @@ logger = logging.getLogger("rich")
 
 console = Console()
 
+torch = lazy_import("torch")
+
+# Short queries made only of these characters and none of the trigger words skip the model
+_BENIGN_TEXT = re.compile(r"^[\w\s.,?!'\-]+$")
+_INJECTION_TRIGGERS = re.compile(
+    r"\b(ignore|disregard|forget|override|bypass|pretend|jailbreak|instruction|instructions|prompt|system|"
+    r"role|roleplay|act|persona|dan|developer|mode|unfiltered|uncensored|rules|previous|above)\b",
+    re.IGNORECASE
+)
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.lower().split())
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
 class SafetyChecker:
-    def __init__(self, mode="power", temperature=1.0):
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    def __init__(self, mode="power", temperature=1.0, config=None):
         self.mode = mode
         self.temperature = temperature
         self.model = None
         self.tokenizer = None
+        self.config = config or Config()
+
+        # Scores keyed by normalized prompt hash; the verdict is derived per call from the thresholds
+        self.cache = LRUCache(maxsize=self.config.safety_cache_size)
+        self._cache_lock = threading.Lock()
+        self.stats = {"prefiltered": 0, "cache_hits": 0, "model_checks": 0}
 
     async def initialize(self):
         logger.info(f"Initializing Prompt-Guard model using ModelManager")
@@ -36,42 +63,124 @@ class SafetyChecker:
             logger.error(f"Failed to initialize Prompt-Guard model: {str(e)}")
             raise
 
+    def is_obviously_benign(self, prompt: str) -> bool:
+        """Cheap lexical pre-filter for short, plain questions."""
+        words = prompt.split()
+        return (
+            0 < len(words) <= self.config.safety_prefilter_max_words
+            and _BENIGN_TEXT.match(prompt) is not None
+            and _INJECTION_TRIGGERS.search(prompt) is None
+        )
+
     def get_class_probabilities(self, text):
-        inputs = self.tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512).to(self.device)
+        inputs = self.tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512).to(get_device())
         with torch.no_grad():
             outputs = self.model(**inputs)
         logits = outputs.logits
         scaled_logits = logits / self.temperature
-        probabilities = softmax(scaled_logits, dim=-1)
+        probabilities = torch.softmax(scaled_logits, dim=-1)
         return probabilities
 
+    def get_safety_scores_batch(self, texts: Sequence[str]) -> List[Tuple[float, float]]:
+        """Score texts of any length, keeping the worst window of each text.
+
+        Long texts are split into overlapping windows of ``safety_window_tokens`` tokens,
+        all windows of all texts go through the model in ``safety_batch_size`` slices, and
+        the maximum score over each text's windows is returned.
+        """
+        encoding = self.tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=self.config.safety_window_tokens,
+            stride=self.config.safety_window_stride,
+            return_overflowing_tokens=True,
+            padding=True,
+            return_tensors="pt"
+        )
+        sample_mapping = encoding.pop("overflow_to_sample_mapping")
+        num_windows = sample_mapping.size(0)
+        logger.debug(f"Scoring {len(texts)} texts as {num_windows} safety windows")
+
+        jailbreak_scores = torch.zeros(len(texts))
+        indirect_scores = torch.zeros(len(texts))
+        batch_size = self.config.safety_batch_size
+        for i in range(0, num_windows, batch_size):
+            inputs = {key: value[i:i + batch_size].to(get_device()) for key, value in encoding.items()}
+            with torch.no_grad():
+                logits = self.model(**inputs).logits
+            probabilities = torch.softmax(logits.float() / self.temperature, dim=-1).cpu()
+            # Prompt-Guard classes are [BENIGN, INJECTION, JAILBREAK]: the jailbreak score is the
+            # JAILBREAK probability, and the indirect injection score is INJECTION + JAILBREAK
+            samples = sample_mapping[i:i + batch_size]
+            jailbreak_scores.scatter_reduce_(0, samples, probabilities[:, 2], reduce="amax")
+            indirect_scores.scatter_reduce_(0, samples, probabilities[:, 1] + probabilities[:, 2], reduce="amax")
+
+        return list(zip(jailbreak_scores.tolist(), indirect_scores.tolist()))
+
     def get_safety_scores(self, text):
-        probabilities = self.get_class_probabilities(text)
-        # Assuming the model outputs probabilities for [entailment, neutral, contradiction]
-        # We'll use the contradiction probability as the jailbreak score
-        # and the entailment probability as the indirect injection score
-        jailbreak_score = probabilities[0, 2].item()
-        indirect_score = probabilities[0, 0].item()
-        return jailbreak_score, indirect_score
+        return self.get_safety_scores_batch([text])[0]
 
-    async def check_safety(self, prompt, jailbreak_threshold=0.5, indirect_threshold=0.5):
-        if not self.model or not self.tokenizer:
-            await self.initialize()
+    async def check_many(self, prompts: Sequence[str], jailbreak_threshold=0.5, indirect_threshold=0.5, prefilter=True) -> List[Tuple[bool, float, float]]:
+        """Check several prompts at once: pre-filter, then cache, then one batched model pass."""
+        scores = [None] * len(prompts)
+        pending = {}  # prompt hash -> (prompt, indices)
 
-        logger.info(f"Checking safety for prompt: {prompt}")
-        try:
-            jailbreak_score, indirect_score = self.get_safety_scores(prompt)
-            
+        with self._cache_lock:
+            for i, prompt in enumerate(prompts):
+                if prefilter and self.is_obviously_benign(prompt):
+                    scores[i] = (0.0, 0.0)
+                    self.stats["prefiltered"] += 1
+                    continue
+                key = prompt_hash(prompt)
+                if key in self.cache:
+                    scores[i] = self.cache[key]
+                    self.stats["cache_hits"] += 1
+                    continue
+                pending.setdefault(key, (prompt, []))[1].append(i)
+
+        if pending:
+            if not self.model or not self.tokenizer:
+                await self.initialize()
+            try:
+                batch_scores = await asyncio.to_thread(self.get_safety_scores_batch, [prompt for prompt, _ in pending.values()])
+            except Exception as e:
+                logger.error(f"Error during safety check: {str(e)}")
+                batch_scores = [(1.0, 1.0)] * len(pending)
+                failed = True
+            else:
+                failed = False
+
+            with self._cache_lock:
+                self.stats["model_checks"] += len(pending)
+                for (key, (_, indices)), result in zip(pending.items(), batch_scores):
+                    if not failed and self.cache.maxsize:
+                        self.cache[key] = result
+                    for i in indices:
+                        scores[i] = result
+
+        results = []
+        for jailbreak_score, indirect_score in scores:
             is_safe = (jailbreak_score < jailbreak_threshold) and (indirect_score < indirect_threshold)
-            
-            logger.info(f"Safety check result: {'Safe' if is_safe else 'Unsafe'}")
-            logger.info(f"Jailbreak score: {jailbreak_score:.4f}")
-            logger.info(f"Indirect injection score: {indirect_score:.4f}")
-            
-            return is_safe, jailbreak_score, indirect_score
-        except Exception as e:
-            logger.error(f"Error during safety check: {str(e)}")
-            return False, 1.0, 1.0
+            results.append((is_safe, jailbreak_score, indirect_score))
+        return results
+
+    async def scan_texts(self, texts: Sequence[str], jailbreak_threshold=0.5, indirect_threshold=0.5) -> List[Tuple[bool, float, float]]:
+        """Scan untrusted text such as scraped pages for indirect prompt injection.
+
+        Unlike user prompts, the lexical pre-filter is skipped and every window of every
+        text is inspected.
+        """
+        return await self.check_many(texts, jailbreak_threshold, indirect_threshold, prefilter=False)
+
+    async def check_safety(self, prompt, jailbreak_threshold=0.5, indirect_threshold=0.5):
+        logger.info(f"Checking safety for prompt: {prompt}")
+        is_safe, jailbreak_score, indirect_score = (await self.check_many([prompt], jailbreak_threshold, indirect_threshold))[0]
+
+        logger.info(f"Safety check result: {'Safe' if is_safe else 'Unsafe'}")
+        logger.info(f"Jailbreak score: {jailbreak_score:.4f}")
+        logger.info(f"Indirect injection score: {indirect_score:.4f}")
+
+        return is_safe, jailbreak_score, indirect_score
 
     async def process_prompt(self, prompt, jailbreak_threshold=0.5, indirect_threshold=0.5):
         is_safe, jailbreak_score, indirect_score = await self.check_safety(prompt, jailbreak_threshold, indirect_threshold)
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional, Sequence
+from .data_utility import Config
+from .model_manager import ModelManager
+from .lazy_loader import lazy_import
+from .tracing import traced, current_span
+
+textblob = lazy_import("textblob")
+
+logger = logging.getLogger("rich")
+
+class SentimentBackend(ABC):
+    """Scores texts with a single sentiment value in [0, 1] (higher is more positive)."""
+
+    name = "base"
+
+    @abstractmethod
+    def score_many(self, texts: Sequence[str]) -> List[float]:
+        """Sentiment of each text."""
+
+    def preload(self) -> None:
+        """Load any model the backend needs (used by --warm)."""
+
+class TextBlobSentiment(SentimentBackend):
+    """Lexicon-based polarity from TextBlob; no model weights, microseconds per text."""
+
+    name = "textblob"
+
+    def score_many(self, texts: Sequence[str]) -> List[float]:
+        return [(textblob.TextBlob(text).sentiment.polarity + 1) / 2 for text in texts]
+
+    def preload(self) -> None:
+        textblob.TextBlob("warm up").sentiment
+
+class ClassifierSentiment(SentimentBackend):
+    """Transformer sentiment pipeline loaded through ModelManager, scored in batches."""
+
+    def __init__(self, model_name: str, batch_size: int) -> None:
+        self.name = model_name
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+    @property
+    def pipeline(self):
+        return ModelManager.load_model(self.model_name)
+
+    def score_many(self, texts: Sequence[str]) -> List[float]:
+        if not texts:
+            return []
+        outputs = self.pipeline(list(texts), batch_size=self.batch_size, truncation=True)
+        return [self._positive_probability(output) for output in outputs]
+
+    @staticmethod
+    def _positive_probability(output) -> float:
+        label = output['label'].upper()
+        if label in ("POSITIVE", "LABEL_1", "ENTAILMENT"):
+            return output['score']
+        if label in ("NEGATIVE", "LABEL_0", "CONTRADICTION"):
+            return 1 - output['score']
+        return output['score']
+
+    def preload(self) -> None:
+        self.pipeline
+
+SENTIMENT_BACKENDS = {
+    # Lexicon fast path (default)
+    "textblob": lambda config: TextBlobSentiment(),
+    # Distilled classifier (distilbert-base-uncased-finetuned-sst-2-english)
+    "distilbert": lambda config: ClassifierSentiment("sentiment-analysis", config.sentiment_batch_size),
+    # Previous power-mode model, kept for comparison benchmarks
+    "bart-mnli": lambda config: ClassifierSentiment("sentiment-mnli", config.sentiment_batch_size),
+}
+
+@lru_cache(maxsize=None)
+def get_sentiment_backend(name: Optional[str] = None) -> SentimentBackend:
+    config = Config()
+    name = name or config.sentiment_backend
+    if name not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend '{name}'. Choose from {list(SENTIMENT_BACKENDS)}")
+    logger.info(f"Using sentiment backend: {name}")
+    return SENTIMENT_BACKENDS[name](config)
+
+@traced("sentiment")
+async def score_sentiments(texts: Sequence[str], backend: Optional[str] = None) -> List[float]:
+    """Score many answers in one batch without blocking the event loop."""
+    current_span().set(backend=backend or Config().sentiment_backend, texts=len(texts))
+    return await asyncio.to_thread(get_sentiment_backend(backend).score_many, texts)
+
+async def score_sentiment(text: str, backend: Optional[str] = None) -> float:
+    return (await score_sentiments([text], backend))[0]
@@ -0,0 +1,264 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import psutil
+from .data_utility import Config
+
+logger = logging.getLogger("rich")
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+# Numeric span attributes that also feed a Prometheus counter: attribute -> (metric, extra labels)
+COUNTED_ATTRIBUTES = {
+    "tokens_in": ("ai_tokens_total", {"direction": "in"}),
+    "tokens_out": ("ai_tokens_total", {"direction": "out"}),
+    "bytes": ("ai_fetched_bytes_total", {}),
+    "cache_hits": ("ai_cache_requests_total", {"result": "hit"}),
+    "cache_misses": ("ai_cache_requests_total", {"result": "miss"}),
+}
+
+METRIC_HELP = {
+    "ai_stage_duration_seconds": ("histogram", "Duration of answering pipeline stages"),
+    "ai_tokens_total": ("counter", "Model tokens consumed (in) and produced (out) per stage"),
+    "ai_fetched_bytes_total": ("counter", "Bytes fetched from the network per stage"),
+    "ai_cache_requests_total": ("counter", "Cache lookups per stage, by hit or miss"),
+    "ai_model_loads_total": ("counter", "Models loaded, by model and mode"),
+    "ai_stage_errors_total": ("counter", "Stages that raised an exception"),
+    "ai_memory_actions_total": ("counter", "Memory governor decisions, by action"),
+    "ai_memory_ceiling_bytes": ("gauge", "RSS ceiling enforced by the memory governor"),
+    "ai_memory_pressure_level": ("gauge", "Memory governor level: 0 normal, 1 pressure, 2 critical"),
+    "ai_models_loaded": ("gauge", "Models held by ModelManager"),
+    "ai_retrieval_decisions_total": ("counter", "Adaptive retrieval plans, by how they were chosen"),
+    "ai_dedup_chunks_total": ("counter", "Scraped chunks kept or dropped as near-duplicates"),
+}
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    """One timed stage with free-form attributes (model, mode, tokens, cache hits, bytes...)."""
+
+    __slots__ = ("name", "start", "end", "attributes", "span_id", "parent_id", "track")
+
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], track: str, attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.track = track
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, **amounts: float) -> None:
+        """Accumulate numeric attributes, e.g. tokens over several batches."""
+        for key, amount in amounts.items():
+            self.attributes[key] = self.attributes.get(key, 0) + amount
+
+class _NoSpan:
+    """Stand-in returned by current_span() outside any span, so callers never branch."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def add(self, **amounts: float) -> None:
+        pass
+
+_NO_SPAN = _NoSpan()
+
+def _track() -> str:
+    # Concurrent tasks on the event loop each get their own track in the Chrome trace
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return task.get_name()
+    return threading.current_thread().name
+
+class Tracer:
+    """Collects spans for a Chrome trace and aggregates them into Prometheus metrics.
+
+    Stage durations feed the ``ai_stage_duration_seconds`` histogram; the numeric
+    attributes in ``COUNTED_ATTRIBUTES`` feed counters labelled with the stage.
+    Finished spans are kept (up to ``trace_max_spans``) for ``write_chrome_trace``.
+    """
+
+    def __init__(self, config: Optional[Config] = None) -> None:
+        config = config or Config()
+        self.trace_file: Optional[str] = config.trace_file
+        self.spans: deque = deque(maxlen=config.trace_max_spans)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._epoch = time.perf_counter()
+        self._bucket_counts: Dict[str, List[int]] = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self._duration_sums: Dict[str, float] = defaultdict(float)
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+        self._gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._process = psutil.Process()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        span = Span(name, span_id, parent.span_id if parent else None, _track(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            self._record(span)
+
+    def count(self, metric: str, amount: float = 1, **labels: str) -> None:
+        key = (metric, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self._lock:
+            self._counters[key] += amount
+
+    def gauge(self, metric: str, value: float, **labels: str) -> None:
+        key = (metric, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def _record(self, span: Span) -> None:
+        duration = span.duration
+        with self._lock:
+            self.spans.append(span)
+            buckets = self._bucket_counts[span.name]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+            self._duration_sums[span.name] += duration
+        for attribute, (metric, labels) in COUNTED_ATTRIBUTES.items():
+            value = span.attributes.get(attribute)
+            if isinstance(value, (int, float)) and value:
+                self.count(metric, value, stage=span.name, **labels)
+        if "error" in span.attributes:
+            self.count("ai_stage_errors_total", stage=span.name)
+
+    def render_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            bucket_counts = {stage: list(counts) for stage, counts in self._bucket_counts.items()}
+            duration_sums = dict(self._duration_sums)
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        metric, (kind, help_text) = "ai_stage_duration_seconds", METRIC_HELP["ai_stage_duration_seconds"]
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for stage in sorted(bucket_counts):
+            for bound, count in zip(DURATION_BUCKETS, bucket_counts[stage]):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {duration_sums[stage]:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {bucket_counts[stage][-1]}')
+
+        for samples_by_key, default_kind in ((counters, "counter"), (gauges, "gauge")):
+            by_metric: Dict[str, List[str]] = defaultdict(list)
+            for (name, labels), value in sorted(samples_by_key.items()):
+                rendered = ",".join(f'{label}="{label_value}"' for label, label_value in labels)
+                sample = f"{name}{{{rendered}}}" if rendered else name
+                by_metric[name].append(f"{sample} {int(value) if float(value).is_integer() else value}")
+            for name, samples in by_metric.items():
+                kind, help_text = METRIC_HELP.get(name, (default_kind, name))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *samples]
+
+        process = self._process
+        memory = process.memory_info()
+        lines += [
+            "# HELP ai_process_resident_memory_bytes Resident set size of the answering process",
+            "# TYPE ai_process_resident_memory_bytes gauge",
+            f"ai_process_resident_memory_bytes {memory.rss}",
+            "# HELP ai_process_cpu_percent CPU use of the answering process since the last scrape",
+            "# TYPE ai_process_cpu_percent gauge",
+            f"ai_process_cpu_percent {process.cpu_percent(interval=None)}",
+            "# HELP ai_process_threads Threads of the answering process",
+            "# TYPE ai_process_threads gauge",
+            f"ai_process_threads {process.num_threads()}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Finished spans as Chrome trace events (load in chrome://tracing or Perfetto)."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        tracks: Dict[str, int] = {}
+        events = []
+        for span in spans:
+            tid = tracks.setdefault(span.track, len(tracks) + 1)
+            events.append({
+                "name": span.name,
+                "cat": "pipeline",
+                "ph": "X",
+                "ts": (span.start - self._epoch) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": {**span.attributes, "span_id": span.span_id, "parent_id": span.parent_id},
+            })
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": track}}
+            for track, tid in tracks.items()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Optional[str] = None) -> Optional[str]:
+        path = path or self.trace_file
+        if not path:
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        logger.info(f"Wrote {len(self.spans)} spans to {path}")
+        return path
+
+@lru_cache(maxsize=None)
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    return Tracer()
+
+def span(name: str, **attributes: Any):
+    """Context manager timing a stage on the process-wide tracer."""
+    return get_tracer().span(name, **attributes)
+
+def traced(name: str, **attributes: Any) -> Callable:
+    """Decorator form of ``span``; the tracer is looked up on each call, not at import."""
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_span():
+    """The innermost active span, or a no-op stand-in outside any span."""
+    return _current_span.get() or _NO_SPAN
@@ -14,12 +14,13 @@ from rich.prompt import Prompt
 from rich.theme import Theme
 from functools import lru_cache
 from io import StringIO
-import psutil
 import hashlib
 import logging  # Add this import for logging
 import traceback  # Add this import for handling stack traces
 from rich.logging import RichHandler
 from rich.traceback import install as install_rich_traceback
+from .event_log import get_event_log, get_result_log
+from .provenance import expand_provenance
 
 install_rich_traceback(show_locals=True)
 
@@ -53,57 +54,68 @@ async def check_internet_connection(host="8.8.8.8", port=53, timeout=3) -> bool:
     except OSError:
         return False
 
-async def cache_result(query: str, result: Dict):
-    """Cache the result for a given query."""
-    cache_file = "query_cache.json"
+# Whole-file cache written by earlier versions; still read, never rewritten
+LEGACY_CACHE_FILE = "query_cache.json"
+
+# Query -> {'hash', 'result'}, loaded once from the result log and kept current in memory
+_cache_index: Optional[Dict[str, Dict]] = None
+_cache_lock = asyncio.Lock()
+
+async def _read_legacy_cache() -> Dict:
     try:
-        async with aiofiles.open(cache_file, mode='r') as f:
+        async with aiofiles.open(LEGACY_CACHE_FILE, mode='r') as f:
             contents = await f.read()
-            cache = json.loads(contents) if contents else {}
+            return json.loads(contents) if contents else {}
     except FileNotFoundError:
-        cache = {}
+        return {}
 
-    # Convert the result dict to a JSON string
-    result_str = json.dumps(result, sort_keys=True)
-    
-    # Create a hash of the result string
-    result_hash = hashlib.md5(result_str.encode()).hexdigest()
+async def _load_cache_index() -> Dict[str, Dict]:
+    global _cache_index
+    async with _cache_lock:
+        if _cache_index is None:
+            index = await _read_legacy_cache()
+            for entry in await get_result_log().query("result"):
+                index[entry['query']] = {'hash': entry['hash'], 'result': entry['result']}
+            _cache_index = index
+    return _cache_index
 
-    # Store the hash and the result separately
-    cache[query] = {
-        'hash': result_hash,
-        'result': result
-    }
+async def cache_result(query: str, result: Dict):
+    """Cache the result for a given query."""
+    await cache_results({query: result})
+
+async def cache_results(results: Dict[str, Dict]):
+    """Cache several results by appending them to the result log."""
+    cache = await _load_cache_index()
+    result_log = get_result_log()
+
+    for query, result in results.items():
+        # Convert the result dict to a JSON string
+        result_str = json.dumps(result, sort_keys=True, default=str)
+        
+        # Create a hash of the result string
+        result_hash = hashlib.md5(result_str.encode()).hexdigest()
 
-    async with aiofiles.open(cache_file, mode='w') as f:
-        await f.write(json.dumps(cache, indent=2))
+        # Store the hash and the result separately
+        cache[query] = {
+            'hash': result_hash,
+            'result': result
+        }
+        result_log.record("result", query=query, hash=result_hash, result=result)
+
+async def get_cached_results() -> Dict[str, Dict]:
+    """Load every cached result at once, keyed by query."""
+    return {query: entry['result'] for query, entry in (await _load_cache_index()).items()}
 
 async def get_cached_result(query: str) -> Optional[Dict]:
     """Retrieve a cached result for a given query."""
-    cache_file = "query_cache.json"
-    try:
-        async with aiofiles.open(cache_file, mode='r') as f:
-            cache = json.loads(await f.read())
-            if query in cache:
-                return cache[query]['result']
-    except FileNotFoundError:
-        return None
+    cache = await _load_cache_index()
+    if query in cache:
+        return cache[query]['result']
     return None
 
-async def log_user_feedback(query: str, feedback: str):
+async def log_user_feedback(query: str, feedback: str, helpful: Optional[bool] = None):
     """Log user feedback for a given query."""
-    feedback_file = "user_feedback.json"
-    try:
-        async with aiofiles.open(feedback_file, mode='r+') as f:
-            contents = await f.read()
-            feedback_log = json.loads(contents) if contents else {}
-    except FileNotFoundError:
-        feedback_log = {}
-
-    feedback_log[query] = feedback
-
-    async with aiofiles.open(feedback_file, mode='w') as f:
-        await f.write(json.dumps(feedback_log, indent=2))
+    get_event_log().record("feedback", query=query, helpful=helpful, feedback=feedback)
 
 def format_processing_time(seconds: float) -> str:
     """Format processing time in a human-readable format."""
@@ -115,19 +127,42 @@ def format_processing_time(seconds: float) -> str:
         minutes, seconds = divmod(seconds, 60)
         return f"{int(minutes)} minutes and {seconds:.2f} seconds"
 
-async def get_query_history() -> List[str]:
-    """Retrieve the query history from a file."""
-    history_file = "query_history.json"
-    try:
-        async with aiofiles.open(history_file, mode='r') as f:
-            history = json.loads(await f.read())
-            return history
-    except FileNotFoundError:
-        return []
+async def get_query_history(limit: Optional[int] = None) -> List[str]:
+    """Retrieve past queries from the event log, oldest first."""
+    return [event['query'] for event in await get_event_log().query("query", limit=limit)]
+
+PENDING = "[italic]pending...[/italic]"
+
+def _format_score(value, suffix: str = "") -> str:
+    return f"{value:.2f}{suffix}" if isinstance(value, (int, float)) else str(value)
+
+def _print_summary(summary, console: Console):
+    console.print(Panel(f"[bold green]Summary:[/bold green]\n{summary}", expand=False))
+
+def _print_scores(result: Dict, console: Console, placeholder: str = 'N/A', fields=("sentiment_score", "confidence_score")):
+    scores_table = Table(title="Scores", show_header=True, header_style="bold magenta")
+    scores_table.add_column("Metric", style="cyan")
+    scores_table.add_column("Score", style="green")
+    if "sentiment_score" in fields:
+        scores_table.add_row("Sentiment Score", _format_score(result.get('sentiment_score', placeholder)))
+    if "confidence_score" in fields:
+        scores_table.add_row("Confidence Score", _format_score(result.get('confidence_score', placeholder), "%"))
+    console.print(scores_table)
+
+def _print_follow_up_questions(questions: List[str], console: Console):
+    follow_up_table = Table(title="Follow-up Questions", show_header=True, header_style="bold magenta")
+    follow_up_table.add_column("No.", style="cyan", justify="right")
+    follow_up_table.add_column("Question", style="green")
+    for i, question in enumerate(questions, 1):
+        follow_up_table.add_row(str(i), question)
+    console.print(follow_up_table)
 
 def print_result(result: Dict, query: str, console: Console):
     console.print("\n")  # Add some spacing before the output
     
+    # Enrichment fields still being computed in the background are shown as pending
+    placeholder = PENDING if result.get('pending') else 'N/A'
+    
     console.print(Panel(f"[bold cyan]Query:[/bold cyan] {query}", expand=False))
     
     console.print(Panel(f"[bold green]Context Summary:[/bold green]\n{result.get('context_summary', 'N/A')}", expand=False))
@@ -136,22 +171,12 @@ def print_result(result: Dict, query: str, console: Console):
     
     console.print(Panel(f"[bold green]Abstractive Answer:[/bold green]\n{result.get('abstractive_answer', 'N/A')}", expand=False))
     
-    console.print(Panel(f"[bold green]Summary:[/bold green]\n{result.get('summary', 'N/A')}", expand=False))
+    _print_summary(result.get('summary', placeholder), console)
     
-    scores_table = Table(title="Scores", show_header=True, header_style="bold magenta")
-    scores_table.add_column("Metric", style="cyan")
-    scores_table.add_column("Score", style="green")
-    scores_table.add_row("Sentiment Score", f"{result.get('sentiment_score', 'N/A'):.2f}")
-    scores_table.add_row("Confidence Score", f"{result.get('confidence_score', 'N/A'):.2f}%")
-    console.print(scores_table)
+    _print_scores(result, console, placeholder)
     
     if result.get('follow_up_questions'):
-        follow_up_table = Table(title="Follow-up Questions", show_header=True, header_style="bold magenta")
-        follow_up_table.add_column("No.", style="cyan", justify="right")
-        follow_up_table.add_column("Question", style="green")
-        for i, question in enumerate(result['follow_up_questions'], 1):
-            follow_up_table.add_row(str(i), question)
-        console.print(follow_up_table)
+        _print_follow_up_questions(result['follow_up_questions'], console)
     
     if result.get('sources'):
         sources_table = Table(title="Sources", show_header=True, header_style="bold magenta")
@@ -160,18 +185,36 @@ def print_result(result: Dict, query: str, console: Console):
             sources_table.add_row(source)
         console.print(sources_table)
     
+    if result.get('provenance'):
+        provenance_table = Table(title="Answer backed by", show_header=True, header_style="bold magenta")
+        provenance_table.add_column("Source", style="cyan")
+        provenance_table.add_column("Characters")
+        provenance_table.add_column("Answer at")
+        provenance_table.add_column("Similarity")
+        provenance_table.add_column("Support")
+        for entry in expand_provenance(result):
+            # No answer offsets: the chunk backs the answer by word overlap only
+            answer_at = f"{entry['answer_start']}-{entry['answer_end']}" if entry['answer_start'] is not None else "-"
+            provenance_table.add_row(entry['url'] or "?", f"{entry['start']}-{entry['end']}", answer_at, _format_score(entry['similarity'] if entry['similarity'] is not None else "-"), _format_score(entry['support']))
+        console.print(provenance_table)
+    
     if 'processing_time' in result:
         console.print(f"[bold blue]Processing Time:[/bold blue] {format_processing_time(result['processing_time'])}")
     
     console.print("\n")  # Add some spacing after the output
 
+def print_enrichment_update(result: Dict, field: str, console: Console):
+    """Print a single enrichment field once its background task has delivered it."""
+    if field == "summary":
+        _print_summary(result[field], console)
+    elif field in ("sentiment_score", "confidence_score"):
+        _print_scores(result, console, fields=(field,))
+    elif field == "follow_up_questions" and result[field]:
+        _print_follow_up_questions(result[field], console)
+
 async def add_to_query_history(query: str):
-    """Add a query to the query history file."""
-    history_file = "query_history.json"
-    history = await get_query_history()
-    history.append(query)
-    async with aiofiles.open(history_file, mode='w') as f:
-        await f.write(json.dumps(history))
+    """Add a query to the query history."""
+    get_event_log().record("query", query=query)
 
 def get_user_preferences():
     """Get user preferences for CLI customization."""
@@ -214,30 +257,6 @@ def apply_user_preferences(preferences: Dict):
     console.print(f"[{font_sizes[preferences['font_size']]}]Applied language: {preferences['language']}")
 
 
-async def performance_monitor():
-    """Monitor system performance and provide real-time updates."""
-    console = Console()
-    
-    while True:
-        # Get CPU usage as a percentage
-        cpu_usage = psutil.cpu_percent(interval=1)
-        
-        # Get memory usage
-        memory = psutil.virtual_memory()
-        memory_usage = memory.used / (1024 * 1024)  # Convert to MB
-        
-        # Get disk usage
-        disk = psutil.disk_usage('/')
-        disk_usage = disk.percent
-        
-        # Print the metrics
-        console.print(f"CPU Usage: {cpu_usage:.1f}%")
-        console.print(f"Memory Usage: {memory_usage:.0f} MB / {memory.total / (1024 * 1024):.0f} MB ({memory.percent:.1f}%)")
-        console.print(f"Disk Usage: {disk_usage:.1f}%")
-        console.print("---")
-        
-        await asyncio.sleep(5)  # Update every 5 seconds
-
 def log_error(message: str, error: Exception):
     """
     Log an error message along with the full stack trace.
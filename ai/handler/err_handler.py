@@ -8,6 +8,7 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.logging import RichHandler
 from rich.traceback import install as install_rich_traceback 
+from components.memory import get_memory_governor
 
 install_rich_traceback(show_locals=True)
 
@@ -38,7 +39,11 @@ def handle_errors(func):
         except MemoryError as e:
             logger.error("MemoryError: System ran out of memory", exc_info=True)
             memory_info = psutil.virtual_memory()
+            # Nothing is running any more, so every model ModelManager holds can go
+            evicted = get_memory_governor().relieve(idle_seconds=0)
             console.print(Panel(f"[bold red]Error: System ran out of memory. Available: {memory_info.available / (1024 ** 3):.2f} GB[/bold red]", style="red"))
+            if evicted:
+                console.print(f"[italic]Released {len(evicted)} loaded model(s).[/italic]")
             console.print("[bold yellow]Tip:[/bold yellow] Consider reducing the data load or increasing system memory.")
         except asyncio.CancelledError:
             logger.warning("Async task was cancelled")
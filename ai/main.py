@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import logging
 import os
@@ -11,18 +12,15 @@ from rich.table import Table
 from rich.traceback import install as install_rich_traceback
 from rich.progress import Progress
 from rich.logging import RichHandler
-from components.model_manager import ModelManager
-from components.data_processing import DataProcessor
-from components.enhanced_answer import enhanced_answer_generation
+from components.answering import AnsweringEngine, PIPELINES
 from components.fallback_answer import fallback_pipeline
-from components.combined_answer import combined_answer_generation
-from components.offline_answer import offline_mode
+from components.enrichment import complete_enrichment
+from components.tracing import get_tracer
 from components.utils import (
-    print_result, cache_result, get_cached_result, check_internet_connection,
+    print_result, print_enrichment_update, cache_result, get_cached_result, check_internet_connection,
     format_processing_time, get_user_preferences, apply_user_preferences,
-    log_error
+    log_error, log_user_feedback, get_query_history
 )
-from components.safety import SafetyChecker
 from handler.err_handler import handle_errors
 
 # Load environment variables
@@ -42,7 +40,7 @@ logger = logging.getLogger("rich")
 console = Console()
 
 @handle_errors
-async def main():
+async def main(warm: bool = False):
     api_key = os.getenv('GOOGLE_API_KEY')
     cx = os.getenv('GOOGLE_CX')
     
@@ -78,17 +76,16 @@ async def main():
     
     logger.info(f"Starting Enhanced ML Answering System with choice: {choice} and mode: {mode}")
     
-    # Initialize SafetyChecker
-    safety_checker = SafetyChecker(mode=mode)
-    await safety_checker.initialize()
+    # The engine owns the SafetyChecker and DataProcessor (Prompt-Guard loads on the first check unless warming up)
+    engine = AnsweringEngine(mode=mode, internet_connected=internet_connected)
     
-    # Initialize DataProcessor
-    data_processor = DataProcessor()
-    
-    history = []
+    # Models load on first use unless --warm asks for everything up front
+    if warm:
+        with console.status("[bold blue]Preloading models...[/bold blue]"):
+            await engine.warm([choice])
     
     try:
-        async with data_processor:
+        async with engine:
             while True:
                 user_query = Prompt.ask("\nEnter your question (type 'quit' to exit, 'history' to view past queries)", default="quit")
                 
@@ -96,6 +93,7 @@ async def main():
                     console.print("[bold green]Thank you for using the Enhanced ML Answering System![/bold green]")
                     break
                 elif user_query.lower() == 'history':
+                    history = await get_query_history(limit=20)
                     if history:
                         history_table = Table(title="Query History")
                         history_table.add_column("No.", style="cyan", no_wrap=True)
@@ -113,7 +111,7 @@ async def main():
                     logger.info(f"Processing query: {user_query}")
                     
                     # Check safety of the query
-                    processed_query, is_safe, jailbreak_score, indirect_score = await safety_checker.process_prompt(user_query)
+                    processed_query, is_safe, jailbreak_score, indirect_score = await engine.check_safety(user_query)
                     
                     if not is_safe:
                         console.print("[bold red]Warning:[/bold red] The query was flagged as potentially unsafe.")
@@ -128,20 +126,27 @@ async def main():
                         use_cache = Prompt.ask("Cached result found. Do you want to use it?", choices=["y", "n"], default="y")
                         if use_cache == 'y':
                             print_result(cached_result, processed_query, console)
+                            engine.log_query(processed_query, cached_result, cache="hit", processing_time=time.time() - start_time)
                             continue
                     
+                    # Under memory pressure the governor downgrades power requests
+                    request_mode = engine.admit(mode)
+                    
                     with Progress() as progress:
                         task = progress.add_task("[cyan]Processing query...", total=100)
                         
+                        decision, records = None, []
                         if choice in ["1", "2"] and internet_connected:
                             try:
                                 progress.update(task, advance=30, description="[cyan]Fetching results...")
-                                raw_context, processed_context, sources = await data_processor.fetch_and_process_results(processed_query, api_key, cx)
+                                decision = engine.plan_retrieval(processed_query)
+                                raw_context, processed_context, sources = await engine.fetch_context(processed_query, decision, records)
                                 logger.info(f"Fetched and processed results. Number of sources: {len(sources)}")
                             except Exception as fetch_error:
                                 log_error("Error fetching and processing results", fetch_error)
                                 console.print("[bold yellow]Warning:[/bold yellow] Failed to fetch online results. Falling back to offline mode.")
                                 raw_context, processed_context, sources = "", "", []
+                                decision, records = None, []
                                 choice = "4"  # Switch to offline mode
                         else:
                             raw_context, processed_context, sources = "", "", []
@@ -149,22 +154,12 @@ async def main():
                         progress.update(task, advance=30, description="[cyan]Generating answer...")
                         
                         try:
-                            if choice == "1":
-                                result = await combined_answer_generation(processed_query, raw_context, processed_context, mode)
-                            elif choice == "2":
-                                result = await enhanced_answer_generation(processed_query, raw_context, processed_context, mode)
-                            elif choice == "3":
-                                result = await fallback_pipeline(processed_query, mode)
-                            elif choice == "4":
-                                result = await offline_mode(processed_query, mode)
-                            else:
-                                logger.warning(f"Invalid choice '{choice}'. Using default (combined pipeline).")
-                                result = await combined_answer_generation(processed_query, raw_context, processed_context, mode)
+                            result = await engine.run_pipeline(choice, processed_query, raw_context, processed_context, request_mode, enrichment="deferred")
                         except Exception as answer_error:
                             log_error(f"Error in answer generation (choice: {choice})", answer_error)
                             console.print("[bold yellow]Warning:[/bold yellow] Primary answer generation failed. Attempting fallback method.")
                             try:
-                                result = await fallback_pipeline(processed_query, mode)
+                                result = await fallback_pipeline(processed_query, request_mode, enrichment="deferred")
                             except Exception as fallback_error:
                                 log_error("Error in fallback pipeline", fallback_error)
                                 raise RuntimeError("Both primary and fallback answer generation methods failed.")
@@ -173,14 +168,23 @@ async def main():
                     
                     if 'sources' not in result:
                         result['sources'] = sources
+                    engine.attach_provenance(result, records)
                     
                     end_time = time.time()
                     processing_time = end_time - start_time
                     result['processing_time'] = processing_time
+                    if decision is not None:
+                        result['retrieval'] = decision.as_dict()
                     
                     logger.info("Answer generated successfully")
                     print_result(result, processed_query, console)
                     
+                    # Summary, scores and follow-up questions arrive after the answer is shown
+                    await complete_enrichment(result, on_update=lambda field, value: print_enrichment_update(result, field, console))
+                    result['enrichment_time'] = time.time() - end_time
+                    result['query'] = processed_query
+                    engine.observe(result)
+                    
                     # Cache the result
                     try:
                         await cache_result(processed_query, result)
@@ -189,16 +193,18 @@ async def main():
                         log_error("Error caching result", cache_error)
                         console.print("[bold yellow]Warning:[/bold yellow] Failed to cache the result.")
                     
-                    # Add query to history
-                    history.append(processed_query)
+                    # Record the query, its timings and cache outcome in the event log (also the history)
+                    engine.log_query(processed_query, {**result, "pipeline": PIPELINES[choice], "mode": request_mode}, cache="miss")
                     
                     # Ask for feedback
                     feedback = Prompt.ask("Was this answer helpful?", choices=["y", "n"], default="y")
+                    improvement = ""
                     if feedback == 'n':
                         console.print("[italic]We're sorry the answer wasn't helpful. Your feedback helps us improve.[/italic]")
                         improvement = Prompt.ask("How can we improve? (Enter your suggestion or press Enter to skip)")
                         if improvement:
                             logger.info(f"User feedback for query '{processed_query}': {improvement}")
+                    await log_user_feedback(processed_query, improvement, helpful=feedback == 'y')
                     
                 except Exception as e:
                     logger.error(f"An error occurred while processing the query: {str(e)}", exc_info=True)
@@ -214,4 +220,38 @@ async def main():
         console.print(f"Error details: {str(e)}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Enhanced ML Answering System")
+    parser.add_argument("--warm", action="store_true", help="Preload all models at startup instead of on first use")
+    parser.add_argument("--trace", metavar="FILE", help="Write a Chrome trace (chrome://tracing, Perfetto) of every pipeline stage to FILE on exit")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    serve_parser = subparsers.add_parser("serve", help="Run the headless JSON/HTTP server")
+    serve_parser.add_argument("--host", help="Interface to bind (default: AI_SERVER_HOST or 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, help="Port to listen on (default: AI_SERVER_PORT or 8080)")
+    serve_parser.add_argument("--mode", choices=["power", "performance"], default="power", help="Default mode for requests that do not set one")
+    serve_parser.add_argument("--lazy", action="store_true", help="Load models on first request instead of at startup")
+    
+    batch_parser = subparsers.add_parser("batch", help="Answer every question of a JSONL file")
+    batch_parser.add_argument("input", help="JSONL file with one question per line")
+    batch_parser.add_argument("output", help="JSONL file results are appended to (rerun to resume)")
+    batch_parser.add_argument("--pipeline", default="combined", help="Pipeline for questions that do not set one")
+    batch_parser.add_argument("--mode", choices=["power", "performance"], default="power", help="Mode for questions that do not set one")
+    batch_parser.add_argument("--concurrency", type=int, help="Questions answered at the same time (default: Config.batch_concurrency)")
+    batch_parser.add_argument("--lazy", action="store_true", help="Load models on first use instead of up front")
+    
+    args = parser.parse_args()
+    if args.trace:
+        os.environ["AI_TRACE_FILE"] = args.trace
+    if args.command == "serve":
+        # The server writes its trace on shutdown
+        from server import serve
+        serve(host=args.host, port=args.port, mode=args.mode, warm=not args.lazy)
+    else:
+        try:
+            if args.command == "batch":
+                from batch import run_batch
+                asyncio.run(run_batch(args.input, args.output, pipeline=args.pipeline, mode=args.mode, warm=not args.lazy, concurrency=args.concurrency))
+            else:
+                asyncio.run(main(warm=args.warm))
+        finally:
+            get_tracer().write_chrome_trace()
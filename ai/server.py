@@ -0,0 +1,159 @@
+"""Headless HTTP front end for the answering engine.
+
+Endpoints:
+    GET  /health         readiness, in-flight requests and loaded models
+    POST /answer         {"query": ..., "pipeline": "combined", "mode": "power"} -> full result
+    POST /answer/stream  same body; newline-delimited JSON events: the answer first,
+                         then one event per enrichment field, then "done"
+    GET  /metrics        Prometheus metrics: per-stage latency, tokens, cache hits,
+                         bytes fetched, model loads, process RSS/CPU and memory
+                         governor decisions
+
+Models are loaded once at startup and concurrent answers are bounded by
+``Config.server_max_concurrency``; requests beyond that wait their turn.
+"""
+import asyncio
+import json
+import logging
+import time
+from aiohttp import web
+from components.answering import AnsweringEngine, PIPELINES, MODES, resolve_pipeline
+from components.data_utility import Config
+from components.enrichment import complete_enrichment
+from components.memory import get_memory_governor
+from components.model_manager import global_models
+from components.tracing import get_tracer
+from components.utils import check_internet_connection
+
+logger = logging.getLogger("rich")
+
+ENGINE = web.AppKey("engine", AnsweringEngine)
+SEMAPHORE = web.AppKey("semaphore", asyncio.Semaphore)
+STATE = web.AppKey("state", dict)
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=str)
+
+def _public(result: dict) -> dict:
+    """Drop in-process objects (pending tasks) from a result before serializing it."""
+    return {key: value for key, value in result.items() if key != "pending"}
+
+async def _parse_request(request: web.Request) -> dict:
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text=_dumps({"error": "Body must be JSON"}), content_type="application/json")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text=_dumps({"error": "Body must be a JSON object"}), content_type="application/json")
+
+    query = str(body.get("query", "")).strip()
+    if not query:
+        raise web.HTTPBadRequest(text=_dumps({"error": "'query' is required"}), content_type="application/json")
+    try:
+        pipeline = resolve_pipeline(str(body.get("pipeline", "1")))
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=_dumps({"error": str(e)}), content_type="application/json")
+    mode = body.get("mode", request.app[ENGINE].mode)
+    if mode not in MODES:
+        raise web.HTTPBadRequest(text=_dumps({"error": f"mode must be one of {list(MODES)}"}), content_type="application/json")
+    return {"query": query, "pipeline": pipeline, "mode": mode, "use_cache": bool(body.get("use_cache", True))}
+
+async def health(request: web.Request) -> web.Response:
+    state = request.app[STATE]
+    return web.json_response({
+        "status": "ok" if state["ready"] else "starting",
+        "in_flight": state["in_flight"],
+        "served": state["served"],
+        "max_concurrency": request.app[ENGINE].config.server_max_concurrency,
+        "loaded_models": sorted(global_models),
+        "memory": get_memory_governor().status(),
+        "pipelines": list(PIPELINES.values()),
+    }, status=200 if state["ready"] else 503)
+
+async def metrics(request: web.Request) -> web.Response:
+    get_memory_governor().check()
+    response = web.Response(text=get_tracer().render_prometheus())
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    return response
+
+async def answer(request: web.Request) -> web.Response:
+    params = await _parse_request(request)
+    state = request.app[STATE]
+    async with request.app[SEMAPHORE]:
+        state["in_flight"] += 1
+        try:
+            result = await request.app[ENGINE].answer(enrichment="inline", **params)
+        finally:
+            state["in_flight"] -= 1
+            state["served"] += 1
+    status = 422 if result.get("flagged") else 200
+    return web.json_response(_public(result), status=status, dumps=_dumps)
+
+async def answer_stream(request: web.Request) -> web.StreamResponse:
+    params = await _parse_request(request)
+    engine, state = request.app[ENGINE], request.app[STATE]
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    async def send(event: str, **payload) -> None:
+        await response.write((_dumps({"event": event, **payload}) + "\n").encode())
+
+    async with request.app[SEMAPHORE]:
+        state["in_flight"] += 1
+        try:
+            result = await engine.answer(enrichment="deferred", **params)
+            await send("answer", result=_public(result))
+            if result.get("pending"):
+                start_time = time.time()
+                await complete_enrichment(result, on_update=lambda field, value: send("enrichment", field=field, value=value))
+                result["enrichment_time"] = time.time() - start_time
+                engine.observe(result)
+                if params["use_cache"]:
+                    await engine.cache(result["query"], result)
+            await send("done", enrichment_time=result.get("enrichment_time", 0.0))
+        except Exception as e:
+            logger.error(f"Error while streaming answer: {str(e)}", exc_info=True)
+            await send("error", error=str(e))
+        finally:
+            state["in_flight"] -= 1
+            state["served"] += 1
+
+    await response.write_eof()
+    return response
+
+async def _on_startup(app: web.Application) -> None:
+    engine = app[ENGINE]
+    engine.internet_connected = await check_internet_connection()
+    await engine.start()
+    if app[STATE]["warm"]:
+        logger.info("Preloading models before serving")
+        await engine.warm(engine.config.server_warm_pipelines)
+    app[STATE]["ready"] = True
+    logger.info("Answering server ready")
+
+async def _on_cleanup(app: web.Application) -> None:
+    await app[ENGINE].close()
+    get_tracer().write_chrome_trace()
+
+def create_app(mode: str = "power", warm: bool = True, config: Config = None) -> web.Application:
+    config = config or Config()
+    app = web.Application()
+    app[ENGINE] = AnsweringEngine(mode=mode, config=config)
+    app[SEMAPHORE] = asyncio.Semaphore(config.server_max_concurrency)
+    app[STATE] = {"ready": False, "warm": warm, "in_flight": 0, "served": 0}
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_post("/answer", answer)
+    app.router.add_post("/answer/stream", answer_stream)
+    app.on_startup.append(_on_startup)
+    app.on_cleanup.append(_on_cleanup)
+    return app
+
+def serve(host: str = None, port: int = None, mode: str = "power", warm: bool = True) -> None:
+    config = Config()
+    web.run_app(
+        create_app(mode=mode, warm=warm, config=config),
+        host=host or config.server_host,
+        port=port or config.server_port
+    )
@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+from components.adaptive import RetrievalController
+from components.data_utility import Config
+
+def controller(mode: str = "rules") -> RetrievalController:
+    config = Config()
+    config.adaptive_mode = mode
+    config.adaptive_epsilon = 0.0
+    return RetrievalController(config)
+
+def defaults(controller: RetrievalController) -> tuple:
+    config = controller.config
+    return config.default_num_results, config.default_chunk_size, config.default_max_summary_tokens
+
+def outcome(controller: RetrievalController, latency: float) -> dict:
+    num_results, chunk_size, max_summary_tokens = defaults(controller)
+    return {"num_results": num_results, "chunk_size": chunk_size, "max_summary_tokens": max_summary_tokens, "latency": latency}
+
+@mock.patch("components.adaptive.get_event_log")
+class RetrievalControllerTest(unittest.TestCase):
+    def test_low_percentage_confidence_widens_retrieval(self, _):
+        rules = controller()
+        rules.observe(outcome(rules, rules.config.adaptive_latency_budget / 4), 40.0)
+
+        decision = rules.plan("what is photosynthesis")
+        num_results, chunk_size, max_summary_tokens = defaults(rules)
+        self.assertIn("low_confidence", decision.reason.split("+"))
+        self.assertGreater(decision.num_results, num_results)
+        self.assertEqual(decision.chunk_size, chunk_size)
+        self.assertGreater(decision.max_summary_tokens, max_summary_tokens)
+
+    def test_high_percentage_confidence_is_on_target(self, _):
+        rules = controller()
+        rules.observe(outcome(rules, rules.config.adaptive_latency_budget / 4), 90.0)
+
+        decision = rules.plan("what is photosynthesis")
+        self.assertEqual(decision.reason, "on_target")
+        self.assertEqual(decision.arm, defaults(rules))
+
+    def test_latency_changes_reward(self, _):
+        bandit = controller("bandit")
+        budget = bandit.config.adaptive_latency_budget
+        fast = bandit.observe(outcome(bandit, 0.0), 60.0)
+        slow = bandit.observe(outcome(bandit, budget), 60.0)
+        self.assertAlmostEqual(fast, 0.6)
+        self.assertAlmostEqual(fast - slow, bandit.config.adaptive_latency_weight)
+        # A full latency budget costs more than the gap between 60% and 40% confidence
+        self.assertLess(slow, bandit.observe(outcome(bandit, 0.0), 40.0))
+
+if __name__ == "__main__":
+    unittest.main()
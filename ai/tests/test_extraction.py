@@ -0,0 +1,25 @@
+import unittest
+from components.extraction import etree, extract_text
+
+BACKENDS = ["html.parser"] + (["lxml"] if etree is not None else [])
+
+class ExtractTextTest(unittest.TestCase):
+    def test_empty_documents(self):
+        documents = [lambda: "", lambda: b"", lambda: iter([]), lambda: iter([""]), lambda: iter([b""]), lambda: "  \n", lambda: "<!-- -->"]
+        for backend in BACKENDS:
+            for document in documents:
+                with self.subTest(backend=backend, document=document()):
+                    self.assertEqual(extract_text(document(), backend=backend), "")
+
+    def test_streamed_bytes_match_whole_document(self):
+        page = "<html><body><nav><a href='/'>Home</a></nav><p>" + "Photosynthesis turns light into chemical energy. " * 4 + "</p></body></html>"
+        data = page.encode("utf-8")
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                whole = extract_text(page, backend=backend)
+                self.assertTrue(whole.startswith("Photosynthesis"))
+                self.assertNotIn("Home", whole)
+                self.assertEqual(extract_text((data[i:i + 7] for i in range(0, len(data), 7)), backend=backend), whole)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,6 @@
 import os
 import requests
 import re
-from bs4 import BeautifulSoup
 from transformers import GPT2Tokenizer, GPT2LMHeadModel, pipeline, AutoTokenizer, AutoModel
 from dotenv import load_dotenv
 import logging
@@ -10,6 +9,7 @@ from typing import List, Dict
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
+from ai.components.extraction import extract_text
 
 # Load environment variables
 load_dotenv()
@@ -39,16 +39,11 @@ def clean_text(text: str) -> str:
     return re.sub(r'\s+', ' ', text).strip()
 
 def scrape_website(url: str) -> str:
-    """Scrape text content from a given website URL."""
+    """Scrape the main text content (without navigation and other boilerplate) from a website URL."""
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        for script in soup(["script", "style"]):
-            script.decompose()
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
+        # Parse the page while it downloads instead of holding the whole document first
+        with requests.get(url, timeout=10, stream=True) as response:
+            text = extract_text(response.iter_content(chunk_size=65536, decode_unicode=True), max_chars=8 * 2 ** 20)
         logging.info(f"Successfully scraped content from {url}")
         return clean_text(text)
     except requests.exceptions.RequestException as e: